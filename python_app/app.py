@@ -1,20 +1,36 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
+import time
+
+# Marco inicial para medir o tempo de importação da aplicação
+_INICIO_IMPORTACAO = time.perf_counter()
+
+from flask import Flask, request, jsonify, render_template, send_file, Response, stream_with_context, g
 from flask_cors import CORS
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+import io
 import os
 import json
 import uuid
+import hashlib
 from datetime import datetime
 import requests
 from docx import Document
 import re
 from dotenv import load_dotenv
-import time
 import importlib
+import threading
+from contextlib import nullcontext, contextmanager
 from docx.shared import Cm
 from utils.formatacao_juridica import formatar_texto_juridico, formatar_citacoes_legais
 from utils.docx_generator import DocxGenerator
+from utils.lote_peticoes import renderizar_lote, validar_lote, empacotar_zip, gravar_lote, MIN_LINHAS_PROCESSOS
+from utils.cache_documentos import CacheDocumentos
 from utils.ai_generator import AIGenerator
 from utils.validacao_juridica import ValidacaoJuridica
+from utils.jobs import GerenciadorJobs, FilaCheiaError
+from utils.openai_client import obter_cliente_openai
+from utils.health import MonitorSaude
+from utils.metricas import registro as registro_metricas, REQUISICAO_SEGUNDOS, ETAPA_SEGUNDOS
+from utils.logs import configurar_logging, id_correlacao, resumir
 from openai import OpenAI
 import logging
 
@@ -32,16 +48,36 @@ app = Flask(__name__)
 # Configurar CORS para permitir requisições de qualquer origem
 CORS(app)
 
-# Configuração de logging
-logging.basicConfig(level=logging.INFO)
+# Configuração de logging (níveis, formato e amostragem definidos pelas variáveis LOG_*)
+configurar_logging()
 logger = logging.getLogger(__name__)
 
+# Marcar o início de cada requisição para a métrica de latência e
+# associar um ID de correlação a todos os logs da requisição
+@app.before_request
+def iniciar_medicao_requisicao():
+    g.inicio_requisicao = time.perf_counter()
+    g.id_requisicao = (request.headers.get('X-Request-ID') or uuid.uuid4().hex)[:64]
+    id_correlacao.set(g.id_requisicao)
+
 # Configuração adicional para CORS
 @app.after_request
 def after_request(response):
     response.headers.add('Access-Control-Allow-Origin', '*')
     response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
     response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+    
+    # Registrar a latência pela regra da rota, para não criar uma série por URL
+    inicio = g.pop('inicio_requisicao', None)
+    if inicio is not None:
+        REQUISICAO_SEGUNDOS.observar(
+            time.perf_counter() - inicio,
+            metodo=request.method,
+            rota=request.url_rule.rule if request.url_rule else "desconhecida",
+            status=response.status_code
+        )
+    if 'id_requisicao' in g:
+        response.headers['X-Request-ID'] = g.id_requisicao
     return response
 
 # Configuração
@@ -49,26 +85,39 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 ASSISTANT_ID = os.getenv("ASSISTANT_ID")
 
 # Log de inicialização com informações do assistente
-print("="*80)
-print(f"Inicializando aplicação com API OpenAI")
-print(f"ID do Assistente: {ASSISTANT_ID}")
+logger.info("Inicializando aplicação com API OpenAI")
+logger.debug("ID do Assistente: %s", ASSISTANT_ID)
 
 # Diretórios
 PETICOES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'peticoes')
 TEMPLATES_DOCX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates_docx')
 CLIENTES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'clientes')
+
+# Tipo MIME dos documentos DOCX
+MIMETYPE_DOCX = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# Envio dos downloads delegado ao servidor web: "x-accel" (nginx), "x-sendfile" (Apache/lighttpd) ou vazio
+DOWNLOAD_OFFLOAD = os.getenv("DOWNLOAD_OFFLOAD", "").strip().lower()
+
+# Location interna do nginx que aponta para PETICOES_DIR (usada com "x-accel")
+DOWNLOAD_ACCEL_PREFIXO = os.getenv("DOWNLOAD_ACCEL_PREFIXO", "/peticoes-internas/")
+
+# Tempo, em segundos, em que o navegador reutiliza um download sem revalidá-lo
+DOWNLOAD_MAX_AGE = int(os.getenv("DOWNLOAD_MAX_AGE", "3600"))
+
+# Intervalo entre comentários de keepalive nos streams SSE
+SSE_KEEPALIVE_SEGUNDOS = float(os.getenv("SSE_KEEPALIVE_SEGUNDOS", 15))
 os.makedirs(PETICOES_DIR, exist_ok=True)
 os.makedirs(TEMPLATES_DOCX_DIR, exist_ok=True)
 os.makedirs(CLIENTES_DIR, exist_ok=True)
 
-print("="*80)
 
 # Importar OpenAI de forma segura
 try:
     from openai import OpenAI
-    print("Biblioteca OpenAI importada com sucesso")
+    logger.info("Biblioteca OpenAI importada com sucesso")
 except ImportError as e:
-    print(f"Erro ao importar OpenAI: {e}")
+    logger.error("Erro ao importar OpenAI: %s", e)
     raise e
 
 # Verificar e criar templates padrão se necessário
@@ -91,12 +140,12 @@ def verificar_templates_padrao():
             templates_para_criar.append(template_file)
     
     if templates_para_criar:
-        print(f"Templates a serem criados: {', '.join(templates_para_criar)}")
+        logger.info("Templates a serem criados: %s", ', '.join(templates_para_criar))
         for template_file in templates_para_criar:
             tipo = templates_padrao[template_file]
             criar_template_padrao(template_file, tipo)
     else:
-        print(f"Templates encontrados: {', '.join(templates_existentes)}")
+        logger.info("Templates encontrados: %s", ', '.join(templates_existentes))
         
         # Verificar se os templates existentes precisam ser atualizados
         for template_file in templates_existentes:
@@ -106,7 +155,7 @@ def verificar_templates_padrao():
 def criar_template_padrao(template_file, tipo):
     """Cria um template padrão para o tipo de petição especificado"""
     try:
-        print(f"Criando template padrão para {tipo}...")
+        logger.info("Criando template padrão para %s...", tipo)
         
         # Criar um documento DOCX básico
         doc = Document()
@@ -173,10 +222,10 @@ def criar_template_padrao(template_file, tipo):
         # Salvar o documento
         template_path = os.path.join(TEMPLATES_DOCX_DIR, template_file)
         doc.save(template_path)
-        print(f"Template padrão criado: {template_path}")
+        logger.info("Template padrão criado: %s", template_path)
         
     except Exception as e:
-        print(f"Erro ao criar template padrão {template_file}: {e}")
+        logger.error("Erro ao criar template padrão %s: %s", template_file, e)
 
 def verificar_e_atualizar_template(template_file, tipo):
     """Verifica se um template existente contém todos os placeholders necessários e o atualiza se necessário"""
@@ -197,49 +246,38 @@ def verificar_e_atualizar_template(template_file, tipo):
         placeholders_ausentes = [p for p in placeholders if p not in texto_completo]
         
         if placeholders_ausentes:
-            print(f"Template {template_file} não contém todos os placeholders necessários. Placeholders ausentes: {', '.join(placeholders_ausentes)}")
-            print(f"Criando novo template para substituir o existente...")
+            logger.warning("Template %s não contém todos os placeholders necessários. Placeholders ausentes: %s", template_file, ', '.join(placeholders_ausentes))
+            logger.info("Criando novo template para substituir o existente...")
             
             # Fazer backup do template existente
             backup_path = os.path.join(TEMPLATES_DOCX_DIR, f"backup_{template_file}")
             import shutil
             shutil.copy2(template_path, backup_path)
-            print(f"Backup do template existente criado: {backup_path}")
+            logger.info("Backup do template existente criado: %s", backup_path)
             
             # Criar novo template
             criar_template_padrao(template_file, tipo)
         else:
-            print(f"Template {template_file} contém todos os placeholders necessários.")
+            logger.info("Template %s contém todos os placeholders necessários.", template_file)
             
     except Exception as e:
-        print(f"Erro ao verificar template {template_file}: {e}")
-
-# Verificar e criar templates padrão
-verificar_templates_padrao()
+        logger.error("Erro ao verificar template %s: %s", template_file, e)
 
-# Função para criar cliente OpenAI de forma segura
+# Função para obter o cliente OpenAI compartilhado de forma segura
 def create_openai_client():
+    """
+    Obtém o cliente OpenAI do processo
+    
+    Não faz chamadas à API: a conectividade é verificada em segundo plano
+    pelo monitor_saude (ver /api/status).
+    """
     try:
-        print("Criando cliente OpenAI com chave API...")
-
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-        os.environ.pop('http_proxy', None)
-        os.environ.pop('https_proxy', None)
-        
-        # Criar cliente com apenas a chave API
-        client = OpenAI(api_key=OPENAI_API_KEY)
+        logger.info("Obtendo cliente OpenAI com chave API...")
         
-        # Testar a conexão com a API
-        print("Testando conexão com a API OpenAI...")
-        models = client.models.list()
-        print(f"Conexão bem-sucedida! {len(models.data)} modelos disponíveis.")
-        
-        return client
+        # Reutilizar o cliente (e o pool de conexões) do processo
+        return obter_cliente_openai(OPENAI_API_KEY)
     except Exception as e:
-        print(f"Erro ao criar cliente OpenAI: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erro ao criar cliente OpenAI: %s", e)
         raise e
 
 def validar_campos_peticao(data):
@@ -286,38 +324,30 @@ def gerar_html_preview(tipo, fatos, argumentos, pedidos, cliente_id=None, client
         # Tentar obter mais informações do cliente do banco de dados
         if cliente_id:
             try:
-                # Carregar informações do cliente
-                clientes_json_path = os.path.join(CLIENTES_DIR, 'clientes.json')
-                if os.path.exists(clientes_json_path):
-                    with open(clientes_json_path, 'r', encoding='utf-8') as f:
-                        clientes = json.load(f)
-                        
-                        # Converter cliente_id para string para comparação
-                        cliente_id_str = str(cliente_id)
-                        cliente = next((c for c in clientes if str(c.get('id')) == cliente_id_str), None)
-                        
-                        if cliente:
-                            # Usar nome do cliente do banco de dados se não fornecido diretamente
-                            if not cliente_nome:
-                                cliente_nome = cliente.get('nome', 'Cliente')
-                            
-                            # Construir qualificação mais completa se tiver endereço
-                            endereco = cliente.get('endereco', '')
-                            if endereco and cliente_cnpj:
-                                cliente_qualificacao = f"pessoa jurídica de direito privado, inscrita no CNPJ sob o nº {cliente_cnpj}, com sede na {endereco}"
-                            elif endereco:
-                                cliente_qualificacao = f"pessoa jurídica de direito privado, com sede na {endereco}"
-                            
-                            # Obter informações do advogado
-                            advogados = cliente.get('advogados', [])
-                            if advogados and len(advogados) > 0:
-                                advogado = advogados[0]
-                                advogado_nome = advogado.get('nome', 'ADVOGADO')
-                                advogado_oab = advogado.get('oab', 'OAB/XX 12345')
-                        else:
-                            print(f"Cliente com ID {cliente_id} não encontrado no arquivo clientes.json")
+                cliente = banco_clientes.obter(cliente_id)
+                
+                if cliente:
+                    # Usar nome do cliente do banco de dados se não fornecido diretamente
+                    if not cliente_nome:
+                        cliente_nome = cliente.get('nome', 'Cliente')
+                    
+                    # Construir qualificação mais completa se tiver endereço
+                    endereco = cliente.get('endereco', '')
+                    if endereco and cliente_cnpj:
+                        cliente_qualificacao = f"pessoa jurídica de direito privado, inscrita no CNPJ sob o nº {cliente_cnpj}, com sede na {endereco}"
+                    elif endereco:
+                        cliente_qualificacao = f"pessoa jurídica de direito privado, com sede na {endereco}"
+                    
+                    # Obter informações do advogado
+                    advogados = cliente.get('advogados', [])
+                    if advogados and len(advogados) > 0:
+                        advogado = advogados[0]
+                        advogado_nome = advogado.get('nome', 'ADVOGADO')
+                        advogado_oab = advogado.get('oab', 'OAB/XX 12345')
+                else:
+                    logger.warning("Cliente com ID %s não encontrado no arquivo clientes.json", cliente_id)
             except Exception as e:
-                print(f"Erro ao carregar dados do cliente: {str(e)}")
+                logger.error("Erro ao carregar dados do cliente: %s", str(e))
         
         # Formatar a data atual
         data_atual = datetime.now().strftime('%d/%m/%Y')
@@ -403,7 +433,7 @@ def gerar_html_preview(tipo, fatos, argumentos, pedidos, cliente_id=None, client
         
         return html
     except Exception as e:
-        print(f"Erro ao gerar HTML preview: {e}")
+        logger.error("Erro ao gerar HTML preview: %s", e)
         # Em caso de erro, retornar um HTML básico
         return f"""
 <div style="font-family: Arial, sans-serif; padding: 20px;">
@@ -414,29 +444,69 @@ def gerar_html_preview(tipo, fatos, argumentos, pedidos, cliente_id=None, client
 
 # Inicializar geradores
 docx_generator = DocxGenerator(TEMPLATES_DOCX_DIR, PETICOES_DIR, CLIENTES_DIR)
-ai_generator = AIGenerator(api_key=os.getenv("OPENAI_API_KEY"), assistant_id=os.getenv("ASSISTANT_ID"))
 
-# Inicializar validador jurídico
-validador_juridico = ValidacaoJuridica()
+# Banco de clientes (SQLite), compartilhado com o DocxGenerator, gerenciar_clientes.py e /api/clientes
+banco_clientes = docx_generator.clientes
+
+# Índice de metadados das petições, atualizado a cada documento gerado
+indice_peticoes = docx_generator.indice
+
+# Documentos gerados sem gravação em peticoes/ (entrega "memoria"), disponíveis por alguns
+# minutos na memória do worker (ou, com DOCUMENTOS_MEMORIA_PATH, em um banco compartilhado)
+cache_documentos = CacheDocumentos.do_ambiente()
+
+# O gerador de IA e o validador jurídico são criados sob demanda (ver aquecer_aplicacao)
+_ai_generator = None
+_validador_juridico = None
+_inicializacao_lock = threading.Lock()
 
-def gerar_peticao_com_assistente(tipo, motivo, fatos):
+def obter_ai_generator():
+    """Obtém o gerador de IA, criando-o no primeiro uso"""
+    global _ai_generator
+    if _ai_generator is None:
+        with _inicializacao_lock:
+            if _ai_generator is None:
+                _ai_generator = AIGenerator(api_key=os.getenv("OPENAI_API_KEY"), assistant_id=os.getenv("ASSISTANT_ID"))
+    return _ai_generator
+
+def obter_validador_juridico():
+    """Obtém o validador jurídico, carregando as regras no primeiro uso"""
+    global _validador_juridico
+    if _validador_juridico is None:
+        with _inicializacao_lock:
+            if _validador_juridico is None:
+                _validador_juridico = ValidacaoJuridica()
+    return _validador_juridico
+
+# Inicializar fila de jobs de geração assíncrona
+gerenciador_jobs = GerenciadorJobs(
+    max_workers=int(os.getenv("JOBS_MAX_WORKERS", 4)),
+    max_pendentes=int(os.getenv("JOBS_MAX_PENDENTES", 100)),
+    ttl_segundos=int(os.getenv("JOBS_TTL_SEGUNDOS", 3600))
+)
+
+def gerar_peticao_com_assistente(tipo, motivo, fatos, callback=None, prazo=None):
     """Gera uma petição usando o Assistente da OpenAI"""
     try:
-        print("="*80)
-        print(f"Iniciando geração de petição com o Assistente da OpenAI...")
+        logger.info("Iniciando geração de petição com o Assistente da OpenAI...")
         
         # Usar a nova classe AIGenerator
-        resultado = ai_generator.gerar_peticao(tipo, motivo, fatos)
+        resultado = obter_ai_generator().gerar_peticao(tipo, motivo, fatos, callback=callback, prazo=prazo)
         
         return resultado
     except Exception as error:
-        print(f"Erro ao gerar petição com assistente: {error}")
+        logger.error("Erro ao gerar petição com assistente: %s", error)
         raise error
 
-def gerar_docx(tipo, texto, cliente_id=None, cliente_nome=None, cliente_razao_social=None, cliente_cnpj=None, autoridade=None, referencia_processo=None, cidade=None, fatos_texto=None, argumentos_texto=None, pedidos_texto=None):
-    """Gera um documento DOCX com o texto da petição"""
+def gerar_docx(tipo, texto, cliente_id=None, cliente_nome=None, cliente_razao_social=None, cliente_cnpj=None, autoridade=None, referencia_processo=None, cidade=None, fatos_texto=None, argumentos_texto=None, pedidos_texto=None, em_memoria=False):
+    """
+    Gera um documento DOCX com o texto da petição
+    
+    Retorna o caminho do arquivo gravado em PETICOES_DIR ou, com em_memoria=True,
+    o documento renderizado em memória (ver DocxGenerator.renderizar_documento)
+    """
     try:
-        print(f"Iniciando geração do documento DOCX para petição: {tipo}")
+        logger.info("Iniciando geração do documento DOCX para petição: %s", tipo)
         
         # Preparar dados para o gerador de documentos
         dados_peticao = {
@@ -481,155 +551,241 @@ def gerar_docx(tipo, texto, cliente_id=None, cliente_nome=None, cliente_razao_so
         dados_peticao['pedidos_texto'] = pedidos
         
         # Gerar documento usando o DocxGenerator
+        if em_memoria:
+            return docx_generator.renderizar_documento(tipo, dados_peticao)
         filepath = docx_generator.gerar_documento(tipo, dados_peticao)
         
         return filepath
     except Exception as e:
-        print(f"Erro ao gerar documento DOCX: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erro ao gerar documento DOCX: %s", e)
         raise e
 
-@app.route('/api/gerar-peticao', methods=['POST'])
-def api_gerar_peticao():
-    """Endpoint para gerar petições"""
-    print("="*80)
-    print("Recebida solicitação para gerar petição")
-    print("Headers:", dict(request.headers))
-    print("Dados recebidos:", request.get_json())
+class ErroPeticao(Exception):
+    """Erro de geração de petição com o payload e o status HTTP da resposta"""
+    
+    def __init__(self, error, message, status=500):
+        super().__init__(message)
+        self.status = status
+        self.payload = {
+            "error": error,
+            "message": message
+        }
+
+@contextmanager
+def _etapa(job, nome):
+    """Mede a duração da etapa na métrica de etapas e, se houver job, registra-a nele"""
+    with ETAPA_SEGUNDOS.medir(etapa=nome), (job.etapa(nome) if job is not None else nullcontext()):
+        yield
+
+def _formatar_evento_sse(evento):
+    """Formata um evento de job no protocolo Server-Sent Events"""
+    dados = json.dumps(evento["dados"], ensure_ascii=False, default=str)
+    return f"id: {evento['id']}\nevent: {evento['evento']}\ndata: {dados}\n\n"
+
+def _stream_eventos_job(job, a_partir_de=0):
+    """Gera os eventos de um job em formato SSE até que ele finalize"""
+    # Sugerir ao navegador o intervalo de reconexão
+    yield "retry: 3000\n\n"
+    
+    proximo = a_partir_de
+    while True:
+        eventos = job.aguardar_eventos(proximo, timeout=SSE_KEEPALIVE_SEGUNDOS)
+        if not eventos:
+            if job.finalizado:
+                return
+            # Comentário SSE para manter a conexão aberta em proxies
+            yield ": keepalive\n\n"
+            continue
+        
+        for evento in eventos:
+            yield _formatar_evento_sse(evento)
+            if evento["evento"] in ("concluido", "erro"):
+                return
+        proximo = eventos[-1]["id"] + 1
+
+def _resposta_sse(job, a_partir_de=0):
+    """Cria a resposta HTTP de streaming dos eventos de um job"""
+    response = Response(
+        stream_with_context(_stream_eventos_job(job, a_partir_de)),
+        mimetype='text/event-stream'
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    response.headers["X-Job-Id"] = job.id
+    response.headers["Access-Control-Expose-Headers"] = "X-Job-Id, X-Request-ID"
+    return response
+
+# Tamanho mínimo de cada seção gerada; seções menores são regeneradas individualmente
+TAMANHO_MINIMO_SECOES = {"fatos": 50, "argumentos": 100, "pedido": 1}
+
+# Instruções adicionais usadas ao regenerar cada seção
+ENFASE_REGENERACAO = {
+    "fatos": "É EXTREMAMENTE IMPORTANTE expandir os fatos fornecidos em uma narrativa jurídica completa.",
+    "argumentos": "É EXTREMAMENTE IMPORTANTE fornecer argumentos jurídicos detalhados com citações de leis e jurisprudências."
+}
+
+# Formas de entrega do DOCX gerado: gravado em peticoes/ (padrão), mantido no cache
+# temporário por alguns minutos ou enviado no corpo da própria resposta (apenas na geração síncrona)
+ENTREGAS_DOCUMENTO = ("arquivo", "memoria", "resposta")
+
+def preparar_dados_peticao(data):
+    """Normaliza os dados do cliente e valida a requisição de geração"""
+    # Verificar se o cliente foi enviado no formato antigo (objeto cliente) e extrair o cliente_id
+    if 'cliente' in data and isinstance(data['cliente'], dict) and 'id' in data['cliente']:
+        cliente_obj = data['cliente']
+        data['cliente_id'] = cliente_obj.get('id')
+        data['cliente_nome'] = cliente_obj.get('nome')
+        data['cliente_razao_social'] = cliente_obj.get('razaoSocial')
+        data['cliente_cnpj'] = cliente_obj.get('cnpj')
+        logger.info("Cliente extraído do formato antigo: %s", data['cliente_id'])
+    
+    # Garantir que temos as informações do cliente
+    if data.get('cliente_id'):
+        try:
+            cliente = banco_clientes.obter(data.get('cliente_id'))
+            
+            if cliente:
+                # Usar o nome do cliente do banco de dados se não fornecido diretamente
+                if not data.get('cliente_nome'):
+                    data['cliente_nome'] = cliente.get('nome')
+        except Exception as e:
+            logger.error("Erro ao carregar dados do cliente: %s", str(e))
+    
+    if data.get('entrega', 'arquivo') not in ENTREGAS_DOCUMENTO:
+        raise ErroPeticao(
+            "Campos inválidos",
+            f"Entrega inválida: {data.get('entrega')}. Use uma de: {', '.join(ENTREGAS_DOCUMENTO)}",
+            400
+        )
+    
+    # Validar campos
+    valid, error_msg = validar_campos_peticao(data)
+    if not valid:
+        logger.error("Erro de validação: %s", error_msg)
+        raise ErroPeticao("Campos inválidos", error_msg, 400)
+    
+    # Verificar se temos um ASSISTANT_ID configurado
+    if not ASSISTANT_ID:
+        logger.error("ID do assistente não configurado")
+        raise ErroPeticao(
+            "ID do assistente não fornecido",
+            "É necessário fornecer o ID do assistente para gerar a petição.",
+            400
+        )
+    
+    return data
+
+def executar_geracao_peticao(data, job=None):
+    """
+    Executa o pipeline completo de geração (IA, prévia HTML e DOCX)
+    
+    Args:
+        data: Dados da requisição já validados por preparar_dados_peticao
+        job: Job em execução, usado para registrar a duração das etapas (opcional)
+        
+    Returns:
+        Dicionário com a resposta do endpoint de geração
+    """
+    logger.info("Usando ID do assistente: %s", ASSISTANT_ID)
+    
+    # Obter o tipo de petição e normalizar
+    tipo_original = data.get('tipo')
+    motivo = data.get('motivo')
+    fatos = data.get('fatos')
+    
+    # Mapear tipos abreviados para nomes completos
+    tipo_map = {
+        "recurso": "Recurso Administrativo",
+        "impugnação": "Impugnação ao Edital",
+        "mandado": "Mandado de Segurança",
+        "contrarrazões": "Contrarrazões de Recurso"
+    }
+    
+    # Normalizar o tipo para garantir consistência
+    tipo = tipo_map.get(tipo_original.lower(), tipo_original)
+    logger.info("Tipo de petição normalizado: %s -> %s", tipo_original, tipo)
+    
+    # Gerar petição com o assistente
+    logger.info("Iniciando geração de petição: %s", tipo)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Motivo fornecido: %s", resumir(motivo))
+        logger.debug("Fatos básicos fornecidos: %s", resumir(fatos), extra={"amostrar": True})
+    
+    # Adicionar contexto adicional se disponível
+    contexto_adicional = None
+    if data.get('processo'):
+        contexto_adicional = f"Número do processo: {data.get('processo')}. "
+    if data.get('orgao'):
+        contexto_adicional = (contexto_adicional or "") + f"Órgão/Entidade: {data.get('orgao')}. "
+    if data.get('autoridade'):
+        contexto_adicional = (contexto_adicional or "") + f"Autoridade: {data.get('autoridade')}. "
+    
+    # Eventos de progresso da IA são repassados ao job (usados pelo stream SSE)
+    callback = job.emitir if job is not None else None
     
+    # Prazo único para aguardar os runs da geração e das regenerações
+    prazo = obter_ai_generator().polling.prazo()
+    
+    # Gerar petição com conteúdo expandido
+    with _etapa(job, "geracao_ia"):
+        resultado = gerar_peticao_com_assistente(tipo, motivo, fatos, callback=callback, prazo=prazo)
+    logger.info("Petição gerada com sucesso: %s", tipo)
+    
+    # Extrair as partes da petição
+    fatos_texto = resultado.get("fatos", "")
+    argumentos_texto = resultado.get("argumentos", "")
+    pedido_texto = resultado.get("pedido", "")
+    
+    # Regenerar apenas as seções ausentes ou curtas demais, no mesmo thread quando disponível
+    secoes = {"fatos": fatos_texto, "argumentos": argumentos_texto, "pedido": pedido_texto}
+    secoes_ausentes = resultado.get("secoes_ausentes", [])
     try:
-        data = request.json
-        
-        # Verificar se o cliente foi enviado no formato antigo (objeto cliente) e extrair o cliente_id
-        if 'cliente' in data and isinstance(data['cliente'], dict) and 'id' in data['cliente']:
-            cliente_obj = data['cliente']
-            data['cliente_id'] = cliente_obj.get('id')
-            data['cliente_nome'] = cliente_obj.get('nome')
-            data['cliente_razao_social'] = cliente_obj.get('razaoSocial')
-            data['cliente_cnpj'] = cliente_obj.get('cnpj')
-            print(f"Cliente extraído do formato antigo: {data['cliente_id']}")
-        
-        # Garantir que temos as informações do cliente
-        if data.get('cliente_id'):
-            try:
-                # Carregar informações do cliente
-                clientes_json_path = os.path.join(CLIENTES_DIR, 'clientes.json')
-                if os.path.exists(clientes_json_path):
-                    with open(clientes_json_path, 'r', encoding='utf-8') as f:
-                        clientes = json.load(f)
-                        
-                        # Converter cliente_id para string para comparação
-                        cliente_id_str = str(data.get('cliente_id'))
-                        cliente = next((c for c in clientes if str(c.get('id')) == cliente_id_str), None)
-                        
-                        if cliente:
-                            # Usar o nome do cliente do banco de dados se não fornecido diretamente
-                            if not data.get('cliente_nome'):
-                                data['cliente_nome'] = cliente.get('nome')
-            except Exception as e:
-                print(f"Erro ao carregar dados do cliente: {str(e)}")
-        
-        # Validar campos
-        valid, error_msg = validar_campos_peticao(data)
-        if not valid:
-            print(f"Erro de validação: {error_msg}")
-            return jsonify({
-                "error": "Campos inválidos",
-                "message": error_msg
-            }), 400
-        
-        # Verificar se temos um ASSISTANT_ID configurado
-        if not ASSISTANT_ID:
-            print("Erro: ID do assistente não configurado")
-            return jsonify({
-                "error": "ID do assistente não fornecido",
-                "message": "É necessário fornecer o ID do assistente para gerar a petição."
-            }), 400
+        for secao, tamanho_minimo in TAMANHO_MINIMO_SECOES.items():
+            texto_atual = secoes[secao]
+            if secao not in secoes_ausentes and texto_atual and len(texto_atual.strip()) >= tamanho_minimo:
+                continue
             
-        print(f"Usando ID do assistente: {ASSISTANT_ID}")
-        
-        # Obter o tipo de petição e normalizar
-        tipo_original = data.get('tipo')
-        motivo = data.get('motivo')
-        fatos = data.get('fatos')
-        
-        # Mapear tipos abreviados para nomes completos
-        tipo_map = {
-            "recurso": "Recurso Administrativo",
-            "impugnação": "Impugnação ao Edital",
-            "mandado": "Mandado de Segurança",
-            "contrarrazões": "Contrarrazões de Recurso"
-        }
-        
-        # Normalizar o tipo para garantir consistência
-        tipo = tipo_map.get(tipo_original.lower(), tipo_original)
-        print(f"Tipo de petição normalizado: {tipo_original} -> {tipo}")
-        
-        # Gerar petição com o assistente
-        print(f"Iniciando geração de petição: {tipo}")
-        print(f"Motivo fornecido: {motivo}")
-        print(f"Fatos básicos fornecidos: {fatos}")
-        
-        # Adicionar contexto adicional se disponível
-        contexto_adicional = None
-        if data.get('processo'):
-            contexto_adicional = f"Número do processo: {data.get('processo')}. "
-        if data.get('orgao'):
-            contexto_adicional = (contexto_adicional or "") + f"Órgão/Entidade: {data.get('orgao')}. "
-        if data.get('autoridade'):
-            contexto_adicional = (contexto_adicional or "") + f"Autoridade: {data.get('autoridade')}. "
-        
-        # Gerar petição com conteúdo expandido
-        resultado = gerar_peticao_com_assistente(tipo, motivo, fatos)
-        print(f"Petição gerada com sucesso: {tipo}")
-        
-        # Extrair as partes da petição
-        fatos_texto = resultado.get("fatos", "")
-        argumentos_texto = resultado.get("argumentos", "")
-        pedido_texto = resultado.get("pedido", "")
-        
-        # Verificar se o conteúdo foi gerado corretamente
-        if not fatos_texto or len(fatos_texto.strip()) < 50:
-            print(f"AVISO: Fatos gerados muito curtos ou vazios: '{fatos_texto}'")
-            # Tentar gerar novamente com mais ênfase nos fatos
-            try:
-                print("Tentando gerar novamente com mais ênfase nos fatos...")
-                resultado = ai_generator.gerar_peticao(tipo, motivo, fatos, contexto_adicional=f"É EXTREMAMENTE IMPORTANTE expandir os fatos fornecidos em uma narrativa jurídica completa. Fatos básicos: {fatos}")
-                fatos_texto = resultado.get("fatos", fatos_texto)
-                argumentos_texto = resultado.get("argumentos", argumentos_texto)
-                pedido_texto = resultado.get("pedido", pedido_texto)
-            except Exception as e:
-                print(f"Erro ao tentar gerar novamente: {e}")
-        
-        if not argumentos_texto or len(argumentos_texto.strip()) < 100:
-            print(f"AVISO: Argumentos gerados muito curtos ou vazios: '{argumentos_texto}'")
-            # Tentar gerar novamente com mais ênfase nos argumentos
+            logger.warning("Seção '%s' gerada muito curta ou vazia: '%s'", secao, resumir(texto_atual, 100))
+            # O contexto do processo (número, órgão, autoridade) vale também para a regeneração
+            contexto_secao = (contexto_adicional or "") + ENFASE_REGENERACAO.get(secao, "")
             try:
-                print("Tentando gerar novamente com mais ênfase nos argumentos...")
-                resultado_args = ai_generator.gerar_peticao(tipo, motivo, fatos, contexto_adicional=f"É EXTREMAMENTE IMPORTANTE fornecer argumentos jurídicos detalhados com citações de leis e jurisprudências.")
-                argumentos_texto = resultado_args.get("argumentos", argumentos_texto)
-                if not fatos_texto:
-                    fatos_texto = resultado_args.get("fatos", "")
-                if not pedido_texto:
-                    pedido_texto = resultado_args.get("pedido", "")
+                with _etapa(job, f"regeneracao_{secao}"):
+                    novo_texto = obter_ai_generator().regenerar_secao(
+                        tipo, motivo, fatos, secao,
+                        secoes_atuais=secoes,
+                        thread_id=resultado.get("thread_id"),
+                        contexto_adicional=contexto_secao or None,
+                        callback=callback,
+                        prazo=prazo
+                    )
+                if novo_texto:
+                    secoes[secao] = novo_texto
             except Exception as e:
-                print(f"Erro ao tentar gerar novamente: {e}")
-        
-        # Se alguma parte ainda estiver vazia, retornar erro
-        if not fatos_texto or not argumentos_texto or not pedido_texto:
-            print("Erro: Conteúdo da petição incompleto após múltiplas tentativas")
-            return jsonify({
-                "error": "Conteúdo incompleto",
-                "message": "Não foi possível gerar o conteúdo completo da petição após múltiplas tentativas."
-            }), 500
-        
-        # Limpar os textos
-        fatos_texto = limpar_texto(fatos_texto)
-        argumentos_texto = limpar_texto(argumentos_texto)
-        pedido_texto = limpar_texto(pedido_texto)
-        
-        # Gerar HTML para preview
+                logger.error("Erro ao regenerar a seção '%s': %s", secao, e)
+    finally:
+        # O thread da geração não é mais necessário e é excluído em segundo plano
+        if resultado.get("thread_id"):
+            obter_ai_generator().liberar_thread(resultado["thread_id"])
+    
+    fatos_texto = secoes["fatos"]
+    argumentos_texto = secoes["argumentos"]
+    pedido_texto = secoes["pedido"]
+    
+    # Se alguma parte ainda estiver vazia, retornar erro
+    if not fatos_texto or not argumentos_texto or not pedido_texto:
+        logger.error("Conteúdo da petição incompleto após múltiplas tentativas")
+        raise ErroPeticao(
+            "Conteúdo incompleto",
+            "Não foi possível gerar o conteúdo completo da petição após múltiplas tentativas."
+        )
+    
+    # Limpar os textos
+    fatos_texto = limpar_texto(fatos_texto)
+    argumentos_texto = limpar_texto(argumentos_texto)
+    pedido_texto = limpar_texto(pedido_texto)
+    
+    # Gerar HTML para preview
+    with _etapa(job, "preview_html"):
         html_preview = gerar_html_preview(
             tipo=tipo,
             fatos=fatos_texto,
@@ -643,9 +799,11 @@ def api_gerar_peticao():
             referencia_processo=data.get('processo'),
             cidade=None  # Cidade será obtida do cliente ou padrão
         )
-        
-        # Gerar documento DOCX
-        docx_filename = gerar_docx(
+    
+    # Gerar documento DOCX
+    entrega = data.get('entrega', 'arquivo')
+    with _etapa(job, "documento_docx"):
+        documento = gerar_docx(
             tipo=tipo,
             texto=None,  # Não usar o texto completo, mas as partes separadas
             cliente_id=data.get('cliente_id'),
@@ -657,147 +815,551 @@ def api_gerar_peticao():
             cidade=None,  # Cidade será obtida do cliente ou padrão
             fatos_texto=fatos_texto,
             argumentos_texto=argumentos_texto,
-            pedidos_texto=pedido_texto
+            pedidos_texto=pedido_texto,
+            em_memoria=True
         )
-        
-        # Construir URL para download
-        download_url = f"/download/{docx_filename}"
+        if entrega == 'arquivo':
+            docx_generator.gravar_documento(documento)
+    
+    # Construir URL para download
+    if entrega == 'arquivo':
+        download_url = f"/api/download/{documento['nome']}"
+    elif entrega == 'memoria':
+        download_url = f"/api/documentos/{cache_documentos.guardar(documento)}"
+    else:
+        download_url = None
+    if job is not None and download_url:
+        job.emitir("docx_gerado", {"download_url": download_url})
+    
+    resultado = {
+        "success": True,
+        "message": "Petição gerada com sucesso",
+        "preview": html_preview,
+        "download_url": download_url,
+        "tipo": tipo,
+        "fatos": fatos_texto,
+        "argumentos": argumentos_texto,
+        "pedidos": pedido_texto
+    }
+    if entrega == 'resposta':
+        # Documento enviado no corpo da resposta pelo endpoint síncrono (não serializável em JSON)
+        resultado["documento"] = documento
+    return resultado
+
+def _resposta_documento(documento):
+    """Envia um documento renderizado em memória (DOCX ou ZIP de lote), sem passar pelo disco"""
+    response = send_file(
+        io.BytesIO(documento["conteudo"]),
+        mimetype='application/zip' if documento["nome"].endswith('.zip') else MIMETYPE_DOCX,
+        as_attachment=True,
+        download_name=documento["nome"],
+        etag=documento["hash"],
+        max_age=0
+    )
+    response.headers["Access-Control-Expose-Headers"] = "Content-Disposition, ETag, X-Request-ID"
+    return response
+
+@app.route('/api/gerar-peticao', methods=['POST'])
+def api_gerar_peticao():
+    """
+    Endpoint para gerar petições
+    
+    Com ``?async=1`` na URL (ou ``"assincrono": true`` no corpo) a geração é
+    enfileirada e a resposta 202 traz o ID do job a ser consultado em
+    ``/api/jobs/<job_id>``.
+    
+    O campo ``"entrega"`` do corpo define o destino do DOCX: ``"arquivo"``
+    (padrão) grava em peticoes/; ``"memoria"`` mantém o documento no cache
+    temporário por alguns minutos, com ``download_url`` em
+    ``/api/documentos/<chave>``; ``"resposta"`` envia o próprio DOCX como
+    corpo da resposta (na geração assíncrona, equivale a ``"memoria"``).
+    
+    Com ``"resposta"``, o corpo não é JSON: os campos ``success``,
+    ``preview``, ``fatos``, ``argumentos``, ``pedidos`` e ``download_url``
+    não são enviados. Clientes que precisam deles devem usar ``"memoria"``.
+    """
+    logger.info("Recebida solicitação para gerar petição")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Headers: %s", resumir(dict(request.headers)), extra={"amostrar": True})
+        logger.debug("Dados recebidos: %s", resumir(request.get_json(silent=True)), extra={"amostrar": True})
+    
+    try:
+        data = preparar_dados_peticao(request.json)
+        
+        assincrono = request.args.get('async', '').lower() in ('1', 'true', 'sim') or data.get('assincrono') is True
+        if assincrono:
+            # O resultado do job é consultado depois: o documento fica em memória em vez de ir na resposta
+            if data.get('entrega') == 'resposta':
+                data['entrega'] = 'memoria'
+            job = gerenciador_jobs.submeter(
+                executar_geracao_peticao,
+                data,
+                descricao=f"Geração de petição: {data.get('tipo')}"
+            )
+            logger.info("Job de geração enfileirado: %s", job.id)
+            return jsonify({
+                "success": True,
+                "message": "Geração de petição enfileirada",
+                "job_id": job.id,
+                "estado": job.estado,
+                "status_url": f"/api/jobs/{job.id}"
+            }), 202
         
         # Retornar resposta
+        resultado = executar_geracao_peticao(data)
+        if "documento" in resultado:
+            return _resposta_documento(resultado["documento"])
+        return jsonify(resultado)
+        
+    except ErroPeticao as error:
+        return jsonify(error.payload), error.status
+    except FilaCheiaError as error:
+        logger.warning("Fila de jobs cheia: %s", error)
         return jsonify({
-            "success": True,
-            "message": "Petição gerada com sucesso",
-            "preview": html_preview,
-            "download_url": download_url,
-            "tipo": tipo,
-            "fatos": fatos_texto,
-            "argumentos": argumentos_texto,
-            "pedidos": pedido_texto
-        })
-        
+            "error": "Fila de geração cheia",
+            "message": "Muitas petições em processamento. Tente novamente em instantes."
+        }), 503
     except Exception as error:
-        print(f"Erro ao gerar petição: {error}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erro ao gerar petição: %s", error)
         
         return jsonify({
             "error": "Erro ao gerar petição",
             "message": str(error)
         }), 500
 
+@app.route('/api/gerar-peticao/stream', methods=['POST'])
+def api_gerar_peticao_stream():
+    """
+    Endpoint para gerar petições com acompanhamento em tempo real
+    
+    A geração é enfileirada como um job e a resposta é um stream
+    Server-Sent Events com as etapas (thread criada, mudanças de status do
+    run, seções extraídas, DOCX gravado), os tokens das seções quando o
+    modelo de chat é usado e, por fim, o evento ``concluido`` ou ``erro``.
+    """
+    logger.info("Recebida solicitação para gerar petição com streaming")
+    
+    try:
+        data = preparar_dados_peticao(request.json)
+        if data.get('entrega') == 'resposta':
+            data['entrega'] = 'memoria'
+        job = gerenciador_jobs.submeter(
+            executar_geracao_peticao,
+            data,
+            descricao=f"Geração de petição: {data.get('tipo')}"
+        )
+        logger.info("Job de geração com streaming enfileirado: %s", job.id)
+        return _resposta_sse(job)
+    except ErroPeticao as error:
+        return jsonify(error.payload), error.status
+    except FilaCheiaError as error:
+        logger.warning("Fila de jobs cheia: %s", error)
+        return jsonify({
+            "error": "Fila de geração cheia",
+            "message": "Muitas petições em processamento. Tente novamente em instantes."
+        }), 503
+    except Exception as error:
+        logger.error("Erro ao iniciar geração com streaming: %s", error)
+        return jsonify({
+            "error": "Erro ao gerar petição",
+            "message": str(error)
+        }), 500
+
+@app.route('/api/jobs/<job_id>/eventos', methods=['GET'])
+def api_eventos_job(job_id):
+    """Endpoint SSE para acompanhar (ou retomar) os eventos de um job existente"""
+    job = gerenciador_jobs.obter(job_id)
+    if not job:
+        return jsonify({
+            "error": "Job não encontrado",
+            "message": f"Nenhum job com ID {job_id} foi encontrado ou ele já expirou."
+        }), 404
+    
+    # Permitir retomar o stream a partir do último evento recebido
+    ultimo_id = request.headers.get('Last-Event-ID') or request.args.get('desde')
+    a_partir_de = int(ultimo_id) + 1 if ultimo_id and ultimo_id.isdigit() else 0
+    
+    return _resposta_sse(job, a_partir_de)
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_status_job(job_id):
+    """Endpoint para consultar o estado de um job de geração"""
+    job = gerenciador_jobs.obter(job_id)
+    if not job:
+        return jsonify({
+            "error": "Job não encontrado",
+            "message": f"Nenhum job com ID {job_id} foi encontrado ou ele já expirou."
+        }), 404
+    
+    return jsonify(job.to_dict())
+
+# Tamanho máximo de uma página da listagem de petições
+LIMITE_MAXIMO_PETICOES = 500
+
+def _ler_data_filtro(valor, fim_do_dia=False):
+    """Converte uma data ISO 8601 da query string em timestamp (None se ausente)"""
+    if not valor:
+        return None
+    try:
+        data = datetime.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f"Data inválida: {valor}. Use o formato AAAA-MM-DD.")
+    if fim_do_dia and len(valor) == 10:
+        data = data.replace(hour=23, minute=59, second=59, microsecond=999999)
+    return data.timestamp()
+
 @app.route('/api/peticoes', methods=['GET'])
 def api_listar_peticoes():
-    """Endpoint para listar petições"""
+    """
+    Endpoint para listar petições, com paginação por cursor
+    
+    Parâmetros (query string), todos opcionais:
+        limite: itens por página (padrão 50, máximo 500)
+        cursor: valor de "proximo_cursor" da página anterior
+        cliente: ID ou nome do cliente
+        tipo: tipo da petição
+        desde / ate: intervalo de criação (ISO 8601, ex.: 2025-03-01)
+        ordenar: criado_em (padrão), nome ou tamanho
+        ordem: desc (padrão) ou asc
+    """
     try:
-        if not os.path.exists(PETICOES_DIR):
-            return jsonify({
-                "sucesso": True,
-                "peticoes": []
-            })
-        
-        arquivos = os.listdir(PETICOES_DIR)
-        peticoes = [
-            {
-                "nome": arquivo,
-                "caminho": os.path.join(PETICOES_DIR, arquivo)
-            }
-            for arquivo in arquivos if arquivo.endswith('.docx')
-        ]
-        
+        limite = min(max(int(request.args.get('limite', 50)), 1), LIMITE_MAXIMO_PETICOES)
+        desde = _ler_data_filtro(request.args.get('desde'))
+        ate = _ler_data_filtro(request.args.get('ate'), fim_do_dia=True)
+        itens, proximo_cursor = indice_peticoes.listar(
+            limite=limite,
+            cursor=request.args.get('cursor'),
+            cliente=request.args.get('cliente'),
+            tipo=request.args.get('tipo'),
+            desde=desde,
+            ate=ate,
+            ordenar=request.args.get('ordenar', 'criado_em'),
+            decrescente=request.args.get('ordem', 'desc').lower() != 'asc'
+        )
+    except ValueError as error:
         return jsonify({
-            "sucesso": True,
-            "peticoes": peticoes
-        })
+            "error": "Parâmetros inválidos",
+            "message": str(error)
+        }), 400
     except Exception as error:
         return jsonify({
             "error": "Falha ao listar petições",
             "message": str(error)
         }), 500
+    
+    peticoes = []
+    for item in itens:
+        item["caminho"] = docx_generator.caminho_peticao(item["nome"], item)
+        item["download_url"] = f"/api/download/{item['nome']}"
+        item["criado_em"] = datetime.fromtimestamp(item["criado_em"]).isoformat(timespec="seconds")
+        peticoes.append(item)
+    
+    return jsonify({
+        "sucesso": True,
+        "peticoes": peticoes,
+        "proximo_cursor": proximo_cursor
+    })
+
+def _manifesto_lote(resultados):
+    """Grava os documentos do lote e monta a resposta JSON com o manifesto"""
+    manifesto = gravar_lote(docx_generator, resultados)
+    erros = 0
+    for item in manifesto:
+        if item.get("erro"):
+            erros += 1
+        else:
+            item["download_url"] = f"/api/download/{item['arquivo']}"
+    return {
+        "sucesso": erros == 0,
+        "erros": erros,
+        "peticoes": manifesto
+    }
+
+def _documento_zip_lote(tipo, resultados):
+    """Empacota o lote em um documento ZIP no formato de DocxGenerator.renderizar_documento"""
+    conteudo = empacotar_zip(resultados)
+    tipo_sanitizado = re.sub(r'[^a-zA-Z0-9]', '_', tipo)
+    return {
+        "nome": f"lote_{tipo_sanitizado}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+        "conteudo": conteudo,
+        "hash": hashlib.sha256(conteudo).hexdigest(),
+        "tipo": tipo,
+        "cliente_id": None,
+        "cliente_nome": None
+    }
+
+def executar_lote(data, job=None):
+    """
+    Gera um lote em segundo plano (job do GerenciadorJobs)
+    
+    No formato "manifesto", o resultado é o mesmo JSON da resposta
+    síncrona; no formato "zip", o ZIP fica no cache de documentos e o
+    resultado traz o seu ``download_url``.
+    """
+    with _etapa(job, "lote_docx"):
+        resultados = renderizar_lote(docx_generator, data['tipo'], data['linhas'], comum=data.get('comum'))
+    
+    if data.get('formato', 'zip') == 'manifesto':
+        return _manifesto_lote(resultados)
+    
+    erros = sum(1 for _, _, erro in resultados if erro)
+    chave = cache_documentos.guardar(_documento_zip_lote(data['tipo'], resultados))
+    return {
+        "sucesso": erros == 0,
+        "erros": erros,
+        "download_url": f"/api/documentos/{chave}"
+    }
+
+@app.route('/api/gerar-lote', methods=['POST'])
+def api_gerar_lote():
+    """
+    Endpoint para gerar petições em lote a partir dos textos já prontos
+    
+    Corpo (JSON):
+        tipo: tipo da petição, o mesmo para todo o lote
+        linhas: lista com os dados de cada petição (cliente_id, fatos, fundamentos,
+            pedidos, autoridade, referencia_processo, cidade...)
+        comum: campos aplicados a todas as linhas (opcional)
+        formato: "zip" (padrão) devolve os documentos e o manifesto em um ZIP;
+            "manifesto" grava os documentos em peticoes/ e devolve o manifesto em JSON
+    
+    Lotes com pelo menos MIN_LINHAS_PROCESSOS linhas (ou com ``?async=1`` na
+    URL ou ``"assincrono": true`` no corpo) são enfileirados como job: a
+    resposta 202 traz o ID do job, cujo resultado tem o manifesto ou o
+    ``download_url`` do ZIP.
+    """
+    data = request.get_json(silent=True) or {}
+    tipo = data.get('tipo')
+    formato = data.get('formato', 'zip')
+    if not tipo or formato not in ('zip', 'manifesto') or not isinstance(data.get('linhas'), list):
+        return jsonify({
+            "error": "Campos inválidos",
+            "message": "Informe 'tipo', a lista 'linhas' e, opcionalmente, 'formato' (zip ou manifesto)."
+        }), 400
+    
+    try:
+        validar_lote(data['linhas'])
+        
+        assincrono = (
+            request.args.get('async', '').lower() in ('1', 'true', 'sim')
+            or data.get('assincrono') is True
+            or len(data['linhas']) >= MIN_LINHAS_PROCESSOS
+        )
+        if assincrono:
+            job = gerenciador_jobs.submeter(
+                executar_lote,
+                data,
+                descricao=f"Geração de lote: {tipo} ({len(data['linhas'])} linhas)"
+            )
+            logger.info("Job de lote enfileirado: %s", job.id)
+            return jsonify({
+                "success": True,
+                "message": "Geração do lote enfileirada",
+                "job_id": job.id,
+                "estado": job.estado,
+                "status_url": f"/api/jobs/{job.id}"
+            }), 202
+        
+        resultados = renderizar_lote(docx_generator, tipo, data['linhas'], comum=data.get('comum'))
+    except ValueError as error:
+        return jsonify({
+            "error": "Lote inválido",
+            "message": str(error)
+        }), 400
+    except FilaCheiaError as error:
+        logger.warning("Fila de jobs cheia: %s", error)
+        return jsonify({
+            "error": "Fila de geração cheia",
+            "message": "Muitas petições em processamento. Tente novamente em instantes."
+        }), 503
+    except Exception as error:
+        logger.exception("Erro ao gerar lote: %s", error)
+        return jsonify({
+            "error": "Falha ao gerar lote",
+            "message": str(error)
+        }), 500
+    
+    if formato == 'manifesto':
+        return jsonify(_manifesto_lote(resultados))
+    
+    documento = _documento_zip_lote(tipo, resultados)
+    erros = sum(1 for _, _, erro in resultados if erro)
+    response = Response(documento["conteudo"], mimetype='application/zip')
+    response.headers["Content-Disposition"] = f'attachment; filename="{documento["nome"]}"'
+    response.headers["X-Lote-Erros"] = str(erros)
+    response.headers["Access-Control-Expose-Headers"] = "Content-Disposition, X-Lote-Erros, X-Request-ID"
+    return response
+
+@app.route('/api/documentos/<chave>', methods=['GET'])
+def api_baixar_documento(chave):
+    """
+    Endpoint para baixar um documento gerado com entrega "memoria" enquanto ele não expira
+    
+    Os documentos ficam na memória do worker que os gerou, ou, com
+    DOCUMENTOS_MEMORIA_PATH, em um banco SQLite compartilhado entre os workers.
+    """
+    documento = cache_documentos.obter(chave)
+    if documento is None:
+        return jsonify({
+            "error": "Documento não encontrado",
+            "message": "O documento não existe ou já expirou. Gere a petição novamente."
+        }), 404
+    return _resposta_documento(documento)
 
 @app.route('/api/download/<filename>', methods=['GET'])
 def download_file(filename):
-    """Endpoint para download de arquivos"""
+    """
+    Endpoint para download de petições
+    
+    A resposta traz ETag forte (o hash do conteúdo, para documentos
+    armazenados pelo hash) e Last-Modified; requisições condicionais
+    (If-None-Match / If-Modified-Since) recebem 304 sem corpo, e Range é
+    atendido com 206. Com DOWNLOAD_OFFLOAD, o envio do arquivo é delegado
+    ao servidor web (X-Accel-Redirect ou X-Sendfile).
+    """
     try:
-        print(f"="*80)
-        print(f"Solicitação de download para arquivo: {filename}")
-        
         # Sanitizar o nome do arquivo para evitar path traversal
         filename = os.path.basename(filename)
         
-        # Verificar se o arquivo existe
-        filepath = os.path.join(PETICOES_DIR, filename)
-        print(f"Caminho completo do arquivo: {filepath}")
-        
-        if not os.path.exists(filepath):
-            print(f"Erro: Arquivo não encontrado: {filepath}")
-            return jsonify({
-                "error": "Arquivo não encontrado",
-                "message": "O arquivo solicitado não existe no servidor."
-            }), 404
-        
-        if not os.path.isfile(filepath):
-            print(f"Erro: O caminho não é um arquivo: {filepath}")
-            return jsonify({
-                "error": "Arquivo inválido",
-                "message": "O caminho especificado não é um arquivo válido."
-            }), 400
-        
         # Verificar se o arquivo é um DOCX
         if not filename.lower().endswith('.docx'):
-            print(f"Erro: Tipo de arquivo inválido: {filename}")
+            logger.warning("Tipo de arquivo inválido: %s", filename)
             return jsonify({
                 "error": "Tipo de arquivo inválido",
                 "message": "Apenas arquivos DOCX são permitidos."
             }), 400
         
-        print(f"Arquivo encontrado, iniciando download: {filename}")
+        # Localizar o arquivo (armazenado pelo hash do conteúdo ou, se antigo, com o próprio nome)
+        registro = indice_peticoes.obter(filename)
+        filepath = docx_generator.caminho_peticao(filename, registro)
+        if not filepath:
+            logger.warning("Arquivo não encontrado: %s", filename)
+            return jsonify({
+                "error": "Arquivo não encontrado",
+                "message": "O arquivo solicitado não existe no servidor."
+            }), 404
         
-        # Enviar o arquivo para download com o tipo MIME correto e headers específicos
-        response = send_from_directory(
-            PETICOES_DIR, 
-            filename, 
-            as_attachment=True,
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        )
+        # No armazenamento por hash o conteúdo de um caminho nunca muda: o hash é uma ETag forte.
+        # Arquivos antigos, que podem ser sobrescritos, usam a ETag de data e tamanho do Werkzeug.
+        armazenado = bool(registro) and filepath == docx_generator.armazenamento.caminho(registro["hash"])
+        etag = registro["hash"] if armazenado else True
         
-        # Adicionar headers específicos para download
-        response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
-        response.headers["Access-Control-Expose-Headers"] = "Content-Disposition"
+        if DOWNLOAD_OFFLOAD in ("x-accel", "x-sendfile"):
+            response = _resposta_download_delegada(filepath, filename, etag)
+        else:
+            response = send_file(
+                filepath,
+                as_attachment=True,
+                download_name=filename,
+                mimetype=MIMETYPE_DOCX,
+                etag=etag,
+                max_age=DOWNLOAD_MAX_AGE,
+                conditional=True
+            )
+        
+        # Petições são documentos do cliente: apenas o navegador pode guardá-las, não proxies compartilhados
+        response.cache_control.public = False
+        response.cache_control.private = True
+        response.headers["Access-Control-Expose-Headers"] = "Content-Disposition, ETag, Last-Modified, Content-Range, Accept-Ranges, X-Request-ID"
         response.headers["Access-Control-Allow-Origin"] = "*"
         
+        logger.debug("Download de %s: %s", filename, response.status_code)
         return response
         
+    except RequestedRangeNotSatisfiable as e:
+        # 416 com Content-Range indicando o tamanho do arquivo
+        return e
     except Exception as e:
-        print(f"Erro ao processar download: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erro ao processar download: %s", str(e))
         return jsonify({
             "error": "Erro ao processar download",
             "message": str(e)
         }), 500
-    finally:
-        print("="*80)
+
+def _resposta_download_delegada(filepath, filename, etag):
+    """
+    Cria a resposta de download sem corpo, com o envio do arquivo delegado ao servidor web
+    
+    As requisições condicionais são respondidas aqui (304); o corpo e o
+    Range ficam a cargo do nginx (X-Accel-Redirect) ou do módulo X-Sendfile.
+    """
+    estado = os.stat(filepath)
+    response = Response(mimetype=MIMETYPE_DOCX)
+    response.headers.set("Content-Disposition", "attachment", filename=filename)
+    response.set_etag(f"{estado.st_mtime}-{estado.st_size}" if etag is True else etag)
+    response.last_modified = estado.st_mtime
+    response.cache_control.max_age = DOWNLOAD_MAX_AGE
+    
+    response = response.make_conditional(request)
+    if response.status_code == 304:
+        return response
+    
+    if DOWNLOAD_OFFLOAD == "x-accel":
+        caminho_relativo = os.path.relpath(filepath, PETICOES_DIR).replace(os.sep, '/')
+        response.headers["X-Accel-Redirect"] = DOWNLOAD_ACCEL_PREFIXO.rstrip('/') + '/' + caminho_relativo
+    else:
+        response.headers["X-Sendfile"] = filepath
+    return response
 
 @app.route('/')
 def index():
     """Página inicial"""
     return render_template('index.html')
 
+def _verificar_conexao_openai():
+    """Verifica a conexão com a OpenAI listando os modelos disponíveis"""
+    client = obter_cliente_openai(OPENAI_API_KEY)
+    client.models.list()
+
+# Monitor de conectividade com a OpenAI, atualizado em segundo plano
+monitor_saude = MonitorSaude(
+    _verificar_conexao_openai,
+    intervalo_segundos=float(os.getenv("OPENAI_HEALTH_INTERVALO_SEGUNDOS", 30))
+)
+
 @app.route('/api/status', methods=['GET'])
 def check_status():
+    """
+    Endpoint de status da API
+    
+    Responde com o resultado em memória da última verificação da OpenAI,
+    feita periodicamente em segundo plano. Com ``?deep=1`` a verificação é
+    executada na hora.
+    """
     try:
-        # Verificar conexão com OpenAI
-        client = OpenAI()
-        models = client.models.list()
+        deep = request.args.get('deep', '').lower() in ('1', 'true', 'sim')
+        if deep:
+            saude = monitor_saude.verificar_agora()
+        else:
+            monitor_saude.iniciar()
+            saude = monitor_saude.status()
+        
+        resposta = {
+            'openai_connected': saude['conectado'],
+            'openai_checked_at': saude['verificado_em'],
+            'openai_check_age': saude['idade_segundos'],
+            'openai_latency': saude['latencia'],
+            'cache': _ai_generator.cache.estatisticas(contar_entradas=deep) if _ai_generator else None,
+            'threads': _ai_generator.estatisticas_threads() if _ai_generator else None,
+            'inicializacao': TEMPOS_INICIALIZACAO,
+            'timestamp': datetime.now().isoformat()
+        }
         
-        return jsonify({
+        if saude['conectado'] is False:
+            logger.error("Erro ao verificar status: %s", saude['erro'])
+            resposta.update({
+                'status': 'error',
+                'message': saude['erro']
+            })
+            return jsonify(resposta), 500
+        
+        resposta.update({
             'status': 'online',
-            'message': 'API está funcionando normalmente',
-            'openai_connected': True,
-            'timestamp': datetime.now().isoformat()
-        }), 200
+            'message': 'API está funcionando normalmente' if saude['conectado'] else 'Verificação da conexão com a OpenAI em andamento'
+        })
+        return jsonify(resposta), 200
     except Exception as e:
-        logger.error(f"Erro ao verificar status: {str(e)}")
+        logger.error("Erro ao verificar status: %s", e)
         return jsonify({
             'status': 'error',
             'message': str(e),
@@ -805,32 +1367,22 @@ def check_status():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+@app.route('/metrics', methods=['GET'])
+def metricas():
+    """Endpoint de métricas no formato de exposição do Prometheus"""
+    return Response(registro_metricas.exportar(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/clientes', methods=['GET'])
 def api_listar_clientes():
     """Endpoint para listar os clientes disponíveis"""
-    print("="*80)
-    print("Recebida solicitação para listar clientes")
+    logger.info("Recebida solicitação para listar clientes")
     
     try:
         from templates_manager import Cliente
         
-        # Verificar se o arquivo de clientes existe
-        import os
-        clientes_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'clientes.json')
-        if not os.path.exists(clientes_file):
-            print(f"Arquivo de clientes não encontrado: {clientes_file}")
-            # Tentar carregar do diretório clientes
-            clientes_file_alt = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'clientes', 'clientes.json')
-            if os.path.exists(clientes_file_alt):
-                print(f"Usando arquivo alternativo: {clientes_file_alt}")
-                # Copiar o arquivo para o diretório data
-                import shutil
-                os.makedirs(os.path.dirname(clientes_file), exist_ok=True)
-                shutil.copy2(clientes_file_alt, clientes_file)
-                print(f"Arquivo copiado para: {clientes_file}")
-        
+        # Os clientes vêm do banco SQLite; os arquivos JSON legados são importados na primeira abertura
         clientes = Cliente.carregar_clientes()
-        print(f"Clientes carregados: {len(clientes)}")
+        logger.info("Clientes carregados: %s", len(clientes))
         
         # Converter objetos Cliente para dicionários
         clientes_data = []
@@ -843,18 +1395,16 @@ def api_listar_clientes():
                 "advogados": cliente.advogados
             }
             clientes_data.append(cliente_dict)
-            print(f"Cliente adicionado: {cliente.nome}")
+            logger.debug("Cliente adicionado: %s", cliente.nome)
         
-        print(f"Total de clientes retornados: {len(clientes_data)}")
+        logger.info("Total de clientes retornados: %s", len(clientes_data))
         
         return jsonify({
             "success": True,
             "clientes": clientes_data
         })
     except Exception as error:
-        import traceback
-        print(f"Erro ao listar clientes: {error}")
-        print(traceback.format_exc())
+        logger.exception("Erro ao listar clientes: %s", error)
         return jsonify({
             "error": "Erro ao listar clientes",
             "message": str(error)
@@ -880,7 +1430,7 @@ def api_listar_tipos_peticao():
             "tipos": tipos
         })
     except Exception as error:
-        print(f"Erro ao listar tipos de petição: {error}")
+        logger.error("Erro ao listar tipos de petição: %s", error)
         return jsonify({
             "error": "Erro ao listar tipos de petição",
             "message": str(error)
@@ -901,7 +1451,7 @@ def api_validar_peticao():
             }), 400
         
         # Validar a petição
-        relatorio = validador_juridico.gerar_relatorio_validacao(data)
+        relatorio = obter_validador_juridico().gerar_relatorio_validacao(data)
         
         return jsonify({
             "valido": relatorio['valido'],
@@ -911,13 +1461,84 @@ def api_validar_peticao():
         })
     
     except Exception as error:
-        print(f"Erro ao validar petição: {error}")
+        logger.error("Erro ao validar petição: %s", error)
         return jsonify({
             "erro": "Erro interno",
             "mensagem": str(error)
         }), 500
 
+# Tempos de inicialização, expostos em /api/status
+TEMPOS_INICIALIZACAO = {
+    "importacao": None,
+    "aquecimento": None,
+    "orcamento_importacao": float(os.getenv("ORCAMENTO_INICIALIZACAO_SEGUNDOS", 1.0))
+}
+_aplicacao_aquecida = False
+_aquecimento_lock = threading.Lock()
+
+def _sincronizar_indice_peticoes():
+    """Sincroniza o índice de petições com o diretório de petições"""
+    try:
+        indice_peticoes.sincronizar(PETICOES_DIR, docx_generator.armazenamento)
+    except Exception as e:
+        logger.error("Erro ao sincronizar o índice de petições: %s", e)
+
+def aquecer_aplicacao():
+    """
+    Executa a inicialização adiada da aplicação
+    
+    Verifica os templates padrão, cria o gerador de IA e o validador
+    jurídico e inicia o monitor de conectividade. Pode ser chamada
+    explicitamente (por exemplo, no hook post_fork do gunicorn); caso
+    contrário, é executada na primeira requisição.
+    """
+    global _aplicacao_aquecida
+    if _aplicacao_aquecida:
+        return TEMPOS_INICIALIZACAO
+    
+    with _aquecimento_lock:
+        if _aplicacao_aquecida:
+            return TEMPOS_INICIALIZACAO
+        
+        inicio = time.perf_counter()
+        logger.info("Aquecendo aplicação...")
+        
+        verificar_templates_padrao()
+        
+        try:
+            # Inicia a criação antecipada de threads e a varredura de órfãos
+            obter_ai_generator().threads.iniciar()
+        except Exception as e:
+            logger.error("Erro ao inicializar AIGenerator: %s", e)
+        
+        obter_validador_juridico()
+        monitor_saude.iniciar()
+        
+        # Indexar, em segundo plano, petições gravadas antes do índice (ou removidas manualmente)
+        threading.Thread(
+            target=_sincronizar_indice_peticoes, name="indice-peticoes", daemon=True
+        ).start()
+        
+        TEMPOS_INICIALIZACAO["aquecimento"] = round(time.perf_counter() - inicio, 4)
+        logger.info("Aplicação aquecida em %.3fs", TEMPOS_INICIALIZACAO['aquecimento'])
+        _aplicacao_aquecida = True
+    
+    return TEMPOS_INICIALIZACAO
+
+@app.before_request
+def garantir_aquecimento():
+    """Executa o aquecimento na primeira requisição, se ainda não foi feito"""
+    if not _aplicacao_aquecida:
+        aquecer_aplicacao()
+
+# Medir o tempo de importação e compará-lo com o orçamento
+TEMPOS_INICIALIZACAO["importacao"] = round(time.perf_counter() - _INICIO_IMPORTACAO, 4)
+logger.info("Aplicação importada em %.3fs", TEMPOS_INICIALIZACAO['importacao'])
+if TEMPOS_INICIALIZACAO["importacao"] > TEMPOS_INICIALIZACAO["orcamento_importacao"]:
+    logger.warning("Importação excedeu o orçamento de %.3fs", TEMPOS_INICIALIZACAO['orcamento_importacao'])
+
 if __name__ == '__main__':
+    aquecer_aplicacao()
     port = int(os.getenv("PORT", 5000))
-    print(f"Iniciando servidor Flask na porta {port}...")
+    logger.info("Iniciando servidor Flask na porta %s...", port)
     app.run(debug=True, host='0.0.0.0', port=port) 
\ No newline at end of file
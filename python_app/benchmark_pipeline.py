@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark das etapas locais do pipeline de geração de petições
+
+Mede, com textos de tamanho realista (1 KB a 200 KB), as funções do
+caminho crítico que não dependem da OpenAI: limpeza do texto, extração
+de seções, formatação jurídica, substituição de placeholders, geração do
+DOCX, prévia HTML e relatório de validação. Os resultados são gravados
+em JSON para comparação entre versões.
+
+Uso:
+    python benchmark_pipeline.py --saida resultados.json
+    python benchmark_pipeline.py --tamanhos 1,10 --casos limpar_texto,extrair_secoes
+    python benchmark_pipeline.py --saida nova.json --comparar anterior.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+# Frases usadas para montar textos jurídicos realistas
+FRASES_FATOS = [
+    "A recorrente participou do Pregão Eletrônico nº 45/2023, promovido pela Secretaria Municipal de Administração.",
+    "Na sessão pública de 12/03/2023, a proposta da recorrente foi classificada em primeiro lugar.",
+    "A comissão de licitação inabilitou a empresa sob o argumento de ausência de atestado de capacidade técnica.",
+    "Todos os documentos exigidos no item 9.4 do edital foram apresentados tempestivamente.",
+    "A decisão foi publicada no Diário Oficial sem a devida motivação【4:6†source】.",
+]
+FRASES_ARGUMENTOS = [
+    "Nos termos do art. 37, caput, da Constituição Federal, a Administração deve observar o princípio da legalidade.",
+    "O art. 5º da Lei nº 14.133/2021 consagra os princípios da vinculação ao edital e do julgamento objetivo.",
+    "Conforme o art. 64 da Lei nº 14.133/2021, é vedada a exigência de documentos não previstos no edital.",
+    "A Súmula nº 473 do STF autoriza a Administração a anular seus próprios atos quando eivados de vícios.",
+    "O Tribunal de Contas da União, no Acórdão nº 1.211/2021 - Plenário, afastou o formalismo excessivo.",
+    "Segundo o art. 50 da Lei nº 9.784/1999, os atos administrativos devem ser motivados com indicação dos fatos.",
+]
+FRASES_PEDIDOS = [
+    "a) o recebimento do presente recurso, com efeito suspensivo;",
+    "b) a reforma da decisão que inabilitou a recorrente;",
+    "c) a habilitação da recorrente e o prosseguimento do certame;",
+    "d) subsidiariamente, a remessa dos autos à autoridade superior.",
+]
+
+CASOS = [
+    "limpar_texto",
+    "extrair_secoes",
+    "formatar_texto_juridico",
+    "substituir_placeholders",
+    "gerar_documento",
+    "gerar_html_preview",
+    "relatorio_validacao",
+]
+
+
+def gerar_texto(frases, tamanho, semente):
+    """Gera um texto de aproximadamente ``tamanho`` bytes a partir das frases, de forma determinística"""
+    gerador = random.Random(semente)
+    partes = []
+    total = 0
+    while total < tamanho:
+        paragrafo = " ".join(gerador.choice(frases) for _ in range(gerador.randint(2, 5)))
+        partes.append(paragrafo)
+        total += len(paragrafo.encode("utf-8")) + 2
+    return "\n\n".join(partes)
+
+
+def gerar_peticao(tamanho_kb):
+    """Gera as seções de uma petição com tamanho total aproximado em KB"""
+    tamanho = tamanho_kb * 1024
+    return {
+        "fatos": gerar_texto(FRASES_FATOS, int(tamanho * 0.35), semente=1),
+        "argumentos": gerar_texto(FRASES_ARGUMENTOS, int(tamanho * 0.5), semente=2),
+        "pedidos": gerar_texto(FRASES_PEDIDOS, int(tamanho * 0.15), semente=3),
+    }
+
+
+def medir(funcao, preparar=None, repeticoes=20, aquecimento=1, tempo_maximo=2.0):
+    """
+    Mede o tempo de execução da função
+
+    Args:
+        funcao: Função medida; recebe o valor retornado por ``preparar``, se houver
+        preparar: Função sem argumentos executada antes de cada chamada, fora da medição (opcional)
+        repeticoes: Número máximo de medições
+        aquecimento: Execuções descartadas antes das medições
+        tempo_maximo: Tempo total de medição após o qual as repetições são interrompidas (mínimo de 3)
+
+    Returns:
+        Dicionário com as estatísticas em segundos
+    """
+    def executar():
+        argumento = preparar() if preparar else None
+        inicio = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            if preparar:
+                funcao(argumento)
+            else:
+                funcao()
+        return time.perf_counter() - inicio
+
+    for _ in range(aquecimento):
+        executar()
+
+    tempos = []
+    while len(tempos) < repeticoes:
+        tempos.append(executar())
+        if len(tempos) >= 3 and sum(tempos) >= tempo_maximo:
+            break
+
+    tempos_ordenados = sorted(tempos)
+    return {
+        "iteracoes": len(tempos),
+        "min": tempos_ordenados[0],
+        "mediana": statistics.median(tempos),
+        "media": statistics.mean(tempos),
+        "p95": tempos_ordenados[min(len(tempos) - 1, int(round(0.95 * (len(tempos) - 1))))],
+        "desvio": statistics.stdev(tempos) if len(tempos) > 1 else 0.0,
+    }
+
+
+def preparar_casos(peticoes_dir):
+    """
+    Importa os componentes medidos e monta a função de cada caso
+
+    Returns:
+        Dicionário {caso: função(peticao) -> (funcao, preparar)}
+    """
+    from docx import Document
+
+    # app.py não acessa a rede nem a OpenAI na importação
+    with redirect_stdout(io.StringIO()):
+        import app
+        from utils.ai_generator import AIGenerator
+        from utils.docx_generator import DocxGenerator
+        from utils.formatacao_juridica import formatar_texto_juridico
+        from utils.validacao_juridica import ValidacaoJuridica
+
+        ai_generator = AIGenerator(api_key="sk-benchmark", assistant_id="asst_benchmark")
+        docx_generator = DocxGenerator(
+            templates_dir=app.TEMPLATES_DOCX_DIR,
+            peticoes_dir=peticoes_dir,
+            clientes_dir=app.CLIENTES_DIR
+        )
+        validador = ValidacaoJuridica()
+
+    template_path = docx_generator._obter_template_path("recurso administrativo")
+    tipo = "Recurso Administrativo"
+
+    def texto_completo(peticao):
+        return "\n\n".join(peticao.values())
+
+    def dados_docx(peticao):
+        return {
+            "fatos": peticao["fatos"],
+            "fundamentos": peticao["argumentos"],
+            "pedidos": peticao["pedidos"],
+            "cliente_nome": "AUTO LOCADORA RALLY",
+            "autoridade": "Pregoeiro Municipal",
+            "referencia_processo": "Pregão Eletrônico nº 45/2023",
+            "cidade": "Campo Grande",
+        }
+
+    return {
+        "limpar_texto": lambda peticao: (
+            lambda: app.limpar_texto(texto_completo(peticao)), None
+        ),
+        "extrair_secoes": lambda peticao: (
+            lambda: ai_generator._extrair_secoes(
+                f"FATOS:\n{peticao['fatos']}\n\nARGUMENTOS:\n{peticao['argumentos']}\n\nPEDIDO:\n{peticao['pedidos']}"
+            ), None
+        ),
+        "formatar_texto_juridico": lambda peticao: (
+            lambda: formatar_texto_juridico(texto_completo(peticao)), None
+        ),
+        "substituir_placeholders": lambda peticao: (
+            lambda doc: docx_generator._substituir_placeholders(doc, dados_docx(peticao)),
+            lambda: Document(template_path)
+        ),
+        "gerar_documento": lambda peticao: (
+            lambda: docx_generator.gerar_documento(tipo, {
+                "cliente_id": "rally",
+                "cliente_nome": "AUTO LOCADORA RALLY",
+                "autoridade": "Pregoeiro Municipal",
+                "referencia_processo": "Pregão Eletrônico nº 45/2023",
+                "fatos_texto": peticao["fatos"],
+                "argumentos_texto": peticao["argumentos"],
+                "pedidos_texto": peticao["pedidos"],
+            }), None
+        ),
+        "gerar_html_preview": lambda peticao: (
+            lambda: app.gerar_html_preview(
+                tipo=tipo,
+                fatos=peticao["fatos"],
+                argumentos=peticao["argumentos"],
+                pedidos=peticao["pedidos"],
+                cliente_id="rally",
+                autoridade="Pregoeiro Municipal",
+                referencia_processo="Pregão Eletrônico nº 45/2023"
+            ), None
+        ),
+        "relatorio_validacao": lambda peticao: (
+            lambda: validador.gerar_relatorio_validacao({
+                "tipo": "recurso_administrativo",
+                "fatos": peticao["fatos"],
+                "argumentos": peticao["argumentos"],
+                "pedidos": peticao["pedidos"],
+            }), None
+        ),
+    }
+
+
+def obter_commit():
+    """Retorna o commit atual do repositório, se disponível"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def executar_benchmark(casos, tamanhos, repeticoes, aquecimento, tempo_maximo):
+    """Executa os casos selecionados para cada tamanho e retorna os resultados"""
+    peticoes_dir = tempfile.mkdtemp(prefix="benchmark_peticoes_")
+    try:
+        fabricas = preparar_casos(peticoes_dir)
+        resultados = []
+        for tamanho_kb in tamanhos:
+            peticao = gerar_peticao(tamanho_kb)
+            for caso in casos:
+                funcao, preparar = fabricas[caso](peticao)
+                estatisticas = medir(funcao, preparar, repeticoes, aquecimento, tempo_maximo)
+                resultados.append({"caso": caso, "tamanho_kb": tamanho_kb, **estatisticas})
+                print(f"{caso:<26} {tamanho_kb:>5} KB  mediana {estatisticas['mediana'] * 1000:>10.2f} ms  "
+                      f"p95 {estatisticas['p95'] * 1000:>10.2f} ms  ({estatisticas['iteracoes']} iterações)")
+        return resultados
+    finally:
+        shutil.rmtree(peticoes_dir, ignore_errors=True)
+
+
+def comparar(resultados, arquivo_base):
+    """Imprime a variação da mediana de cada caso em relação a um resultado anterior"""
+    with open(arquivo_base, "r", encoding="utf-8") as f:
+        base = json.load(f)
+
+    medianas_base = {(r["caso"], r["tamanho_kb"]): r["mediana"] for r in base.get("resultados", [])}
+    print(f"\nComparação com {arquivo_base} (commit {base.get('metadados', {}).get('commit')}):")
+    for resultado in resultados:
+        chave = (resultado["caso"], resultado["tamanho_kb"])
+        if chave not in medianas_base:
+            print(f"{chave[0]:<26} {chave[1]:>5} KB  sem referência")
+            continue
+        anterior = medianas_base[chave]
+        variacao = (resultado["mediana"] - anterior) / anterior * 100 if anterior else 0.0
+        print(f"{chave[0]:<26} {chave[1]:>5} KB  {anterior * 1000:>10.2f} ms -> "
+              f"{resultado['mediana'] * 1000:>10.2f} ms  ({variacao:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark das etapas locais do pipeline de petições')
+    parser.add_argument('--casos', default=','.join(CASOS),
+                        help=f'Casos a executar, separados por vírgula (padrão: todos: {", ".join(CASOS)})')
+    parser.add_argument('--tamanhos', default='1,10,50,200',
+                        help='Tamanhos das petições em KB, separados por vírgula (padrão: 1,10,50,200)')
+    parser.add_argument('--repeticoes', type=int, default=20, help='Número máximo de medições por caso (padrão: 20)')
+    parser.add_argument('--aquecimento', type=int, default=1, help='Execuções descartadas por caso (padrão: 1)')
+    parser.add_argument('--tempo-maximo', type=float, default=2.0,
+                        help='Tempo de medição por caso após o qual as repetições param (padrão: 2.0)')
+    parser.add_argument('--saida', help='Arquivo JSON onde os resultados serão gravados')
+    parser.add_argument('--comparar', help='Arquivo JSON de uma execução anterior para comparação')
+    args = parser.parse_args()
+
+    casos = [caso.strip() for caso in args.casos.split(',') if caso.strip()]
+    desconhecidos = [caso for caso in casos if caso not in CASOS]
+    if desconhecidos:
+        parser.error(f"Casos desconhecidos: {', '.join(desconhecidos)}")
+    tamanhos = [int(tamanho) for tamanho in args.tamanhos.split(',') if tamanho.strip()]
+
+    resultados = executar_benchmark(casos, tamanhos, args.repeticoes, args.aquecimento, args.tempo_maximo)
+
+    relatorio = {
+        "metadados": {
+            "data": datetime.now().isoformat(),
+            "commit": obter_commit(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "repeticoes": args.repeticoes,
+            "aquecimento": args.aquecimento,
+            "tempo_maximo": args.tempo_maximo,
+        },
+        "resultados": resultados,
+    }
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados gravados em {args.saida}")
+
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
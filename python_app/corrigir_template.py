@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 import os
+import re
 import docx
 from docx import Document
+from utils.renderizador_docx import substituir_em_runs
 
 def corrigir_template(template_path):
     """Corrige o template para garantir que o nome do cliente seja exibido corretamente"""
@@ -30,9 +32,9 @@ def corrigir_template(template_path):
                 
                 # Verificar se o parágrafo contém a palavra "Cliente" em vez do placeholder
                 if "Cliente," in para.text and "[NOME_CLIENTE]" not in para.text:
-                    # Substituir "Cliente" por "[NOME_CLIENTE]"
-                    novo_texto = para.text.replace("Cliente,", "[NOME_CLIENTE],")
-                    para.text = novo_texto
+                    # Substituir "Cliente" por "[NOME_CLIENTE]", mantendo a formatação dos runs
+                    substituir_em_runs(para, {"Cliente,": "[NOME_CLIENTE],"}, re.compile(re.escape("Cliente,")))
+                    novo_texto = para.text
                     print(f"Corrigido: {novo_texto}")
                     print("✓ Placeholder [NOME_CLIENTE] adicionado")
                 else:
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script para gerar petições em lote a partir de um arquivo de dados
+
+Cada linha do arquivo gera uma petição do mesmo tipo, com os textos já
+prontos (sem chamar a IA). O arquivo pode ser:
+
+- JSON: uma lista de linhas ou um objeto {"tipo", "comum", "linhas"}
+- CSV: uma linha por petição, com cabeçalho (cliente_id, fatos, fundamentos,
+  pedidos, autoridade, referencia_processo, cidade...)
+
+Uso:
+    python gerar_lote.py --tipo "Impugnação ao Edital" --dados campanha.csv --saida campanha.zip
+    python gerar_lote.py --dados campanha.json --gravar
+"""
+
+import os
+import sys
+import csv
+import json
+import argparse
+from utils.docx_generator import DocxGenerator
+from utils.lote_peticoes import renderizar_lote, empacotar_zip, gravar_lote
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_DOCX_DIR = os.path.join(BASE_DIR, 'templates_docx')
+PETICOES_DIR = os.path.join(BASE_DIR, 'peticoes')
+CLIENTES_DIR = os.path.join(BASE_DIR, 'clientes')
+
+def ler_dados(caminho):
+    """Lê o arquivo de dados e retorna (tipo ou None, campos comuns, linhas)"""
+    with open(caminho, 'r', encoding='utf-8-sig', newline='') as f:
+        if caminho.lower().endswith('.csv'):
+            # Colunas vazias não sobrescrevem os campos comuns
+            linhas = [{k: v for k, v in linha.items() if k and v} for linha in csv.DictReader(f)]
+            return None, {}, linhas
+        dados = json.load(f)
+
+    if isinstance(dados, list):
+        return None, {}, dados
+    return dados.get('tipo'), dados.get('comum') or {}, dados.get('linhas') or []
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description='Gera petições em lote a partir de um arquivo JSON ou CSV')
+    parser.add_argument('--dados', required=True, help='Arquivo JSON ou CSV com uma linha por petição')
+    parser.add_argument('--tipo', help='Tipo da petição (obrigatório se não estiver no JSON)')
+    parser.add_argument('--saida', help='Arquivo ZIP com os documentos e o manifesto')
+    parser.add_argument('--gravar', action='store_true', help='Gravar os documentos em peticoes/ e imprimir o manifesto')
+    parser.add_argument('--processos', type=int, help='Número de processos para lotes grandes (padrão: número de CPUs; 1 usa apenas este processo)')
+    args = parser.parse_args()
+
+    tipo, comum, linhas = ler_dados(args.dados)
+    tipo = args.tipo or tipo
+    if not tipo:
+        parser.error("informe --tipo ou o campo 'tipo' no JSON")
+    if not args.saida and not args.gravar:
+        parser.error("informe --saida e/ou --gravar")
+
+    print("="*80)
+    print(f"Gerando {len(linhas)} petição(ões) do tipo '{tipo}'...")
+    print("="*80)
+
+    gerador = DocxGenerator(TEMPLATES_DOCX_DIR, PETICOES_DIR, CLIENTES_DIR)
+    try:
+        resultados = renderizar_lote(gerador, tipo, linhas, comum=comum, processos=args.processos)
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return 1
+
+    if args.saida:
+        with open(args.saida, 'wb') as f:
+            f.write(empacotar_zip(resultados))
+        print(f"ZIP gravado em: {args.saida}")
+
+    if args.gravar:
+        manifesto = gravar_lote(gerador, resultados)
+        print(json.dumps(manifesto, ensure_ascii=False, indent=2))
+
+    erros = [(indice, erro) for indice, _, erro in resultados if erro]
+    for indice, erro in erros:
+        print(f"- Linha {indice}: {erro}")
+
+    print("="*80)
+    print(f"Petições geradas: {len(resultados) - len(erros)} | Erros: {len(erros)}")
+    print("="*80)
+    return 1 if erros else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,9 +7,9 @@ Script para gerenciar clientes do sistema de petições
 
 import os
 import sys
-import json
 import argparse
-from templates_manager import Cliente, CLIENTES_DIR
+from templates_manager import Cliente
+from utils.banco_clientes import obter_banco_clientes
 
 def listar_clientes():
     """Lista todos os clientes cadastrados"""
@@ -40,25 +40,6 @@ def listar_clientes():
 
 def adicionar_cliente(id, nome, cnpj, endereco, logo_path=None):
     """Adiciona um novo cliente"""
-    # Verificar se o ID já existe
-    cliente_existente = Cliente.obter_cliente_por_id(id)
-    if cliente_existente:
-        print(f"Erro: Cliente com ID '{id}' já existe.")
-        return False
-    
-    # Carregar clientes existentes
-    clientes_file = os.path.join(CLIENTES_DIR, 'clientes.json')
-    clientes_data = []
-    
-    if os.path.exists(clientes_file):
-        try:
-            with open(clientes_file, 'r', encoding='utf-8') as f:
-                clientes_data = json.load(f)
-        except Exception as e:
-            print(f"Erro ao carregar arquivo de clientes: {e}")
-            return False
-    
-    # Adicionar novo cliente
     novo_cliente = {
         "id": id,
         "nome": nome,
@@ -68,17 +49,16 @@ def adicionar_cliente(id, nome, cnpj, endereco, logo_path=None):
         "advogados": []
     }
     
-    clientes_data.append(novo_cliente)
-    
-    # Salvar arquivo atualizado
     try:
-        with open(clientes_file, 'w', encoding='utf-8') as f:
-            json.dump(clientes_data, f, ensure_ascii=False, indent=4)
-        print(f"Cliente '{nome}' adicionado com sucesso!")
-        return True
+        if not obter_banco_clientes().adicionar(novo_cliente):
+            print(f"Erro: Cliente com ID '{id}' já existe.")
+            return False
     except Exception as e:
-        print(f"Erro ao salvar arquivo de clientes: {e}")
+        print(f"Erro ao salvar cliente: {e}")
         return False
+    
+    print(f"Cliente '{nome}' adicionado com sucesso!")
+    return True
 
 def adicionar_advogado(cliente_id, nome, oab):
     """Adiciona um advogado a um cliente existente"""
@@ -88,48 +68,16 @@ def adicionar_advogado(cliente_id, nome, oab):
         print(f"Erro: Cliente com ID '{cliente_id}' não encontrado.")
         return False
     
-    # Carregar clientes existentes
-    clientes_file = os.path.join(CLIENTES_DIR, 'clientes.json')
-    clientes_data = []
-    
-    if os.path.exists(clientes_file):
-        try:
-            with open(clientes_file, 'r', encoding='utf-8') as f:
-                clientes_data = json.load(f)
-        except Exception as e:
-            print(f"Erro ao carregar arquivo de clientes: {e}")
+    try:
+        if not obter_banco_clientes().adicionar_advogado(cliente_id, nome, oab):
+            print(f"Advogado '{nome}' já cadastrado para este cliente.")
             return False
+    except Exception as e:
+        print(f"Erro ao salvar advogado: {e}")
+        return False
     
-    # Encontrar o cliente e adicionar o advogado
-    for cliente in clientes_data:
-        if cliente.get('id') == cliente_id:
-            if 'advogados' not in cliente:
-                cliente['advogados'] = []
-            
-            # Verificar se o advogado já existe
-            for advogado in cliente['advogados']:
-                if advogado.get('nome') == nome and advogado.get('oab') == oab:
-                    print(f"Advogado '{nome}' já cadastrado para este cliente.")
-                    return False
-            
-            # Adicionar novo advogado
-            cliente['advogados'].append({
-                "nome": nome,
-                "oab": oab
-            })
-            
-            # Salvar arquivo atualizado
-            try:
-                with open(clientes_file, 'w', encoding='utf-8') as f:
-                    json.dump(clientes_data, f, ensure_ascii=False, indent=4)
-                print(f"Advogado '{nome}' adicionado ao cliente '{cliente.get('nome')}' com sucesso!")
-                return True
-            except Exception as e:
-                print(f"Erro ao salvar arquivo de clientes: {e}")
-                return False
-    
-    print(f"Erro: Cliente com ID '{cliente_id}' não encontrado no arquivo.")
-    return False
+    print(f"Advogado '{nome}' adicionado ao cliente '{cliente_existente.nome}' com sucesso!")
+    return True
 
 def remover_cliente(cliente_id):
     """Remove um cliente existente"""
@@ -139,30 +87,29 @@ def remover_cliente(cliente_id):
         print(f"Erro: Cliente com ID '{cliente_id}' não encontrado.")
         return False
     
-    # Carregar clientes existentes
-    clientes_file = os.path.join(CLIENTES_DIR, 'clientes.json')
-    clientes_data = []
-    
-    if os.path.exists(clientes_file):
-        try:
-            with open(clientes_file, 'r', encoding='utf-8') as f:
-                clientes_data = json.load(f)
-        except Exception as e:
-            print(f"Erro ao carregar arquivo de clientes: {e}")
-            return False
+    try:
+        obter_banco_clientes().remover(cliente_id)
+    except Exception as e:
+        print(f"Erro ao remover cliente: {e}")
+        return False
     
-    # Remover o cliente
-    clientes_data = [cliente for cliente in clientes_data if cliente.get('id') != cliente_id]
+    print(f"Cliente '{cliente_existente.nome}' removido com sucesso!")
+    return True
+
+def importar_clientes(arquivo, substituir=False):
+    """Importa clientes de um arquivo JSON (formato interno ou exportação com "results")"""
+    if not os.path.exists(arquivo):
+        print(f"Erro: Arquivo não encontrado: {arquivo}")
+        return False
     
-    # Salvar arquivo atualizado
     try:
-        with open(clientes_file, 'w', encoding='utf-8') as f:
-            json.dump(clientes_data, f, ensure_ascii=False, indent=4)
-        print(f"Cliente '{cliente_existente.nome}' removido com sucesso!")
-        return True
+        gravados = obter_banco_clientes().importar_json(arquivo, substituir=substituir)
     except Exception as e:
-        print(f"Erro ao salvar arquivo de clientes: {e}")
+        print(f"Erro ao importar clientes: {e}")
         return False
+    
+    print(f"{gravados} cliente(s) importado(s) de {arquivo}")
+    return True
 
 def main():
     """Função principal"""
@@ -190,6 +137,11 @@ def main():
     remover_parser = subparsers.add_parser('remover', help='Remover um cliente')
     remover_parser.add_argument('--id', required=True, help='ID do cliente a ser removido')
     
+    # Comando para importar clientes de um arquivo JSON
+    importar_parser = subparsers.add_parser('importar', help='Importar clientes de um arquivo JSON')
+    importar_parser.add_argument('--arquivo', required=True, help='Arquivo JSON de clientes')
+    importar_parser.add_argument('--substituir', action='store_true', help='Substituir clientes já cadastrados com o mesmo ID')
+    
     args = parser.parse_args()
     
     # Executar o comando apropriado
@@ -201,6 +153,8 @@ def main():
         adicionar_advogado(args.cliente, args.nome, args.oab)
     elif args.comando == 'remover':
         remover_cliente(args.id)
+    elif args.comando == 'importar':
+        importar_clientes(args.arquivo, args.substituir)
     else:
         parser.print_help()
 
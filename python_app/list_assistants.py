@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
+from utils.openai_client import obter_cliente_openai
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -20,8 +20,8 @@ def list_assistants():
         print("="*80)
         print("Listando assistentes disponíveis...")
         
-        # Inicializar o cliente OpenAI
-        client = OpenAI(api_key=OPENAI_API_KEY)
+        # Obter o cliente OpenAI compartilhado
+        client = obter_cliente_openai(OPENAI_API_KEY)
         
         # Listar assistentes
         assistants = client.beta.assistants.list(
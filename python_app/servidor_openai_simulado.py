@@ -0,0 +1,438 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Servidor local que simula a API da OpenAI para testes de carga
+
+Implementa o subconjunto das APIs de Assistentes e de Chat Completions
+usado pelo AIGenerator (threads, mensagens, runs, chat completions com e
+sem streaming, além de modelos e assistentes), com latências e sequências
+de status configuráveis e respostas determinísticas. Nenhum acesso à rede
+é necessário.
+
+Uso:
+    python servidor_openai_simulado.py --porta 8090
+
+    # Em outro terminal, apontar a aplicação para o simulador
+    OPENAI_BASE_URL=http://127.0.0.1:8090/v1 OPENAI_API_KEY=sk-simulado \\
+        ASSISTANT_ID=asst_simulado python app.py
+"""
+
+import re
+import json
+import time
+import uuid
+import argparse
+import threading
+
+from flask import Flask, request, jsonify, Response
+
+# Trechos usados para montar as seções das respostas simuladas
+TRECHOS_SECOES = {
+    "FATOS": (
+        "A empresa participou regularmente do certame, apresentando toda a documentação "
+        "exigida no edital dentro do prazo estabelecido pela comissão de licitação. "
+    ),
+    "ARGUMENTOS": (
+        "Nos termos do art. 5º da Lei nº 14.133/2021, a Administração deve observar os "
+        "princípios da legalidade, da vinculação ao edital e do julgamento objetivo. "
+    ),
+    "PEDIDO": (
+        "a) o recebimento e o provimento do presente recurso, com a reforma da decisão "
+        "recorrida e a consequente habilitação da recorrente no certame; "
+    )
+}
+
+TEXTO_JURISPRUDENCIA = (
+    "STJ, REsp 1.234.567/DF, Rel. Min. Exemplo, julgado em 01/01/2020: o formalismo "
+    "excessivo não deve prevalecer sobre a finalidade da licitação. "
+)
+
+
+def _agora():
+    """Timestamp Unix em segundos inteiros, como nas respostas da OpenAI"""
+    return int(time.time())
+
+
+def _novo_id(prefixo):
+    """Gera um ID no formato usado pela OpenAI"""
+    return f"{prefixo}_{uuid.uuid4().hex[:24]}"
+
+
+def _repetir_ate(trecho, tamanho):
+    """Repete o trecho até atingir aproximadamente o tamanho informado"""
+    repeticoes = max(1, tamanho // len(trecho))
+    return (trecho * repeticoes).strip()
+
+
+def interpretar_sequencia(texto):
+    """
+    Converte a sequência de status de um run em uma lista de etapas
+
+    O formato é ``status:segundos,...,status_final``, por exemplo
+    ``queued:0.2,in_progress:1.5,completed``. O último status não tem
+    duração e é mantido indefinidamente.
+
+    Returns:
+        Lista de tuplas (status, duração ou None)
+    """
+    etapas = []
+    for item in texto.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if ":" in item:
+            status, duracao = item.split(":", 1)
+            etapas.append((status.strip(), float(duracao)))
+        else:
+            etapas.append((item, None))
+
+    if not etapas or etapas[-1][1] is not None:
+        raise ValueError("A sequência deve terminar com um status final sem duração")
+    return etapas
+
+
+class SimuladorOpenAI:
+    """Estado e comportamento configurável da API simulada"""
+
+    def __init__(self, sequencia_run="queued:0.2,in_progress:1.0,completed", falhar_a_cada=0,
+                 latencia_chat=1.0, tamanho_secao=1500, tamanho_fragmento=40, atraso_fragmento=0.01,
+                 latencia_requisicao=0.0):
+        """
+        Inicializa o simulador
+
+        Args:
+            sequencia_run: Sequência de status dos runs (ver interpretar_sequencia)
+            falhar_a_cada: Se maior que zero, todo N-ésimo run termina com status 'failed'
+            latencia_chat: Tempo de uma chat completion sem streaming, em segundos
+            tamanho_secao: Tamanho aproximado de cada seção gerada, em caracteres
+            tamanho_fragmento: Caracteres por fragmento nas respostas em streaming
+            atraso_fragmento: Intervalo entre fragmentos em streaming, em segundos
+            latencia_requisicao: Latência adicionada a todas as requisições, em segundos
+        """
+        self.sequencia_run = interpretar_sequencia(sequencia_run)
+        self.falhar_a_cada = falhar_a_cada
+        self.latencia_chat = latencia_chat
+        self.tamanho_secao = tamanho_secao
+        self.tamanho_fragmento = tamanho_fragmento
+        self.atraso_fragmento = atraso_fragmento
+        self.latencia_requisicao = latencia_requisicao
+
+        self.threads = {}
+        self.runs = {}
+        self.contadores = {}
+        self._total_runs = 0
+        self._lock = threading.RLock()
+
+    def contar(self, operacao):
+        """Incrementa o contador de chamadas da operação"""
+        with self._lock:
+            self.contadores[operacao] = self.contadores.get(operacao, 0) + 1
+
+    def gerar_resposta(self, prompt):
+        """
+        Gera a resposta simulada para o prompt
+
+        Pedidos de uma única seção (regeneração) recebem apenas essa seção;
+        pedidos de jurisprudência recebem um texto de jurisprudência; os
+        demais recebem a petição completa com as três seções.
+        """
+        prompt = prompt or ""
+        secao_unica = re.search(r"APENAS a seção (FATOS|ARGUMENTOS|PEDIDO)", prompt)
+        if secao_unica:
+            secoes = [secao_unica.group(1)]
+        elif "jurisprud" in prompt.lower() and "FATOS:" not in prompt:
+            return _repetir_ate(TEXTO_JURISPRUDENCIA, self.tamanho_secao)
+        else:
+            secoes = list(TRECHOS_SECOES)
+
+        return "\n\n".join(
+            f"{secao}:\n{_repetir_ate(TRECHOS_SECOES[secao], self.tamanho_secao)}" for secao in secoes
+        )
+
+    def criar_thread(self):
+        """Cria um thread vazio"""
+        thread = {"id": _novo_id("thread"), "object": "thread", "created_at": _agora(), "metadata": {}}
+        with self._lock:
+            self.threads[thread["id"]] = {"thread": thread, "mensagens": []}
+        return thread
+
+    def adicionar_mensagem(self, thread_id, role, conteudo, run_id=None):
+        """Adiciona uma mensagem ao thread; retorna None se o thread não existir"""
+        mensagem = {
+            "id": _novo_id("msg"),
+            "object": "thread.message",
+            "created_at": _agora(),
+            "thread_id": thread_id,
+            "role": role,
+            "content": [{"type": "text", "text": {"value": conteudo, "annotations": []}}],
+            "file_ids": [],
+            "assistant_id": None,
+            "run_id": run_id,
+            "metadata": {}
+        }
+        with self._lock:
+            dados = self.threads.get(thread_id)
+            if dados is None:
+                return None
+            dados["mensagens"].append(mensagem)
+        return mensagem
+
+    def criar_run(self, thread_id, assistant_id):
+        """Cria um run; o status evolui com o tempo conforme a sequência configurada"""
+        with self._lock:
+            if thread_id not in self.threads:
+                return None
+            self._total_runs += 1
+            falhar = bool(self.falhar_a_cada) and self._total_runs % self.falhar_a_cada == 0
+            mensagens = self.threads[thread_id]["mensagens"]
+            prompt = next((m["content"][0]["text"]["value"] for m in reversed(mensagens) if m["role"] == "user"), "")
+
+        run = {
+            "id": _novo_id("run"),
+            "object": "thread.run",
+            "created_at": _agora(),
+            "thread_id": thread_id,
+            "assistant_id": assistant_id,
+            "status": self.sequencia_run[0][0],
+            "model": "gpt-4",
+            "instructions": "",
+            "tools": [],
+            "file_ids": [],
+            "metadata": {},
+            "last_error": None
+        }
+        with self._lock:
+            self.runs[run["id"]] = {
+                "run": run, "inicio": time.monotonic(), "falhar": falhar, "prompt": prompt, "respondido": False
+            }
+        return run
+
+    def consultar_run(self, thread_id, run_id):
+        """Retorna o run com o status correspondente ao tempo decorrido"""
+        with self._lock:
+            dados = self.runs.get(run_id)
+            if dados is None or dados["run"]["thread_id"] != thread_id:
+                return None
+
+            decorrido = time.monotonic() - dados["inicio"]
+            status = self.sequencia_run[-1][0]
+            for status_etapa, duracao in self.sequencia_run[:-1]:
+                if decorrido < duracao:
+                    status = status_etapa
+                    break
+                decorrido -= duracao
+
+            if status == "completed" and dados["falhar"]:
+                status = "failed"
+                dados["run"]["last_error"] = {"code": "server_error", "message": "Falha simulada"}
+
+            # A resposta do assistente aparece no thread quando o run é concluído
+            if status == "completed" and not dados["respondido"]:
+                dados["respondido"] = True
+                self.adicionar_mensagem(thread_id, "assistant", self.gerar_resposta(dados["prompt"]), run_id=run_id)
+
+            dados["run"]["status"] = status
+            return dict(dados["run"])
+
+    def excluir_thread(self, thread_id):
+        """Exclui o thread e os seus runs; retorna False se o thread não existir"""
+        with self._lock:
+            if self.threads.pop(thread_id, None) is None:
+                return False
+            for run_id in [run_id for run_id, dados in self.runs.items() if dados["run"]["thread_id"] == thread_id]:
+                del self.runs[run_id]
+        return True
+
+    def estatisticas(self):
+        """Retorna os contadores de chamadas e o número de objetos em memória"""
+        with self._lock:
+            return {
+                "chamadas": dict(self.contadores),
+                "threads_ativos": len(self.threads),
+                "runs": len(self.runs)
+            }
+
+
+def criar_app(simulador):
+    """Cria a aplicação Flask que expõe o simulador com as rotas da API da OpenAI"""
+    app = Flask(__name__)
+
+    def erro_nao_encontrado(mensagem):
+        return jsonify({"error": {"message": mensagem, "type": "invalid_request_error", "code": None}}), 404
+
+    @app.before_request
+    def simular_latencia():
+        if simulador.latencia_requisicao:
+            time.sleep(simulador.latencia_requisicao)
+
+    @app.route('/v1/models', methods=['GET'])
+    def listar_modelos():
+        simulador.contar("models.list")
+        modelos = [{"id": modelo, "object": "model", "created": 0, "owned_by": "simulador"}
+                   for modelo in ("gpt-4", "gpt-3.5-turbo")]
+        return jsonify({"object": "list", "data": modelos})
+
+    @app.route('/v1/assistants/<assistant_id>', methods=['GET'])
+    def obter_assistente(assistant_id):
+        simulador.contar("assistants.retrieve")
+        return jsonify({
+            "id": assistant_id,
+            "object": "assistant",
+            "created_at": 0,
+            "name": "Assistente Simulado",
+            "description": None,
+            "model": "gpt-4",
+            "instructions": "Você é um assistente jurídico simulado para testes de carga.",
+            "tools": [],
+            "file_ids": [],
+            "metadata": {}
+        })
+
+    @app.route('/v1/threads', methods=['POST'])
+    def criar_thread():
+        simulador.contar("threads.create")
+        return jsonify(simulador.criar_thread())
+
+    @app.route('/v1/threads/<thread_id>', methods=['DELETE'])
+    def excluir_thread(thread_id):
+        simulador.contar("threads.delete")
+        if not simulador.excluir_thread(thread_id):
+            return erro_nao_encontrado(f"No thread found with id '{thread_id}'.")
+        return jsonify({"id": thread_id, "object": "thread.deleted", "deleted": True})
+
+    @app.route('/v1/threads/<thread_id>/messages', methods=['POST'])
+    def criar_mensagem(thread_id):
+        simulador.contar("messages.create")
+        dados = request.get_json(silent=True) or {}
+        mensagem = simulador.adicionar_mensagem(thread_id, dados.get("role", "user"), dados.get("content", ""))
+        if mensagem is None:
+            return erro_nao_encontrado(f"No thread found with id '{thread_id}'.")
+        return jsonify(mensagem)
+
+    @app.route('/v1/threads/<thread_id>/messages', methods=['GET'])
+    def listar_mensagens(thread_id):
+        simulador.contar("messages.list")
+        with simulador._lock:
+            dados = simulador.threads.get(thread_id)
+            mensagens = list(dados["mensagens"]) if dados else None
+        if mensagens is None:
+            return erro_nao_encontrado(f"No thread found with id '{thread_id}'.")
+
+        # Ordem padrão da API: mais recentes primeiro
+        if request.args.get("order", "desc") == "desc":
+            mensagens.reverse()
+        return jsonify({
+            "object": "list",
+            "data": mensagens,
+            "first_id": mensagens[0]["id"] if mensagens else None,
+            "last_id": mensagens[-1]["id"] if mensagens else None,
+            "has_more": False
+        })
+
+    @app.route('/v1/threads/<thread_id>/runs', methods=['POST'])
+    def criar_run(thread_id):
+        simulador.contar("runs.create")
+        dados = request.get_json(silent=True) or {}
+        run = simulador.criar_run(thread_id, dados.get("assistant_id"))
+        if run is None:
+            return erro_nao_encontrado(f"No thread found with id '{thread_id}'.")
+        return jsonify(run)
+
+    @app.route('/v1/threads/<thread_id>/runs/<run_id>', methods=['GET'])
+    def consultar_run(thread_id, run_id):
+        simulador.contar("runs.retrieve")
+        run = simulador.consultar_run(thread_id, run_id)
+        if run is None:
+            return erro_nao_encontrado(f"No run found with id '{run_id}'.")
+        return jsonify(run)
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        simulador.contar("chat.completions")
+        dados = request.get_json(silent=True) or {}
+        mensagens = dados.get("messages", [])
+        prompt = next((m.get("content", "") for m in reversed(mensagens) if m.get("role") == "user"), "")
+        modelo = dados.get("model", "gpt-4")
+        resposta = simulador.gerar_resposta(prompt)
+        completion_id = _novo_id("chatcmpl")
+
+        if not dados.get("stream"):
+            time.sleep(simulador.latencia_chat)
+            return jsonify({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": _agora(),
+                "model": modelo,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": resposta},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(resposta) // 4,
+                          "total_tokens": (len(prompt) + len(resposta)) // 4}
+            })
+
+        def fragmentos():
+            def chunk(delta, finish_reason=None):
+                return "data: " + json.dumps({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": _agora(),
+                    "model": modelo,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                }, ensure_ascii=False) + "\n\n"
+
+            yield chunk({"role": "assistant", "content": ""})
+            for inicio in range(0, len(resposta), simulador.tamanho_fragmento):
+                time.sleep(simulador.atraso_fragmento)
+                yield chunk({"content": resposta[inicio:inicio + simulador.tamanho_fragmento]})
+            yield chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return Response(fragmentos(), mimetype='text/event-stream')
+
+    @app.route('/simulador/estatisticas', methods=['GET'])
+    def estatisticas():
+        return jsonify(simulador.estatisticas())
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local que simula a API da OpenAI para testes de carga')
+    parser.add_argument('--host', default='127.0.0.1', help='Endereço de escuta (padrão: 127.0.0.1)')
+    parser.add_argument('--porta', type=int, default=8090, help='Porta de escuta (padrão: 8090)')
+    parser.add_argument('--sequencia-run', default='queued:0.2,in_progress:1.0,completed',
+                        help='Status dos runs e duração de cada um, ex.: queued:0.2,in_progress:1.0,completed')
+    parser.add_argument('--falhar-a-cada', type=int, default=0,
+                        help='Faz todo N-ésimo run terminar com status failed (padrão: 0, nunca)')
+    parser.add_argument('--latencia-chat', type=float, default=1.0,
+                        help='Duração de uma chat completion sem streaming, em segundos (padrão: 1.0)')
+    parser.add_argument('--tamanho-secao', type=int, default=1500,
+                        help='Tamanho aproximado de cada seção, em caracteres (padrão: 1500)')
+    parser.add_argument('--tamanho-fragmento', type=int, default=40,
+                        help='Caracteres por fragmento no streaming (padrão: 40)')
+    parser.add_argument('--atraso-fragmento', type=float, default=0.01,
+                        help='Intervalo entre fragmentos no streaming, em segundos (padrão: 0.01)')
+    parser.add_argument('--latencia-requisicao', type=float, default=0.0,
+                        help='Latência adicionada a todas as requisições, em segundos (padrão: 0)')
+    args = parser.parse_args()
+
+    simulador = SimuladorOpenAI(
+        sequencia_run=args.sequencia_run,
+        falhar_a_cada=args.falhar_a_cada,
+        latencia_chat=args.latencia_chat,
+        tamanho_secao=args.tamanho_secao,
+        tamanho_fragmento=args.tamanho_fragmento,
+        atraso_fragmento=args.atraso_fragmento,
+        latencia_requisicao=args.latencia_requisicao
+    )
+
+    print(f"Simulador da OpenAI em http://{args.host}:{args.porta}/v1")
+    print(f"Sequência dos runs: {args.sequencia_run}")
+    criar_app(simulador).run(host=args.host, port=args.porta, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
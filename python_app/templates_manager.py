@@ -1,11 +1,12 @@
 import os
-import json
 import re
 from datetime import datetime
 from docx import Document
 from docx.shared import Cm, Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.section import WD_ORIENT
+from utils.banco_clientes import obter_banco_clientes, ler_clientes_json
+from utils.renderizador_docx import substituir_em_runs
 
 # Diretórios
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -30,77 +31,59 @@ class Cliente:
         self.representante_legal = representante_legal
         self.endereco_completo = endereco_completo
     
+    @staticmethod
+    def _de_dicionario(cliente_data):
+        """Cria um Cliente a partir de um registro do banco de clientes"""
+        return Cliente(
+            id=cliente_data.get('id'),
+            nome=cliente_data.get('nome'),
+            cnpj=cliente_data.get('cnpj'),
+            endereco=cliente_data.get('endereco'),
+            logo_path=cliente_data.get('logo_path'),
+            advogados=cliente_data.get('advogados', []),
+            razao_social=cliente_data.get('razao_social'),
+            representante_legal=cliente_data.get('representante_legal'),
+            endereco_completo=cliente_data.get('endereco_completo')
+        )
+    
     @staticmethod
     def carregar_clientes():
-        """Carrega todos os clientes do diretório de clientes"""
-        clientes = []
-        clientes_file = os.path.join(CLIENTES_DIR, 'clientes.json')
-        
-        if os.path.exists(clientes_file):
-            try:
-                with open(clientes_file, 'r', encoding='utf-8') as f:
-                    clientes_data = json.load(f)
-                    for cliente_data in clientes_data:
-                        clientes.append(Cliente(
-                            id=cliente_data.get('id'),
-                            nome=cliente_data.get('nome'),
-                            cnpj=cliente_data.get('cnpj'),
-                            endereco=cliente_data.get('endereco'),
-                            logo_path=cliente_data.get('logo_path'),
-                            advogados=cliente_data.get('advogados', []),
-                            razao_social=cliente_data.get('razao_social'),
-                            representante_legal=cliente_data.get('representante_legal'),
-                            endereco_completo=cliente_data.get('endereco_completo')
-                        ))
-            except Exception as e:
-                print(f"Erro ao carregar clientes: {e}")
-        
-        return clientes
+        """Carrega todos os clientes do banco de clientes"""
+        try:
+            return [Cliente._de_dicionario(c) for c in obter_banco_clientes().listar()]
+        except Exception as e:
+            print(f"Erro ao carregar clientes: {e}")
+            return []
     
     @staticmethod
     def carregar_clientes_do_json():
         """Carrega clientes do arquivo JSON externo (src/data/clientes.json)"""
-        clientes = []
         clientes_file = os.path.join(os.path.dirname(BASE_DIR), 'src', 'data', 'clientes.json')
         
         if os.path.exists(clientes_file):
             try:
-                with open(clientes_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    clientes_data = data.get('results', [])
-                    for cliente_data in clientes_data:
-                        # Construir endereço completo
-                        endereco_completo = f"{cliente_data.get('EnderecoRua', '')}, {cliente_data.get('EnderecoNumero', '')}, {cliente_data.get('EnderecoBairro', '')}, {cliente_data.get('EnderecoCidade', '')}/{cliente_data.get('EnderecoUF', '')}, CEP: {cliente_data.get('EnderecoCep', '')}"
-                        
-                        clientes.append(Cliente(
-                            id=cliente_data.get('_id'),
-                            nome=cliente_data.get('Nome_fantasia'),
-                            cnpj=cliente_data.get('CNPJ'),
-                            endereco=endereco_completo,
-                            razao_social=cliente_data.get('Razao_social'),
-                            endereco_completo=endereco_completo
-                        ))
+                return [Cliente._de_dicionario(c) for c in ler_clientes_json(clientes_file)]
             except Exception as e:
                 print(f"Erro ao carregar clientes do JSON externo: {e}")
         
-        return clientes
+        return []
     
     @staticmethod
     def obter_cliente_por_id(cliente_id):
         """Obtém um cliente pelo ID"""
-        # Primeiro tenta carregar do arquivo interno
-        clientes = Cliente.carregar_clientes()
-        for cliente in clientes:
-            if cliente.id == cliente_id:
-                return cliente
-        
-        # Se não encontrar, tenta carregar do arquivo externo
-        clientes = Cliente.carregar_clientes_do_json()
-        for cliente in clientes:
-            if cliente.id == cliente_id:
-                return cliente
-        
-        return None
+        cliente_data = obter_banco_clientes().obter(cliente_id)
+        return Cliente._de_dicionario(cliente_data) if cliente_data else None
+    
+    @staticmethod
+    def obter_cliente_por_cnpj(cnpj):
+        """Obtém um cliente pelo CNPJ (com ou sem máscara)"""
+        cliente_data = obter_banco_clientes().obter_por_cnpj(cnpj)
+        return Cliente._de_dicionario(cliente_data) if cliente_data else None
+    
+    @staticmethod
+    def buscar_clientes_por_nome(prefixo, limite=20):
+        """Busca clientes cujo nome começa com o prefixo informado"""
+        return [Cliente._de_dicionario(c) for c in obter_banco_clientes().buscar_por_nome(prefixo, limite)]
 
 class TemplateManager:
     """Classe para gerenciar templates de petições"""
@@ -293,71 +276,47 @@ class TemplateManager:
                     if os.path.exists(cliente.logo_path):
                         run.add_picture(cliente.logo_path, width=Cm(5))
         
-        # Substituir placeholders no documento
+        # Construir qualificação com base nos dados disponíveis
+        # Usar razão social se disponível, senão usar nome
+        qualificacao = cliente.razao_social or cliente.nome
+        
+        # Adicionar CNPJ se disponível
+        if cliente.cnpj and cliente.cnpj.strip() != "":
+            qualificacao += f", inscrita no CNPJ sob o nº {cliente.cnpj}"
+        
+        # Adicionar endereço se disponível
+        if cliente.endereco_completo and cliente.endereco_completo.strip() != "":
+            qualificacao += f", com sede em {cliente.endereco_completo}"
+        elif cliente.endereco and cliente.endereco.strip() != "":
+            qualificacao += f", com sede em {cliente.endereco}"
+        
+        # Adicionar representante legal se disponível
+        if cliente.representante_legal and cliente.representante_legal.strip() != "":
+            qualificacao += f", neste ato representada por seu representante legal, {cliente.representante_legal}"
+        
+        # Adicionar papel do cliente no processo
+        qualificacao += f", na qualidade de {info_tipo.get('papel_cliente', 'licitante')}"
+        
+        advogado = cliente.advogados[0] if cliente.advogados else {}
+        
+        placeholders = {
+            "[AUTORIDADE]": autoridade or "PREGOEIRO",
+            "[REFERENCIA_PROCESSO]": referencia_processo or "PROCESSO ADMINISTRATIVO Nº [NÚMERO]",
+            "[NOME_CLIENTE]": cliente.nome,
+            "[QUALIFICACAO_CLIENTE]": qualificacao,
+            "[CONTRAPARTE]": contraparte or "[NOME DA CONTRAPARTE]",
+            "[FATOS]": dados_peticao.get('fatos', ''),
+            "[FUNDAMENTOS]": dados_peticao.get('fundamentos', ''),
+            "[PEDIDOS]": dados_peticao.get('pedidos', ''),
+            "[CIDADE]": cidade or "São Paulo",
+            "[DATA]": datetime.now().strftime('%d/%m/%Y'),
+            "[ADVOGADO]": advogado.get('nome', 'ADVOGADO'),
+            "[NUMERO_OAB]": advogado.get('oab', 'OAB/XX 000000')
+        }
+        
+        # Substituir placeholders no documento, editando os runs no lugar para manter a formatação
         for paragraph in doc.paragraphs:
-            if "[AUTORIDADE]" in paragraph.text:
-                paragraph.text = paragraph.text.replace("[AUTORIDADE]", autoridade or "PREGOEIRO")
-                
-            if "[REFERENCIA_PROCESSO]" in paragraph.text:
-                paragraph.text = paragraph.text.replace("[REFERENCIA_PROCESSO]", 
-                                                       referencia_processo or "PROCESSO ADMINISTRATIVO Nº [NÚMERO]")
-                
-            if "[NOME_CLIENTE]" in paragraph.text:
-                paragraph.text = paragraph.text.replace("[NOME_CLIENTE]", cliente.nome)
-                
-            if "[QUALIFICACAO_CLIENTE]" in paragraph.text:
-                # Construir qualificação com base nos dados disponíveis
-                qualificacao = ""
-                
-                # Usar razão social se disponível, senão usar nome
-                nome_empresa = cliente.razao_social or cliente.nome
-                qualificacao += nome_empresa
-                
-                # Adicionar CNPJ se disponível
-                if cliente.cnpj and cliente.cnpj.strip() != "":
-                    qualificacao += f", inscrita no CNPJ sob o nº {cliente.cnpj}"
-                
-                # Adicionar endereço se disponível
-                if cliente.endereco_completo and cliente.endereco_completo.strip() != "":
-                    qualificacao += f", com sede em {cliente.endereco_completo}"
-                elif cliente.endereco and cliente.endereco.strip() != "":
-                    qualificacao += f", com sede em {cliente.endereco}"
-                
-                # Adicionar representante legal se disponível
-                if cliente.representante_legal and cliente.representante_legal.strip() != "":
-                    qualificacao += f", neste ato representada por seu representante legal, {cliente.representante_legal}"
-                
-                # Adicionar papel do cliente no processo
-                qualificacao += f", na qualidade de {info_tipo.get('papel_cliente', 'licitante')}"
-                
-                paragraph.text = paragraph.text.replace("[QUALIFICACAO_CLIENTE]", qualificacao)
-                
-            if "[CONTRAPARTE]" in paragraph.text:
-                paragraph.text = paragraph.text.replace("[CONTRAPARTE]", contraparte or "[NOME DA CONTRAPARTE]")
-                
-            if "[FATOS]" in paragraph.text:
-                paragraph.text = paragraph.text.replace("[FATOS]", dados_peticao.get('fatos', ''))
-                
-            if "[FUNDAMENTOS]" in paragraph.text:
-                paragraph.text = paragraph.text.replace("[FUNDAMENTOS]", dados_peticao.get('fundamentos', ''))
-                
-            if "[PEDIDOS]" in paragraph.text:
-                paragraph.text = paragraph.text.replace("[PEDIDOS]", dados_peticao.get('pedidos', ''))
-                
-            if "[CIDADE]" in paragraph.text:
-                paragraph.text = paragraph.text.replace("[CIDADE]", cidade or "São Paulo")
-                
-            if "[DATA]" in paragraph.text:
-                data_atual = datetime.now().strftime('%d/%m/%Y')
-                paragraph.text = paragraph.text.replace("[DATA]", data_atual)
-                
-            if "[ADVOGADO]" in paragraph.text:
-                advogado = cliente.advogados[0] if cliente.advogados else "ADVOGADO"
-                paragraph.text = paragraph.text.replace("[ADVOGADO]", advogado.get('nome', 'ADVOGADO'))
-                
-            if "[NUMERO_OAB]" in paragraph.text:
-                advogado = cliente.advogados[0] if cliente.advogados else {"oab": "OAB/XX 000000"}
-                paragraph.text = paragraph.text.replace("[NUMERO_OAB]", advogado.get('oab', 'OAB/XX 000000'))
+            substituir_em_runs(paragraph, placeholders)
         
         # Definir o nome do arquivo
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
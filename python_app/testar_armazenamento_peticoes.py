@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script para testar o armazenamento das petições pelo hash do conteúdo (utils/armazenamento_peticoes.py)
+
+Os documentos são gravados em diretórios temporários e o cadastro de
+clientes é um banco temporário; peticoes/ e data/ não são alterados.
+
+Uso:
+    python testar_armazenamento_peticoes.py
+"""
+
+import io
+import os
+import sys
+import stat
+import time
+import shutil
+import hashlib
+import zipfile
+import tempfile
+from docx import Document
+
+# Adicionar o diretório atual ao path para importar módulos locais
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+DIRETORIO_TESTE = tempfile.mkdtemp()
+os.environ["CLIENTES_DB_PATH"] = os.path.join(DIRETORIO_TESTE, "clientes.sqlite3")
+
+from utils.armazenamento_peticoes import ArmazenamentoPeticoes, normalizar_zip, serializar_documento, OBJETOS_DIR
+from utils.docx_generator import DocxGenerator
+from utils.logs import id_correlacao
+from verificacao import verificar, executar
+
+TIPO = "Recurso Administrativo"
+DADOS = {"cliente_id": "rally", "fatos_texto": "Fatos do recurso.", "pedidos_texto": "Pedidos do recurso."}
+
+def criar_zip(entradas, data):
+    """Cria um ZIP com as entradas na ordem dada, todas com a mesma data"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as arquivo_zip:
+        for nome, conteudo in entradas:
+            arquivo_zip.writestr(zipfile.ZipInfo(nome, date_time=data), conteudo)
+    return buffer.getvalue()
+
+def testar_normalizar_zip():
+    """Testa a ordem, a data e a compressão das entradas do ZIP normalizado"""
+    print("\nNormalização do ZIP")
+    entradas = [("word/document.xml", b"<documento/>" * 50), ("[Content_Types].xml", b"<tipos/>"), ("_rels/.rels", b"<rels/>")]
+    primeiro = normalizar_zip(criar_zip(entradas, (2024, 5, 17, 10, 30, 0)))
+    segundo = normalizar_zip(criar_zip(list(reversed(entradas)), (2025, 1, 2, 3, 4, 6)))
+    verificar(primeiro == segundo, "mesmo conteúdo com outra ordem e outra data gera os mesmos bytes")
+
+    with zipfile.ZipFile(io.BytesIO(primeiro)) as arquivo_zip:
+        infos = arquivo_zip.infolist()
+        verificar([info.filename for info in infos] == sorted(nome for nome, _ in entradas), "entradas em ordem alfabética")
+        verificar(all(info.date_time == (1980, 1, 1, 0, 0, 0) for info in infos), "data fixa em todas as entradas")
+        verificar(all(info.compress_type == zipfile.ZIP_DEFLATED for info in infos), "entradas comprimidas")
+        verificar(all(arquivo_zip.read(nome) == conteudo for nome, conteudo in entradas), "conteúdo preservado")
+
+def testar_serializacao():
+    """Testa que o mesmo documento serializado duas vezes tem o mesmo hash"""
+    print("\nSerialização determinística")
+    documento = Document()
+    documento.add_paragraph("Conteúdo da petição")
+    primeiro = serializar_documento(documento)
+    time.sleep(2.1)  # o ZIP guarda a hora com resolução de 2 segundos
+    segundo = serializar_documento(documento)
+    verificar(primeiro == segundo, "bytes iguais em momentos diferentes")
+    verificar(Document(io.BytesIO(primeiro)).paragraphs[0].text == "Conteúdo da petição", "documento serializado abre no python-docx")
+
+def testar_guardar():
+    """Testa o caminho pelo hash, a deduplicação e a gravação atômica"""
+    print("\nArmazenamento pelo hash")
+    diretorio = tempfile.mkdtemp(dir=DIRETORIO_TESTE)
+    armazenamento = ArmazenamentoPeticoes(diretorio)
+    conteudo = b"documento de teste"
+    hash_conteudo = hashlib.sha256(conteudo).hexdigest()
+
+    caminho, gravado = armazenamento.guardar(conteudo, hash_conteudo)
+    esperado = os.path.join(diretorio, OBJETOS_DIR, hash_conteudo[:2], hash_conteudo[2:4], f"{hash_conteudo}.docx")
+    verificar(gravado and caminho == esperado == armazenamento.caminho(hash_conteudo), "documento gravado em objetos/ab/cd/<hash>.docx")
+    with open(caminho, 'rb') as f:
+        verificar(f.read() == conteudo, "conteúdo gravado")
+    verificar(stat.S_IMODE(os.stat(caminho).st_mode) == 0o644, "arquivo legível pelo proxy (0644)")
+    verificar(armazenamento.existe(hash_conteudo) and not armazenamento.existe("0" * 64) and not armazenamento.existe(None),
+              "existe() apenas para os hashes armazenados")
+
+    modificado = os.stat(caminho).st_mtime_ns
+    verificar(armazenamento.guardar(conteudo, hash_conteudo) == (caminho, False), "documento idêntico não gravado de novo")
+    verificar(os.stat(caminho).st_mtime_ns == modificado, "arquivo existente não reescrito")
+    verificar(not any(nome.endswith('.tmp') for _, _, arquivos in os.walk(diretorio) for nome in arquivos),
+              "nenhum arquivo temporário deixado no diretório")
+
+def testar_gerador():
+    """Testa a gravação pelo DocxGenerator: deduplicação, índice e petições antigas"""
+    print("\nGravação pelo DocxGenerator")
+    peticoes_dir = tempfile.mkdtemp(dir=DIRETORIO_TESTE)
+    gerador = DocxGenerator(os.path.join(BASE_DIR, 'templates_docx'), peticoes_dir, os.path.join(BASE_DIR, 'clientes'))
+
+    primeiro = gerador.renderizar_documento(TIPO, DADOS)
+    segundo = gerador.renderizar_documento(TIPO, DADOS)
+    verificar(primeiro["hash"] == segundo["hash"] == hashlib.sha256(primeiro["conteudo"]).hexdigest(),
+              "mesmos dados geram o mesmo hash")
+    verificar(primeiro["hash"][:8] in primeiro["nome"], "nome de download com o início do hash")
+    outro = gerador.renderizar_documento(TIPO, dict(DADOS, pedidos_texto="Outros pedidos."))
+    verificar(outro["hash"] != primeiro["hash"] and outro["nome"] != primeiro["nome"],
+              "documentos diferentes com nomes diferentes no mesmo segundo")
+
+    token = id_correlacao.set("requisicao-teste")
+    try:
+        caminho = gerador.gravar_documento(primeiro)
+    finally:
+        id_correlacao.reset(token)
+    segundo["nome"] = "copia_" + segundo["nome"]
+    verificar(gerador.gravar_documento(segundo) == caminho, "documento idêntico reaproveita o mesmo arquivo")
+    objetos = [nome for _, _, arquivos in os.walk(os.path.join(peticoes_dir, OBJETOS_DIR)) for nome in arquivos]
+    verificar(objetos == [f"{primeiro['hash']}.docx"], "um único objeto armazenado")
+
+    registro = gerador.indice.obter(primeiro["nome"])
+    verificar(registro["hash"] == primeiro["hash"] and registro["id_requisicao"] == "requisicao-teste",
+              "índice registra o hash e o ID da requisição")
+    verificar(gerador.indice.obter(segundo["nome"])["id_requisicao"] is None, "sem requisição, ID em branco")
+    verificar(gerador.caminho_peticao(primeiro["nome"]) == gerador.caminho_peticao(segundo["nome"]) == caminho,
+              "nomes de download resolvidos para o objeto armazenado")
+
+    antigo = os.path.join(peticoes_dir, "peticao_antiga.docx")
+    with open(antigo, 'wb') as f:
+        f.write(primeiro["conteudo"])
+    verificar(gerador.caminho_peticao("peticao_antiga.docx") == antigo, "petição antiga servida do diretório")
+    verificar(gerador.caminho_peticao("../peticao_antiga.docx") == antigo, "caminho relativo reduzido ao nome do arquivo")
+    verificar(gerador.caminho_peticao("inexistente.docx") is None, "petição inexistente retorna None")
+
+    gerador.indice.sincronizar(peticoes_dir, gerador.armazenamento)
+    verificar(gerador.indice.obter(primeiro["nome"]) is not None, "sincronização mantém os registros armazenados pelo hash")
+
+if __name__ == "__main__":
+    try:
+        executar(
+            "Testando o armazenamento das petições",
+            testar_normalizar_zip,
+            testar_serializacao,
+            testar_guardar,
+            testar_gerador
+        )
+    finally:
+        shutil.rmtree(DIRETORIO_TESTE, ignore_errors=True)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script para testar o cadastro de clientes em SQLite (utils/banco_clientes.py)
+
+Usa bancos temporários; o banco da aplicação (data/clientes.sqlite3) e os
+arquivos JSON não são alterados.
+
+Uso:
+    python testar_banco_clientes.py
+"""
+
+import os
+import sys
+import json
+import shutil
+import logging
+import tempfile
+
+# Adicionar o diretório atual ao path para importar módulos locais
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import utils.banco_clientes as banco_clientes
+from utils.banco_clientes import BancoClientes, FONTES_JSON_PADRAO, obter_banco_clientes
+from verificacao import verificar, executar
+
+# O arquivo inválido do teste é registrado como erro pelo banco; não exibi-lo
+logging.getLogger("utils.banco_clientes").setLevel(logging.CRITICAL)
+
+DATA_JSON, CLIENTES_JSON = FONTES_JSON_PADRAO[:2]
+
+def ids_do_arquivo(caminho):
+    """Retorna os IDs de clientes de um arquivo JSON no formato interno"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return [str(cliente['id']) for cliente in json.load(f)]
+
+def testar_importacao_inicial():
+    """Testa a importação de todos os arquivos legados na primeira abertura"""
+    print("\nImportação inicial")
+    diretorio = tempfile.mkdtemp()
+    os.environ["CLIENTES_DB_PATH"] = os.path.join(diretorio, "clientes.sqlite3")
+    banco_clientes._banco = None
+    try:
+        banco = obter_banco_clientes()
+        ids = set(ids_do_arquivo(DATA_JSON)) | set(ids_do_arquivo(CLIENTES_JSON))
+        verificar(banco.contar() == len(ids), f"clientes dos dois arquivos importados ({banco.contar()} de {len(ids)})")
+        verificar(all(banco.obter(cliente_id) for cliente_id in ids), "todos os IDs resolvidos pelo banco")
+        verificar(banco.obter("santacruz") is not None and banco.obter("1643384963681x301322380423725060") is not None,
+                  "clientes presentes apenas em clientes/clientes.json resolvidos")
+
+        with open(DATA_JSON, 'r', encoding='utf-8') as f:
+            rally = next(c for c in json.load(f) if c['id'] == 'rally')
+        verificar(banco.obter("rally")["nome"] == rally["nome"], "ID repetido fica com os dados de data/clientes.json")
+
+        banco.remover("santacruz")
+        verificar(banco.importar_fontes_padrao() == 0 and banco.obter("santacruz") is None,
+                  "arquivos já importados não são reimportados (remoção mantida)")
+        banco._conexao.close()
+    finally:
+        banco_clientes._banco = None
+        os.environ.pop("CLIENTES_DB_PATH", None)
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+def testar_banco_existente():
+    """Testa a inclusão de um arquivo legado em um banco que já tinha clientes"""
+    print("\nBanco já populado")
+    banco = BancoClientes(":memory:")
+    banco.importar_json(DATA_JSON)
+    verificar(banco.obter("santacruz") is None, "banco criado apenas com data/clientes.json")
+
+    gravados = banco.importar_fontes_padrao(fontes=(DATA_JSON, CLIENTES_JSON))
+    verificar(banco.obter("santacruz") is not None and gravados == banco.contar() - len(ids_do_arquivo(DATA_JSON)),
+              "arquivo ainda não importado é incluído sem sobrescrever os existentes")
+    verificar(banco.importar_fontes_padrao(fontes=(DATA_JSON, CLIENTES_JSON)) == 0, "segunda chamada não grava nada")
+
+def testar_formatos():
+    """Testa a leitura da exportação externa e arquivos inválidos"""
+    print("\nFormatos de arquivo")
+    diretorio = tempfile.mkdtemp()
+    try:
+        externo = os.path.join(diretorio, "externo.json")
+        with open(externo, 'w', encoding='utf-8') as f:
+            json.dump({"results": [
+                {"_id": "ext1", "Nome_fantasia": "Externa", "Razao_social": "Externa LTDA",
+                 "CNPJ": "12.345.678/0001-90", "EnderecoCidade": "Campo Grande", "EnderecoUF": "MS"},
+                {"Nome_fantasia": "Sem ID"}
+            ]}, f)
+        invalido = os.path.join(diretorio, "invalido.json")
+        with open(invalido, 'w', encoding='utf-8') as f:
+            f.write("{")
+
+        banco = BancoClientes(":memory:")
+        verificar(banco.importar_fontes_padrao(fontes=(invalido, externo)) == 1, "arquivo inválido ignorado, externo importado")
+        cliente = banco.obter_por_cnpj("12345678000190")
+        verificar(cliente is not None and cliente["razao_social"] == "Externa LTDA", "cliente externo buscado pelo CNPJ")
+        verificar("Campo Grande/MS" in cliente["endereco_completo"], "endereço montado a partir dos campos externos")
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+def testar_alteracoes():
+    """Testa inclusão, advogados, busca e remoção"""
+    print("\nAlterações no cadastro")
+    banco = BancoClientes(":memory:")
+    cliente = {"id": "novo", "nome": "Nova Empresa", "cnpj": "11.222.333/0001-44",
+               "advogados": [{"nome": "Fulano", "oab": "MS 1"}]}
+    verificar(banco.adicionar(cliente) and not banco.adicionar(cliente), "ID duplicado recusado")
+    verificar(banco.adicionar_advogado("novo", "Beltrano", "MS 2") and not banco.adicionar_advogado("x", "A", "B"),
+              "advogado vinculado apenas a cliente existente")
+    verificar(sorted(a["oab"] for a in banco.obter("novo")["advogados"]) == ["MS 1", "MS 2"], "advogados retornados com o cliente")
+    verificar([c["id"] for c in banco.buscar_por_nome("nova")] == ["novo"], "busca por prefixo do nome")
+    verificar(banco.remover("novo") and banco.obter("novo") is None, "cliente removido")
+
+def testar_cache():
+    """Testa o cache do processo e sua invalidação por gravações locais e de outras conexões"""
+    print("\nCache de consultas")
+    diretorio = tempfile.mkdtemp()
+    try:
+        caminho = os.path.join(diretorio, "clientes.sqlite3")
+        banco = BancoClientes(caminho)
+        outro_processo = BancoClientes(caminho)
+        banco.adicionar({"id": "c1", "nome": "Primeiro", "cnpj": "11.111.111/0001-11"})
+
+        consultas = []
+        consultar_original = banco._consultar
+        banco._consultar = lambda *args: consultas.append(args) or consultar_original(*args)
+
+        primeiro = banco.obter("c1")
+        verificar(banco.obter("c1") is primeiro and len(consultas) == 1, "segunda consulta por ID servida pelo cache")
+        por_cnpj = banco.obter_por_cnpj("11111111000111")
+        verificar(por_cnpj == primeiro and banco.obter_por_cnpj("11.111.111/0001-11") is por_cnpj,
+                  "consulta por CNPJ em cache, com e sem máscara")
+        verificar(len(consultas) == 2, "uma consulta ao banco por índice")
+
+        banco.adicionar_advogado("c1", "Fulano", "MS 1")
+        verificar(banco.obter("c1")["advogados"] == [{"nome": "Fulano", "oab": "MS 1"}],
+                  "gravação da própria instância invalida o cache")
+
+        outro_processo.salvar({"id": "c1", "nome": "Renomeado", "cnpj": "11.111.111/0001-11"})
+        verificar(banco.obter("c1")["nome"] == "Renomeado", "gravação de outra conexão invalida o cache")
+        outro_processo.remover("c1")
+        verificar(banco.obter("c1") is None and banco.obter_por_cnpj("11111111000111") is None,
+                  "cliente removido por outra conexão não é retornado")
+
+        antes = len(consultas)
+        banco.obter("inexistente")
+        banco.obter("inexistente")
+        verificar(len(consultas) == antes + 2, "IDs desconhecidos não são guardados no cache")
+        banco._conexao.close()
+        outro_processo._conexao.close()
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+if __name__ == "__main__":
+    executar(
+        "Testando o cadastro de clientes",
+        testar_importacao_inicial,
+        testar_banco_existente,
+        testar_formatos,
+        testar_alteracoes,
+        testar_cache
+    )
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script para testar o cache dos documentos entregues com "memoria" (utils/cache_documentos.py)
+
+Usa bancos temporários; nenhum arquivo da aplicação é alterado.
+
+Uso:
+    python testar_cache_documentos.py
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Adicionar o diretório atual ao path para importar módulos locais
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.cache_documentos import CacheDocumentos, CacheDocumentosCompartilhado
+from verificacao import verificar, executar
+
+def documento(nome, tamanho=100):
+    """Cria um documento renderizado simulado"""
+    return {"nome": nome, "conteudo": nome.encode()[:1] * tamanho, "hash": f"hash-{nome}",
+            "tipo": "Recurso Administrativo", "cliente_id": "rally", "cliente_nome": "Rally"}
+
+def testar_guardar_obter(cache, descricao):
+    """Testa a ida e volta de um documento e a chave aleatória"""
+    original = documento("a.docx")
+    chave = cache.guardar(original)
+    obtido = cache.obter(chave)
+    verificar(obtido is not None and all(obtido[campo] == original[campo] for campo in original),
+              f"{descricao}: documento obtido pela chave com todos os campos")
+    verificar(len(chave) >= 20 and chave != cache.guardar(original), f"{descricao}: chaves aleatórias e distintas")
+    verificar(cache.obter("inexistente") is None, f"{descricao}: chave desconhecida retorna None")
+
+def testar_ttl(cache, descricao):
+    """Testa a expiração dos documentos"""
+    chave = cache.guardar(documento("a.docx"))
+    verificar(cache.obter(chave) is not None, f"{descricao}: documento disponível dentro do TTL")
+    time.sleep(1.1)
+    verificar(cache.obter(chave) is None and len(cache) == 0, f"{descricao}: documento expirado descartado")
+
+def testar_memoria():
+    """Testa o cache na memória do processo"""
+    print("\nCache na memória do processo")
+    testar_guardar_obter(CacheDocumentos(), "memória")
+    testar_ttl(CacheDocumentos(ttl=1), "memória")
+
+    cache = CacheDocumentos(max_bytes=250)
+    a = cache.guardar(documento("a.docx"))
+    b = cache.guardar(documento("b.docx"))
+    cache.obter(a)
+    c = cache.guardar(documento("c.docx"))
+    verificar(cache.obter(b) is None, "documento menos usado descartado acima do limite de bytes")
+    verificar(cache.obter(a) is not None and cache.obter(c) is not None, "documentos usados recentemente mantidos")
+    d = cache.guardar(documento("d.docx", 1000))
+    verificar(cache.obter(d) is not None and len(cache) == 1, "documento maior que o limite mantido sozinho")
+
+    original = documento("e.docx")
+    original["conteudo"] = bytearray(original["conteudo"])
+    chave = cache.guardar(original)
+    original["conteudo"][0:1] = b"X"
+    verificar(cache.obter(chave)["conteudo"] == b"e" * 100, "conteúdo copiado ao guardar")
+
+def testar_compartilhado():
+    """Testa o cache em SQLite compartilhado entre workers"""
+    print("\nCache compartilhado em SQLite")
+    diretorio = tempfile.mkdtemp()
+    try:
+        caminho = os.path.join(diretorio, "documentos.sqlite3")
+        testar_guardar_obter(CacheDocumentosCompartilhado(caminho), "compartilhado")
+        testar_ttl(CacheDocumentosCompartilhado(os.path.join(diretorio, "ttl.sqlite3"), ttl=1), "compartilhado")
+
+        primeiro = CacheDocumentosCompartilhado(caminho)
+        segundo = CacheDocumentosCompartilhado(caminho)
+        chave = primeiro.guardar(documento("f.docx"))
+        verificar(segundo.obter(chave)["nome"] == "f.docx", "documento guardado por um worker obtido pelo outro")
+
+        limitado = CacheDocumentosCompartilhado(os.path.join(diretorio, "limite.sqlite3"), max_bytes=250)
+        chaves = [limitado.guardar(documento(f"{letra}.docx")) for letra in "abc"]
+        verificar(limitado.obter(chaves[0]) is None and all(limitado.obter(k) for k in chaves[1:]),
+                  "documento mais antigo descartado acima do limite de bytes")
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+def testar_ambiente():
+    """Testa a escolha do cache pela variável DOCUMENTOS_MEMORIA_PATH"""
+    print("\nVariáveis de ambiente")
+    diretorio = tempfile.mkdtemp()
+    anterior = os.environ.pop("DOCUMENTOS_MEMORIA_PATH", None)
+    try:
+        verificar(type(CacheDocumentos.do_ambiente()) is CacheDocumentos, "sem DOCUMENTOS_MEMORIA_PATH, cache do processo")
+        os.environ["DOCUMENTOS_MEMORIA_PATH"] = os.path.join(diretorio, "documentos.sqlite3")
+        verificar(isinstance(CacheDocumentos.do_ambiente(), CacheDocumentosCompartilhado),
+                  "com DOCUMENTOS_MEMORIA_PATH, cache compartilhado no arquivo")
+    finally:
+        os.environ.pop("DOCUMENTOS_MEMORIA_PATH", None)
+        if anterior is not None:
+            os.environ["DOCUMENTOS_MEMORIA_PATH"] = anterior
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+if __name__ == "__main__":
+    executar(
+        "Testando o cache de documentos",
+        testar_memoria,
+        testar_compartilhado,
+        testar_ambiente
+    )
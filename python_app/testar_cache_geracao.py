@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script para testar o cache persistente de gerações (utils/cache_geracao.py)
+
+Usa bancos temporários; o cache da aplicação (data/cache_geracao.sqlite3)
+não é alterado.
+
+Uso:
+    python testar_cache_geracao.py
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Adicionar o diretório atual ao path para importar módulos locais
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.cache_geracao import CacheGeracao
+from verificacao import verificar, executar
+
+def testar_chave():
+    """Testa a normalização do prompt e os componentes da chave"""
+    print("\nChave do cache")
+    chave = CacheGeracao.gerar_chave("chat", "asst_1", "gpt-4", "Gerar  petição\n\nde recurso ")
+    verificar(chave == CacheGeracao.gerar_chave("chat", "asst_1", "gpt-4", "Gerar petição de recurso"),
+              "variações de espaços geram a mesma chave")
+    verificar(chave != CacheGeracao.gerar_chave("assistente", "asst_1", "gpt-4", "Gerar petição de recurso"),
+              "modo de geração faz parte da chave")
+    verificar(chave != CacheGeracao.gerar_chave("chat", "asst_1", "gpt-4o", "Gerar petição de recurso"),
+              "modelo faz parte da chave")
+    verificar(chave != CacheGeracao.gerar_chave("chat", "asst_2", "gpt-4", "Gerar petição de recurso"),
+              "assistente faz parte da chave")
+    verificar(len(chave) == 64, "chave é um hash SHA-256 em hexadecimal")
+
+def testar_ttl():
+    """Testa a expiração das entradas pelo TTL"""
+    print("\nExpiração por TTL")
+    cache = CacheGeracao(":memory:", ttl_segundos=1, max_entradas=10)
+    cache.salvar("a", {"fatos": "texto"})
+    verificar(cache.obter("a") == {"fatos": "texto"}, "entrada disponível dentro do TTL")
+    time.sleep(1.2)
+    verificar(cache.obter("a") is None, "entrada expirada não é retornada")
+    verificar(cache.estatisticas()["entradas"] == 0, "entrada expirada removida na consulta")
+
+    cache.salvar("b", 1)
+    time.sleep(1.2)
+    cache.salvar("c", 2)
+    verificar(cache.estatisticas()["entradas"] == 1, "entradas expiradas removidas ao salvar")
+
+    sem_expiracao = CacheGeracao(":memory:", ttl_segundos=0, max_entradas=10)
+    sem_expiracao.salvar("a", 1)
+    sem_expiracao._conexao.execute("UPDATE cache_geracao SET criado_em = 0")
+    verificar(sem_expiracao.obter("a") == 1, "ttl_segundos=0 desativa a expiração")
+
+def testar_lru():
+    """Testa o despejo das entradas menos acessadas acima do limite"""
+    print("\nDespejo LRU")
+    cache = CacheGeracao(":memory:", ttl_segundos=0, max_entradas=3)
+    for chave in ("a", "b", "c"):
+        cache.salvar(chave, chave.upper())
+        time.sleep(0.01)
+
+    # Acessar "a" a torna a mais recente; "b" passa a ser a menos acessada
+    verificar(cache.obter("a") == "A", "entrada lida antes do despejo")
+    time.sleep(0.01)
+    cache.salvar("d", "D")
+
+    verificar(cache.obter("b") is None, "entrada menos acessada despejada")
+    verificar(all(cache.obter(chave) for chave in ("a", "c", "d")), "entradas mais recentes mantidas")
+    estatisticas = cache.estatisticas()
+    verificar(estatisticas["entradas"] == 3, "número de entradas limitado a max_entradas")
+    verificar(estatisticas["despejos"] == 1, "despejo contado nas estatísticas")
+
+    cache.salvar("a", "A2")
+    verificar(cache.obter("a") == "A2" and cache.estatisticas()["entradas"] == 3,
+              "salvar uma chave existente substitui o valor sem despejo")
+
+def testar_estatisticas():
+    """Testa os contadores de acertos e falhas"""
+    print("\nEstatísticas")
+    cache = CacheGeracao(":memory:", ttl_segundos=0, max_entradas=10)
+    cache.salvar("a", 1)
+    cache.obter("a")
+    cache.obter("a")
+    cache.obter("x")
+    estatisticas = cache.estatisticas(contar_entradas=False)
+    verificar((estatisticas["acertos"], estatisticas["falhas"]) == (2, 1), "acertos e falhas contados")
+    verificar(estatisticas["taxa_acerto"] == round(2 / 3, 4), "taxa de acerto calculada")
+    verificar(estatisticas["entradas"] is None, "contar_entradas=False não consulta o banco")
+    cache.limpar()
+    verificar(cache.estatisticas()["entradas"] == 0, "limpar remove todas as entradas")
+
+def testar_persistencia():
+    """Testa o compartilhamento das entradas entre instâncias (workers) e reinicializações"""
+    print("\nPersistência em disco")
+    diretorio = tempfile.mkdtemp()
+    try:
+        caminho = os.path.join(diretorio, "cache.sqlite3")
+        primeiro = CacheGeracao(caminho, ttl_segundos=0, max_entradas=10)
+        segundo = CacheGeracao(caminho, ttl_segundos=0, max_entradas=10)
+        primeiro.salvar("a", {"pedido": "Requer"})
+        verificar(segundo.obter("a") == {"pedido": "Requer"}, "entrada salva por um worker é lida pelo outro")
+        primeiro._conexao.close()
+        segundo._conexao.close()
+
+        reaberto = CacheGeracao(caminho, ttl_segundos=0, max_entradas=10)
+        verificar(reaberto.obter("a") == {"pedido": "Requer"}, "entrada preservada após reabrir o banco")
+        reaberto._conexao.close()
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+if __name__ == "__main__":
+    executar(
+        "Testando o cache de gerações",
+        testar_chave,
+        testar_ttl,
+        testar_lru,
+        testar_estatisticas,
+        testar_persistencia
+    )
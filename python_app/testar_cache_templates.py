@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script para testar o cache de templates DOCX (utils/cache_templates.py)
+
+Os templates de templates_docx/ são apenas lidos; as alterações são feitas
+em cópias temporárias.
+
+Uso:
+    python testar_cache_templates.py
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from docx import Document
+from lxml import etree
+
+# Adicionar o diretório atual ao path para importar módulos locais
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.cache_templates import CacheTemplates
+from utils.renderizador_docx import substituir_em_runs
+from verificacao import verificar, executar
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates_docx')
+
+def xml_das_partes(documento):
+    """Retorna o XML (ou o conteúdo binário) de cada parte do pacote, pelo nome da parte"""
+    partes = {}
+    for parte in documento.part.package.iter_parts():
+        elemento = getattr(parte, 'element', None)
+        partes[str(parte.partname)] = etree.tostring(elemento) if elemento is not None else parte.blob
+    return partes
+
+def testar_copia_igual_ao_arquivo():
+    """Testa se cada cópia do cache é igual a uma leitura direta do arquivo"""
+    print("\nCópia igual à leitura do arquivo")
+    cache = CacheTemplates()
+    for nome in sorted(os.listdir(TEMPLATES_DIR)):
+        if not nome.endswith('.docx'):
+            continue
+        caminho = os.path.join(TEMPLATES_DIR, nome)
+        verificar(xml_das_partes(cache.obter(caminho)) == xml_das_partes(Document(caminho)),
+                  f"{nome}: todas as partes iguais às do arquivo")
+
+def testar_copias_independentes():
+    """Testa se as alterações em uma cópia não chegam às seguintes"""
+    print("\nCópias independentes")
+    cache = CacheTemplates()
+    caminho = os.path.join(TEMPLATES_DIR, 'recurso_administrativo.docx')
+    documento, compilado = cache.obter_compilado(caminho)
+    verificar(compilado.paragrafos, "placeholders localizados no template")
+
+    def substituir(paragrafo, marcado):
+        substituir_em_runs(paragrafo, {placeholder: "PREENCHIDO" for placeholder in marcado.placeholders})
+
+    compilado.renderizar(documento, substituir)
+    documento.add_paragraph("Parágrafo acrescentado")
+    segundo, mesmo_compilado = cache.obter_compilado(caminho)
+    verificar(mesmo_compilado is compilado and cache.carregamentos == 1, "template compilado uma única vez")
+    verificar(xml_das_partes(segundo) == xml_das_partes(Document(caminho)), "nova cópia sem as alterações da anterior")
+    verificar(all(placeholder not in documento.element.xml
+                  for marcado in compilado.paragrafos for placeholder in marcado.placeholders),
+              "renderização substitui todos os placeholders localizados")
+
+def testar_recarga():
+    """Testa a releitura do template alterado no disco e a invalidação manual"""
+    print("\nRecarga do template")
+    diretorio = tempfile.mkdtemp()
+    try:
+        caminho = os.path.join(diretorio, 'template.docx')
+        documento = Document()
+        documento.add_paragraph("Versão [VERSAO] um")
+        documento.save(caminho)
+
+        cache = CacheTemplates()
+        verificar(cache.obter(caminho).paragraphs[0].text == "Versão [VERSAO] um", "primeira versão carregada")
+
+        documento.paragraphs[0].text = "Versão [VERSAO] dois, com outro tamanho"
+        documento.save(caminho)
+        estado = os.stat(caminho)
+        os.utime(caminho, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000_000))
+        copia, compilado = cache.obter_compilado(caminho)
+        verificar(copia.paragraphs[0].text.endswith("outro tamanho") and cache.carregamentos == 2,
+                  "arquivo alterado lido de novo")
+        verificar(compilado.paragrafos[0].texto == "Versão [VERSAO] dois, com outro tamanho",
+                  "placeholders localizados na nova versão")
+
+        cache.invalidar(caminho)
+        cache.obter(caminho)
+        verificar(cache.carregamentos == 3, "invalidar() força nova leitura")
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+def testar_tempo():
+    """Mostra o tempo de obter uma cópia do cache e o de ler o arquivo"""
+    print("\nTempo de obtenção")
+    cache = CacheTemplates()
+    caminho = os.path.join(TEMPLATES_DIR, 'recurso_administrativo.docx')
+    cache.obter(caminho)
+
+    inicio = time.perf_counter()
+    for _ in range(20):
+        cache.obter_compilado(caminho)
+    tempo_cache = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for _ in range(20):
+        Document(caminho)
+    tempo_arquivo = time.perf_counter() - inicio
+    print(f"Cache: {tempo_cache / 20 * 1000:.2f} ms, arquivo: {tempo_arquivo / 20 * 1000:.2f} ms por documento")
+
+if __name__ == "__main__":
+    executar(
+        "Testando o cache de templates",
+        testar_copia_igual_ao_arquivo,
+        testar_copias_independentes,
+        testar_recarga,
+        testar_tempo
+    )
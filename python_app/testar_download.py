@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script para testar o endpoint /api/download/<filename> (ETag, Last-Modified, 304, Range e envio delegado)
+
+Usa o cliente de testes do Flask com um diretório de petições temporário;
+a OpenAI não é chamada e peticoes/ não é alterado.
+
+Uso:
+    python testar_download.py
+"""
+
+import os
+import sys
+import shutil
+import logging
+import tempfile
+
+# Adicionar o diretório atual ao path para importar módulos locais
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+DIRETORIO_TESTE = tempfile.mkdtemp()
+os.environ["CLIENTES_DB_PATH"] = os.path.join(DIRETORIO_TESTE, "clientes.sqlite3")
+
+import app as aplicacao
+from utils.docx_generator import DocxGenerator
+from verificacao import verificar, executar
+
+# Os arquivos inexistentes e inválidos são registrados como aviso; não exibi-los
+logging.getLogger("app").setLevel(logging.ERROR)
+
+TIPO = "Recurso Administrativo"
+DADOS = {"cliente_id": "rally", "fatos_texto": "Fatos do recurso.", "pedidos_texto": "Pedidos do recurso."}
+ANTIGO = "peticao_antiga.docx"
+
+# Petição gravada e cliente de testes, criados por preparar()
+documento = None
+cliente = None
+
+def preparar():
+    """Troca o gerador da aplicação por um com diretório temporário e grava uma petição nova e uma antiga"""
+    global documento, cliente
+    peticoes_dir = os.path.join(DIRETORIO_TESTE, "peticoes")
+    os.makedirs(peticoes_dir)
+    gerador = DocxGenerator(os.path.join(BASE_DIR, 'templates_docx'), peticoes_dir, os.path.join(BASE_DIR, 'clientes'))
+    aplicacao.docx_generator = gerador
+    aplicacao.indice_peticoes = gerador.indice
+    aplicacao.PETICOES_DIR = peticoes_dir
+    # O aquecimento cria o gerador de IA e o monitor de conectividade; não são usados no download
+    aplicacao._aplicacao_aquecida = True
+
+    documento = gerador.renderizar_documento(TIPO, DADOS)
+    gerador.gravar_documento(documento)
+    with open(os.path.join(peticoes_dir, ANTIGO), 'wb') as f:
+        f.write(documento["conteudo"])
+    cliente = aplicacao.app.test_client()
+
+def testar_download():
+    """Testa a resposta completa e os cabeçalhos de cache"""
+    print("\nDownload")
+    url = f"/api/download/{documento['nome']}"
+    resposta = cliente.get(url)
+    verificar(resposta.status_code == 200 and resposta.data == documento["conteudo"], "documento completo")
+    verificar(resposta.headers["ETag"] == f'"{documento["hash"]}"', "ETag forte com o hash do conteúdo")
+    verificar("Last-Modified" in resposta.headers and resposta.headers.get("Accept-Ranges") == "bytes",
+              "Last-Modified e Accept-Ranges presentes")
+    verificar(resposta.cache_control.private and not resposta.cache_control.public
+              and resposta.cache_control.max_age == aplicacao.DOWNLOAD_MAX_AGE,
+              "Cache-Control privado com max-age")
+    verificar(documento["nome"] in resposta.headers["Content-Disposition"], "nome de download no Content-Disposition")
+
+    antigo = cliente.get(f"/api/download/{ANTIGO}")
+    verificar(antigo.status_code == 200 and antigo.data == documento["conteudo"], "petição antiga servida do diretório")
+    verificar(antigo.headers["ETag"] != resposta.headers["ETag"], "petição antiga com a ETag de data e tamanho")
+
+    verificar(cliente.get("/api/download/x.txt").status_code == 400, "arquivo que não é DOCX recusado")
+    verificar(cliente.get("/api/download/inexistente.docx").status_code == 404, "arquivo inexistente retorna 404")
+
+def testar_condicionais():
+    """Testa as requisições condicionais If-None-Match e If-Modified-Since"""
+    print("\nRequisições condicionais")
+    url = f"/api/download/{documento['nome']}"
+    resposta = cliente.get(url)
+    etag, modificado = resposta.headers["ETag"], resposta.headers["Last-Modified"]
+
+    nao_modificado = cliente.get(url, headers={"If-None-Match": etag})
+    verificar(nao_modificado.status_code == 304 and not nao_modificado.data, "If-None-Match igual: 304 sem corpo")
+    verificar(nao_modificado.headers.get("ETag") == etag, "304 com a ETag")
+    verificar(cliente.get(url, headers={"If-None-Match": '"outro"'}).status_code == 200, "If-None-Match diferente: 200")
+    verificar(cliente.get(url, headers={"If-Modified-Since": modificado}).status_code == 304, "If-Modified-Since: 304")
+
+    antigo = cliente.get(f"/api/download/{ANTIGO}")
+    verificar(cliente.get(f"/api/download/{ANTIGO}", headers={"If-None-Match": antigo.headers["ETag"]}).status_code == 304,
+              "petição antiga também revalidada pela ETag")
+
+def testar_range():
+    """Testa os downloads parciais (206) e o intervalo inválido (416)"""
+    print("\nRange")
+    url = f"/api/download/{documento['nome']}"
+    tamanho = len(documento["conteudo"])
+
+    parcial = cliente.get(url, headers={"Range": "bytes=0-99"})
+    verificar(parcial.status_code == 206 and parcial.data == documento["conteudo"][:100], "206 com os 100 primeiros bytes")
+    verificar(parcial.headers.get("Content-Range") == f"bytes 0-99/{tamanho}", "Content-Range do intervalo")
+
+    final = cliente.get(url, headers={"Range": "bytes=-50"})
+    verificar(final.status_code == 206 and final.data == documento["conteudo"][-50:], "206 com os últimos 50 bytes")
+
+    invalido = cliente.get(url, headers={"Range": f"bytes={tamanho + 10}-"})
+    verificar(invalido.status_code == 416, "intervalo além do fim: 416")
+    verificar(invalido.headers.get("Content-Range") == f"bytes */{tamanho}", "416 com o tamanho do arquivo")
+
+    verificar(cliente.get(url, headers={"Range": "bytes=0-99", "If-Range": '"outro"'}).status_code == 200,
+              "If-Range com outra ETag: documento completo")
+
+def testar_envio_delegado():
+    """Testa o envio delegado ao servidor web (X-Accel-Redirect e X-Sendfile)"""
+    print("\nEnvio delegado")
+    url = f"/api/download/{documento['nome']}"
+    caminho = aplicacao.docx_generator.caminho_peticao(documento["nome"])
+    relativo = os.path.relpath(caminho, aplicacao.PETICOES_DIR).replace(os.sep, '/')
+    offload = aplicacao.DOWNLOAD_OFFLOAD
+    try:
+        aplicacao.DOWNLOAD_OFFLOAD = "x-accel"
+        resposta = cliente.get(url)
+        verificar(resposta.status_code == 200 and not resposta.data, "resposta sem corpo")
+        verificar(resposta.headers.get("X-Accel-Redirect") == aplicacao.DOWNLOAD_ACCEL_PREFIXO.rstrip('/') + '/' + relativo,
+                  "X-Accel-Redirect aponta para o objeto armazenado")
+        verificar(resposta.headers["ETag"] == f'"{documento["hash"]}"' and "Last-Modified" in resposta.headers,
+                  "ETag e Last-Modified mantidos")
+        nao_modificado = cliente.get(url, headers={"If-None-Match": resposta.headers["ETag"]})
+        verificar(nao_modificado.status_code == 304 and "X-Accel-Redirect" not in nao_modificado.headers,
+                  "304 respondido pela aplicação, sem delegar")
+
+        aplicacao.DOWNLOAD_OFFLOAD = "x-sendfile"
+        resposta = cliente.get(url)
+        verificar(resposta.headers.get("X-Sendfile") == caminho and not resposta.data, "X-Sendfile com o caminho do arquivo")
+    finally:
+        aplicacao.DOWNLOAD_OFFLOAD = offload
+
+if __name__ == "__main__":
+    try:
+        preparar()
+        executar(
+            "Testando o download de petições",
+            testar_download,
+            testar_condicionais,
+            testar_range,
+            testar_envio_delegado
+        )
+    finally:
+        shutil.rmtree(DIRETORIO_TESTE, ignore_errors=True)
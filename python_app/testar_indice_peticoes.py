@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script para testar o índice de petições e a paginação por cursor (utils/indice_peticoes.py)
+
+Usa índices e diretórios temporários; o índice da aplicação
+(peticoes/.indice.sqlite3) não é alterado.
+
+Uso:
+    python testar_indice_peticoes.py
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+# Adicionar o diretório atual ao path para importar módulos locais
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.indice_peticoes import IndicePeticoes, calcular_hash
+from utils.armazenamento_peticoes import ArmazenamentoPeticoes
+from verificacao import verificar, executar
+
+def criar_indice(quantidade, criado_em_base=1000.0):
+    """Cria um índice em memória com petições numeradas (duas a duas com a mesma data)"""
+    indice = IndicePeticoes(":memory:")
+    for i in range(quantidade):
+        indice.registrar(
+            f"peticao_{i:03d}.docx", 1000 + i % 7, f"hash{i}",
+            tipo="Recurso Administrativo" if i % 2 else "Impugnação ao Edital",
+            cliente_id="rally" if i % 3 == 0 else "access",
+            cliente_nome="Auto Locadora Rally" if i % 3 == 0 else "Access",
+            criado_em=criado_em_base + i // 2
+        )
+    return indice
+
+def percorrer(indice, limite, **filtros):
+    """Percorre todas as páginas e retorna os nomes na ordem recebida"""
+    nomes = []
+    itens, cursor = indice.listar(limite=limite, **filtros)
+    nomes.extend(item["nome"] for item in itens)
+    while cursor:
+        itens, cursor = indice.listar(limite=limite, cursor=cursor, **filtros)
+        nomes.extend(item["nome"] for item in itens)
+    return nomes
+
+def testar_paginacao():
+    """Testa a paginação completa, a ordem e o desempate pelo nome"""
+    print("\nPaginação por cursor")
+    indice = criar_indice(25)
+    nomes = percorrer(indice, 7)
+    esperados = sorted((f"peticao_{i:03d}.docx" for i in range(25)), reverse=True)
+    verificar(nomes == esperados, "todas as petições listadas uma vez, da mais recente para a mais antiga")
+
+    itens, cursor = indice.listar(limite=25)
+    verificar(len(itens) == 25 and cursor is None, "última página sem cursor")
+
+    crescente = percorrer(indice, 4, ordenar="tamanho", decrescente=False)
+    tamanhos = [indice.obter(nome)["tamanho"] for nome in crescente]
+    verificar(len(crescente) == 25 and tamanhos == sorted(tamanhos), "ordenação crescente por tamanho")
+    verificar(percorrer(indice, 6, ordenar="nome", decrescente=False) == sorted(esperados), "ordenação por nome")
+
+def testar_filtros():
+    """Testa os filtros por cliente, tipo e período"""
+    print("\nFiltros")
+    indice = criar_indice(25)
+    rally = percorrer(indice, 3, cliente="rally")
+    verificar(rally == percorrer(indice, 3, cliente="Auto Locadora Rally") and len(rally) == 9,
+              "cliente filtrado pelo ID ou pelo nome")
+    verificar(len(percorrer(indice, 5, tipo="recurso administrativo")) == 12, "tipo sem diferenciar maiúsculas")
+    periodo = percorrer(indice, 5, desde=1002.0, ate=1004.0)
+    verificar(len(periodo) == 6, "período inclusivo nas duas pontas")
+
+def testar_insercoes_concorrentes():
+    """Testa a estabilidade das páginas com petições gravadas durante a navegação"""
+    print("\nInserções concorrentes")
+    indice = criar_indice(30)
+    originais = sorted((f"peticao_{i:03d}.docx" for i in range(30)), reverse=True)
+
+    # Novas petições (mais recentes) entre uma página e outra
+    nomes = []
+    itens, cursor = indice.listar(limite=8)
+    nomes.extend(item["nome"] for item in itens)
+    sequencia = 0
+    while cursor:
+        for _ in range(3):
+            indice.registrar(f"nova_{sequencia:03d}.docx", 500, "h", criado_em=5000.0 + sequencia)
+            sequencia += 1
+        itens, cursor = indice.listar(limite=8, cursor=cursor)
+        nomes.extend(item["nome"] for item in itens)
+    verificar(nomes == originais, "novas petições não deslocam nem repetem itens das páginas seguintes")
+
+    # Gravações em outra thread durante a navegação
+    indice = criar_indice(200)
+    originais = sorted((f"peticao_{i:03d}.docx" for i in range(200)), reverse=True)
+    parar = threading.Event()
+
+    def gravar():
+        i = 0
+        while not parar.is_set() and i < 5000:
+            indice.registrar(f"concorrente_{i:04d}.docx", 1, "h", criado_em=9000.0 + i)
+            i += 1
+
+    escritor = threading.Thread(target=gravar)
+    escritor.start()
+    try:
+        nomes = [nome for nome in percorrer(indice, 9) if nome.startswith("peticao_")]
+    finally:
+        parar.set()
+        escritor.join()
+    verificar(nomes == originais, "paginação estável com gravações em outra thread")
+
+def testar_cursor():
+    """Testa a codificação do cursor e os erros de entrada"""
+    print("\nCursor")
+    cursor = IndicePeticoes._criar_cursor(1712345678.25, "Petição_Ação_Órgão.docx")
+    verificar("=" not in cursor and cursor.replace("-", "").replace("_", "").isalnum(),
+              "cursor seguro para URL, sem preenchimento")
+    verificar(IndicePeticoes._ler_cursor(cursor) == (1712345678.25, "Petição_Ação_Órgão.docx"),
+              "cursor decodificado com nomes acentuados")
+
+    indice = criar_indice(5)
+    for invalido in ("nao-e-base64!!", "bm9wZQ", IndicePeticoes._criar_cursor(1, "a")[:-3] + "@@@"):
+        try:
+            indice.listar(cursor=invalido)
+            verificar(False, f"cursor inválido recusado: {invalido}")
+        except ValueError:
+            verificar(True, f"cursor inválido recusado: {invalido}")
+    try:
+        indice.listar(ordenar="hash")
+        verificar(False, "ordenação inválida recusada")
+    except ValueError:
+        verificar(True, "ordenação inválida recusada")
+
+def testar_sincronizacao():
+    """Testa a inclusão de arquivos antigos, a remoção de registros órfãos e os objetos por hash"""
+    print("\nSincronização com o diretório")
+    diretorio = tempfile.mkdtemp()
+    try:
+        indice = IndicePeticoes(os.path.join(diretorio, ".indice.sqlite3"))
+        for nome, conteudo in (("antiga_1.docx", b"um"), ("antiga_2.docx", b"dois"), ("~$antiga_1.docx", b"trava")):
+            with open(os.path.join(diretorio, nome), "wb") as f:
+                f.write(conteudo)
+        with open(os.path.join(diretorio, "notas.txt"), "w") as f:
+            f.write("ignorado")
+
+        verificar(indice.sincronizar(diretorio) == (2, 0), "arquivos .docx existentes incluídos (travas do Word ignoradas)")
+        registro = indice.obter("antiga_2.docx")
+        verificar(registro["tamanho"] == 4 and registro["hash"] == calcular_hash(os.path.join(diretorio, "antiga_2.docx")),
+                  "tamanho e hash calculados na inclusão")
+        verificar(indice.sincronizar(diretorio) == (0, 0), "segunda sincronização não altera o índice")
+
+        os.remove(os.path.join(diretorio, "antiga_1.docx"))
+        verificar(indice.sincronizar(diretorio) == (0, 1) and indice.obter("antiga_1.docx") is None,
+                  "registro de arquivo removido é excluído")
+
+        # Documento armazenado pelo hash: o registro não depende de arquivo com o nome
+        armazenamento = ArmazenamentoPeticoes(diretorio)
+        armazenamento.guardar(b"conteudo", "ab" * 32)
+        indice.registrar("nova.docx", 8, "ab" * 32)
+        indice.registrar("perdida.docx", 8, "cd" * 32)
+        verificar(indice.sincronizar(diretorio, armazenamento) == (0, 1), "registro sem arquivo nem objeto removido")
+        verificar(indice.obter("nova.docx") is not None, "registro com objeto armazenado mantido")
+        indice._conexao.close()
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+def testar_migracao():
+    """Testa a abertura de um índice criado antes da coluna id_requisicao"""
+    print("\nMigração do índice")
+    diretorio = tempfile.mkdtemp()
+    try:
+        caminho = os.path.join(diretorio, ".indice.sqlite3")
+        conexao = sqlite3.connect(caminho)
+        conexao.execute(
+            "CREATE TABLE peticoes (nome TEXT PRIMARY KEY, tipo TEXT COLLATE NOCASE, cliente_id TEXT, "
+            "cliente_nome TEXT, criado_em REAL NOT NULL, tamanho INTEGER NOT NULL, hash TEXT)"
+        )
+        conexao.execute("INSERT INTO peticoes VALUES ('antiga.docx', 'Recurso', '1', 'Cliente', 10, 5, 'h')")
+        conexao.commit()
+        conexao.close()
+
+        indice = IndicePeticoes(caminho)
+        antiga = indice.obter("antiga.docx")
+        verificar(antiga is not None and antiga["id_requisicao"] is None, "registros antigos mantidos após a migração")
+        indice.registrar("nova.docx", 1, "h2", id_requisicao="req-1", criado_em=20)
+        verificar(indice.obter("nova.docx")["id_requisicao"] == "req-1", "coluna id_requisicao adicionada")
+        verificar([item["nome"] for item in indice.listar()[0]] == ["nova.docx", "antiga.docx"],
+                  "listagem funciona no índice migrado")
+        indice._conexao.close()
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+if __name__ == "__main__":
+    executar(
+        "Testando o índice de petições",
+        testar_paginacao,
+        testar_filtros,
+        testar_insercoes_concorrentes,
+        testar_cursor,
+        testar_sincronizacao,
+        testar_migracao
+    )
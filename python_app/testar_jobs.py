@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script para testar a fila de jobs de geração assíncrona (utils/jobs.py)
+
+Não depende da OpenAI nem do servidor: as funções executadas são locais.
+
+Uso:
+    python testar_jobs.py
+"""
+
+import gc
+import os
+import sys
+import time
+import weakref
+import logging
+import threading
+
+# Adicionar o diretório atual ao path para importar módulos locais
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.jobs import (
+    GerenciadorJobs, FilaCheiaError,
+    ESTADO_PENDENTE, ESTADO_EXECUTANDO, ESTADO_CONCLUIDO, ESTADO_ERRO
+)
+from utils.logs import id_correlacao
+from verificacao import verificar, executar
+
+# Os erros simulados são registrados com traceback pelo gerenciador; não exibi-los
+logging.getLogger("utils.jobs").setLevel(logging.CRITICAL)
+
+def aguardar_estado(job, estados, timeout=5):
+    """Aguarda até o job chegar a um dos estados informados"""
+    limite = time.monotonic() + timeout
+    while job.estado not in estados and time.monotonic() < limite:
+        time.sleep(0.01)
+    return job.estado
+
+def testar_transicoes_estado():
+    """Testa a sequência pendente -> executando -> concluido e os eventos emitidos"""
+    print("\nTransições de estado")
+    gerenciador = GerenciadorJobs(max_workers=1, max_pendentes=10)
+    liberar = threading.Event()
+
+    def tarefa(valor, job=None):
+        with job.etapa("processamento"):
+            liberar.wait(5)
+        return {"valor": valor}
+
+    try:
+        primeiro = gerenciador.submeter(tarefa, 1, descricao="primeiro")
+        segundo = gerenciador.submeter(tarefa, 2, descricao="segundo")
+
+        verificar(aguardar_estado(primeiro, (ESTADO_EXECUTANDO,)) == ESTADO_EXECUTANDO,
+                  "primeiro job em execução")
+        verificar(segundo.estado == ESTADO_PENDENTE, "segundo job aguarda o único worker")
+        verificar(not primeiro.finalizado, "job em execução não está finalizado")
+        verificar(gerenciador.estatisticas() == {ESTADO_EXECUTANDO: 1, ESTADO_PENDENTE: 1},
+                  "estatísticas contam um job em cada estado")
+
+        time.sleep(0.1)
+        liberar.set()
+        verificar(aguardar_estado(segundo, (ESTADO_CONCLUIDO, ESTADO_ERRO)) == ESTADO_CONCLUIDO,
+                  "segundo job concluído depois do primeiro")
+        verificar(primeiro.estado == ESTADO_CONCLUIDO, "primeiro job concluído")
+        verificar(primeiro.resultado == {"valor": 1}, "resultado do job registrado")
+
+        eventos = [evento["evento"] for evento in primeiro.eventos]
+        verificar(eventos == ["iniciado", "etapa_iniciada", "etapa_concluida", "concluido"],
+                  f"eventos na ordem esperada: {eventos}")
+        verificar([evento["id"] for evento in primeiro.eventos] == list(range(len(eventos))),
+                  "IDs dos eventos sequenciais")
+
+        dados = primeiro.to_dict()
+        verificar(dados["etapas"][0]["nome"] == "processamento" and dados["etapas"][0]["duracao"] is not None,
+                  "duração da etapa registrada")
+        verificar(dados["tempo_execucao"] is not None and dados["tempo_fila"] >= 0,
+                  "tempos de fila e execução calculados")
+        verificar(segundo.to_dict()["tempo_fila"] >= 0.1,
+                  "tempo de fila do segundo job inclui a execução do primeiro")
+        verificar(gerenciador.obter(primeiro.id) is primeiro, "job obtido pelo ID")
+        verificar(gerenciador.obter("inexistente") is None, "ID desconhecido retorna None")
+    finally:
+        liberar.set()
+        gerenciador.encerrar()
+
+def testar_erro():
+    """Testa o estado de erro e o payload de erros com atributo payload"""
+    print("\nJobs com erro")
+    gerenciador = GerenciadorJobs(max_workers=1)
+
+    class ErroComPayload(Exception):
+        payload = {"error": "Conteúdo incompleto", "message": "detalhe"}
+
+    def falhar(job=None):
+        raise RuntimeError("falha simulada")
+
+    def falhar_com_payload(job=None):
+        raise ErroComPayload()
+
+    try:
+        job = gerenciador.submeter(falhar)
+        verificar(aguardar_estado(job, (ESTADO_CONCLUIDO, ESTADO_ERRO)) == ESTADO_ERRO, "job com exceção termina em erro")
+        verificar(job.erro == {"error": "Erro ao executar job", "message": "falha simulada"},
+                  "mensagem da exceção no erro do job")
+        verificar(job.eventos[-1]["evento"] == "erro" and job.finalizado, "último evento é 'erro'")
+
+        job = gerenciador.submeter(falhar_com_payload)
+        aguardar_estado(job, (ESTADO_CONCLUIDO, ESTADO_ERRO))
+        verificar(job.erro == ErroComPayload.payload, "payload da exceção usado como erro do job")
+    finally:
+        gerenciador.encerrar()
+
+def testar_limite_pendentes():
+    """Testa a recusa de jobs acima de max_pendentes e a liberação das vagas"""
+    print("\nLimite de jobs pendentes")
+    gerenciador = GerenciadorJobs(max_workers=1, max_pendentes=2)
+    liberar = threading.Event()
+
+    def tarefa(job=None):
+        liberar.wait(5)
+
+    try:
+        jobs = [gerenciador.submeter(tarefa), gerenciador.submeter(tarefa)]
+        try:
+            gerenciador.submeter(tarefa)
+            verificar(False, "terceiro job recusado com FilaCheiaError")
+        except FilaCheiaError as e:
+            verificar(True, f"terceiro job recusado com FilaCheiaError ({e})")
+        verificar(sum(gerenciador.estatisticas().values()) == 2, "job recusado não é registrado")
+
+        liberar.set()
+        for job in jobs:
+            aguardar_estado(job, (ESTADO_CONCLUIDO, ESTADO_ERRO))
+        try:
+            job = gerenciador.submeter(tarefa)
+            verificar(aguardar_estado(job, (ESTADO_CONCLUIDO,)) == ESTADO_CONCLUIDO,
+                      "jobs finalizados liberam vagas na fila")
+        except FilaCheiaError:
+            verificar(False, "jobs finalizados liberam vagas na fila")
+    finally:
+        liberar.set()
+        gerenciador.encerrar()
+
+def testar_expiracao():
+    """Testa a remoção dos jobs finalizados depois do TTL"""
+    print("\nExpiração de jobs finalizados")
+    gerenciador = GerenciadorJobs(max_workers=1, ttl_segundos=0.2)
+    try:
+        antigo = gerenciador.submeter(lambda job=None: "ok")
+        aguardar_estado(antigo, (ESTADO_CONCLUIDO,))
+        verificar(gerenciador.obter(antigo.id) is antigo, "job finalizado consultável dentro do TTL")
+        time.sleep(0.3)
+        novo = gerenciador.submeter(lambda job=None: "ok")
+        verificar(gerenciador.obter(antigo.id) is None, "job finalizado removido depois do TTL")
+        verificar(gerenciador.obter(novo.id) is novo, "job novo mantido")
+
+        # Sem novas submissões: o job expira na consulta e na limpeza periódica
+        consultado = gerenciador.submeter(lambda job=None: "ok")
+        aguardar_estado(consultado, (ESTADO_CONCLUIDO,))
+        consultado.finalizado_em -= 1
+        verificar(gerenciador.obter(consultado.id) is None, "job expirado não é retornado por obter()")
+
+        class Resultado:
+            pass
+
+        ocioso = gerenciador.submeter(lambda job=None: Resultado())
+        aguardar_estado(ocioso, (ESTADO_CONCLUIDO,))
+        resultado = weakref.ref(ocioso.resultado)
+        del ocioso
+        time.sleep(0.5)
+        gc.collect()
+        verificar(resultado() is None, "limpeza periódica libera os resultados expirados sem novas consultas")
+    finally:
+        gerenciador.encerrar()
+
+def testar_eventos_e_contexto():
+    """Testa a espera por eventos e a herança do ID de correlação"""
+    print("\nEventos e contexto da requisição")
+    gerenciador = GerenciadorJobs(max_workers=1)
+    liberar = threading.Event()
+
+    def tarefa(job=None):
+        liberar.wait(5)
+        return id_correlacao.get()
+
+    token = id_correlacao.set("req-teste")
+    try:
+        job = gerenciador.submeter(tarefa)
+    finally:
+        id_correlacao.reset(token)
+
+    try:
+        aguardar_estado(job, (ESTADO_EXECUTANDO,))
+        inicio = time.monotonic()
+        novos = job.aguardar_eventos(a_partir_de=len(job.eventos), timeout=0.2)
+        verificar(novos == [] and time.monotonic() - inicio >= 0.15, "aguardar_eventos retorna vazio no timeout")
+
+        liberar.set()
+        eventos = job.aguardar_eventos(a_partir_de=1, timeout=5)
+        aguardar_estado(job, (ESTADO_CONCLUIDO,))
+        verificar(eventos and eventos[-1]["evento"] == "concluido", "aguardar_eventos acorda com o evento final")
+        verificar(job.resultado == "req-teste", "job herda o ID de correlação da requisição")
+    finally:
+        liberar.set()
+        gerenciador.encerrar()
+
+if __name__ == "__main__":
+    executar(
+        "Testando a fila de jobs",
+        testar_transicoes_estado,
+        testar_erro,
+        testar_limite_pendentes,
+        testar_expiracao,
+        testar_eventos_e_contexto
+    )
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script para testar a geração em lote (utils/lote_peticoes.py e gerar_lote.py)
+
+Os documentos são gravados em diretórios temporários e o cadastro de
+clientes é um banco temporário; peticoes/ e data/ não são alterados.
+
+Uso:
+    python testar_lote_peticoes.py
+"""
+
+import io
+import os
+import sys
+import json
+import shutil
+import zipfile
+import tempfile
+from docx import Document
+
+# Adicionar o diretório atual ao path para importar módulos locais
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+# Cadastro de clientes temporário, também usado pelos processos do pool
+DIRETORIO_TESTE = tempfile.mkdtemp()
+os.environ["CLIENTES_DB_PATH"] = os.path.join(DIRETORIO_TESTE, "clientes.sqlite3")
+
+import gerar_lote
+import utils.lote_peticoes as lote_peticoes
+from utils.docx_generator import DocxGenerator
+from utils.lote_peticoes import (
+    preparar_linha, validar_lote, renderizar_lote, empacotar_zip, gravar_lote, MANIFESTO_ARQUIVO
+)
+from verificacao import verificar, executar
+
+TIPO = "Impugnação ao Edital"
+COMUM = {"autoridade": "PREGOEIRO X", "fatos": "Fatos comuns a todas as petições."}
+LINHAS = [
+    {"cliente_id": "rally", "pedidos": "Pedido da linha 0"},
+    {"cliente_id": "access", "pedidos": "Pedido da linha 1"},
+    {"cliente_id": "rally", "pedidos": "Pedido da linha 2"},
+    {"cliente_nome": "Empresa Sem Cadastro", "fatos": "Fatos próprios da linha 3."}
+]
+
+def criar_gerador():
+    """Cria um gerador com os templates da aplicação e um diretório de petições temporário"""
+    peticoes_dir = tempfile.mkdtemp(dir=DIRETORIO_TESTE)
+    return DocxGenerator(os.path.join(BASE_DIR, 'templates_docx'), peticoes_dir, os.path.join(BASE_DIR, 'clientes'))
+
+def texto_documento(documento):
+    """Retorna o texto de todos os parágrafos de um documento renderizado"""
+    return "\n".join(p.text for p in Document(io.BytesIO(documento["conteudo"])).paragraphs)
+
+def testar_preparar_linha():
+    """Testa a combinação dos campos comuns com os da linha e os nomes curtos"""
+    print("\nPreparação das linhas")
+    dados = preparar_linha({"fatos": "da linha", "pedidos": "pedido"}, {"fatos": "comum", "autoridade": "X"})
+    verificar(dados == {"fatos_texto": "da linha", "pedidos_texto": "pedido", "autoridade": "X"},
+              "linha prevalece sobre os campos comuns, com nomes curtos convertidos")
+    verificar(preparar_linha({"fundamentos": "f"})["argumentos_texto"] == "f", "fundamentos vira argumentos_texto")
+    verificar(preparar_linha({"argumentos_texto": "longo", "argumentos": "curto"})["argumentos_texto"] == "longo",
+              "nome completo prevalece sobre o curto")
+
+    for linhas, descricao in (([], "lote vazio"), ([{}] * (lote_peticoes.LIMITE_LINHAS_LOTE + 1), "lote acima do limite"),
+                              ([{}, "texto"], "linha que não é objeto")):
+        try:
+            validar_lote(linhas)
+            verificar(False, f"{descricao} recusado")
+        except ValueError:
+            verificar(True, f"{descricao} recusado")
+
+def testar_renderizacao_local():
+    """Testa o lote renderizado no próprio processo"""
+    print("\nLote no próprio processo")
+    gerador = criar_gerador()
+    resultados = renderizar_lote(gerador, TIPO, LINHAS, comum=COMUM)
+    verificar([indice for indice, _, _ in resultados] == [0, 1, 2, 3], "um resultado por linha, na ordem")
+    verificar(all(documento and not erro for _, documento, erro in resultados), "todas as linhas renderizadas")
+
+    nomes = [documento["nome"] for _, documento, _ in resultados]
+    verificar(len(set(nomes)) == len(nomes), f"nomes de arquivo únicos: {nomes}")
+    verificar("Pedido da linha 1" in texto_documento(resultados[1][1]), "campos da linha aplicados")
+    verificar("Fatos comuns a todas as petições." in texto_documento(resultados[0][1])
+              and "Fatos próprios da linha 3." in texto_documento(resultados[3][1]),
+              "campos comuns usados quando a linha não os informa")
+    verificar(resultados[0][1]["cliente_id"] == "rally" and resultados[3][1]["cliente_nome"] == "Empresa Sem Cadastro",
+              "cliente de cada linha registrado no documento")
+    gravados = [nome for _, _, arquivos in os.walk(gerador.peticoes_dir) for nome in arquivos if nome.endswith('.docx')]
+    verificar(not gravados, "renderização não grava arquivos")
+
+    renderizar = gerador.renderizar_documento
+
+    def falhar_na_linha_1(tipo, dados):
+        if dados.get("cliente_id") == "access":
+            raise RuntimeError("falha simulada")
+        return renderizar(tipo, dados)
+
+    gerador.renderizar_documento = falhar_na_linha_1
+    resultados = renderizar_lote(gerador, TIPO, LINHAS[:3], comum=COMUM)
+    verificar(resultados[1][1:] == (None, "falha simulada") and resultados[0][1] and resultados[2][1],
+              "erro registrado apenas na linha com falha, sem exceção")
+
+def testar_pool_processos():
+    """Testa o lote distribuído no pool de processos e sua reutilização"""
+    print("\nLote no pool de processos")
+    gerador = criar_gerador()
+    minimo = lote_peticoes.MIN_LINHAS_PROCESSOS
+    lote_peticoes.MIN_LINHAS_PROCESSOS = 4
+    try:
+        locais = renderizar_lote(gerador, TIPO, LINHAS, comum=COMUM, processos=1)
+        remotos = renderizar_lote(gerador, TIPO, LINHAS, comum=COMUM, processos=2)
+        pool = lote_peticoes._pool
+        verificar(pool is not None, "pool criado para o lote grande")
+        verificar([texto_documento(d) for _, d, _ in remotos] == [texto_documento(d) for _, d, _ in locais],
+                  "documentos do pool iguais aos renderizados no próprio processo")
+        verificar(all(documento["cliente_nome"] for _, documento, _ in remotos), "processos abrem o cadastro de clientes")
+
+        renderizar_lote(gerador, TIPO, LINHAS, comum=COMUM, processos=2)
+        verificar(lote_peticoes._pool is pool, "pool reutilizado no lote seguinte")
+        renderizar_lote(gerador, TIPO, LINHAS[:2], comum=COMUM, processos=2)
+        verificar(lote_peticoes._pool is pool, "lote pequeno renderizado sem recriar o pool")
+    finally:
+        lote_peticoes.MIN_LINHAS_PROCESSOS = minimo
+        lote_peticoes.encerrar_pool()
+    verificar(lote_peticoes._pool is None, "encerrar_pool() encerra os processos")
+
+def testar_saidas():
+    """Testa o ZIP com o manifesto e a gravação em peticoes/"""
+    print("\nZIP e gravação")
+    gerador = criar_gerador()
+    resultados = renderizar_lote(gerador, TIPO, LINHAS + [{"cliente_id": "rally"}], comum=COMUM)
+    resultados[-1] = (4, None, "erro simulado")
+
+    with zipfile.ZipFile(io.BytesIO(empacotar_zip(resultados))) as arquivo_zip:
+        nomes = arquivo_zip.namelist()
+        manifesto = json.loads(arquivo_zip.read(MANIFESTO_ARQUIVO))
+        armazenados = all(info.compress_type == zipfile.ZIP_STORED for info in arquivo_zip.infolist())
+        conteudo = arquivo_zip.read(resultados[0][1]["nome"])
+    verificar(len(nomes) == 5 and nomes[-1] == MANIFESTO_ARQUIVO, "ZIP com os documentos e o manifesto")
+    verificar(armazenados and conteudo == resultados[0][1]["conteudo"], "documentos armazenados sem recompressão")
+    verificar(manifesto[4] == {"linha": 4, "erro": "erro simulado"} and manifesto[0]["hash"] == resultados[0][1]["hash"],
+              "manifesto com o hash de cada documento e o erro das linhas com falha")
+
+    gravados = gravar_lote(gerador, resultados)
+    verificar([item.get("arquivo") for item in gravados[:4]] == [d["nome"] for _, d, _ in resultados[:4]],
+              "manifesto da gravação na ordem das linhas")
+    indice = gerador.indice.listar(limite=10)[0]
+    verificar(sorted(item["nome"] for item in indice) == sorted(d["nome"] for _, d, _ in resultados[:4]),
+              "documentos gravados registrados no índice de petições")
+
+def testar_cli():
+    """Testa a leitura dos arquivos de dados e o script gerar_lote.py"""
+    print("\nScript gerar_lote.py")
+    caminho_csv = os.path.join(DIRETORIO_TESTE, "lote.csv")
+    with open(caminho_csv, 'w', encoding='utf-8') as f:
+        f.write("cliente_id,pedidos,autoridade\nrally,Pedido A,\naccess,Pedido B,Pregoeiro Y\n")
+    tipo, comum, linhas = gerar_lote.ler_dados(caminho_csv)
+    verificar(tipo is None and linhas == [{"cliente_id": "rally", "pedidos": "Pedido A"},
+                                          {"cliente_id": "access", "pedidos": "Pedido B", "autoridade": "Pregoeiro Y"}],
+              "CSV lido sem as colunas vazias")
+
+    caminho_json = os.path.join(DIRETORIO_TESTE, "lote.json")
+    with open(caminho_json, 'w', encoding='utf-8') as f:
+        json.dump({"tipo": TIPO, "comum": COMUM, "linhas": LINHAS}, f)
+    verificar(gerar_lote.ler_dados(caminho_json) == (TIPO, COMUM, LINHAS), "JSON com tipo, comum e linhas")
+
+    saida = os.path.join(DIRETORIO_TESTE, "lote.zip")
+    argv = sys.argv
+    sys.argv = ["gerar_lote.py", "--dados", caminho_json, "--saida", saida, "--processos", "1"]
+    try:
+        codigo = gerar_lote.main()
+    finally:
+        sys.argv = argv
+    with zipfile.ZipFile(saida) as arquivo_zip:
+        verificar(codigo == 0 and len(arquivo_zip.namelist()) == len(LINHAS) + 1, "ZIP gerado pelo script")
+
+if __name__ == "__main__":
+    try:
+        executar(
+            "Testando a geração em lote",
+            testar_preparar_linha,
+            testar_renderizacao_local,
+            testar_pool_processos,
+            testar_saidas,
+            testar_cli
+        )
+    finally:
+        shutil.rmtree(DIRETORIO_TESTE, ignore_errors=True)
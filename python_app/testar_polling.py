@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script para testar a estratégia de polling dos runs do assistente (utils/polling.py)
+e o cancelamento dos runs que passam do prazo (utils/ai_generator.py)
+
+As consultas são simuladas; a OpenAI não é chamada.
+
+Uso:
+    python testar_polling.py
+"""
+
+import os
+import sys
+import time
+import logging
+from itertools import islice
+from types import SimpleNamespace
+
+# Adicionar o diretório atual ao path para importar módulos locais
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.polling import EstrategiaPolling
+from utils.ai_generator import AIGenerator
+from utils.cache_geracao import CacheGeracao
+from verificacao import verificar, executar
+
+# Os avisos esperados do gerador (prazo esgotado, fallback) não são exibidos
+logging.getLogger("utils.ai_generator").setLevel(logging.CRITICAL)
+
+def consultas_simuladas(*status):
+    """Retorna uma função que devolve um run com cada status da sequência (o último se repete)"""
+    sequencia = list(status)
+
+    def consultar():
+        consultar.chamadas += 1
+        return SimpleNamespace(status=sequencia.pop(0) if len(sequencia) > 1 else sequencia[0])
+
+    consultar.chamadas = 0
+    return consultar
+
+def testar_intervalos():
+    """Testa o backoff exponencial, o limite máximo e o jitter"""
+    print("\nIntervalos")
+    sem_jitter = EstrategiaPolling(intervalo_inicial=0.25, intervalo_maximo=3.0, fator=2.0, jitter=0)
+    intervalos = list(islice(sem_jitter.intervalos(), 6))
+    verificar(intervalos == [0.25, 0.5, 1.0, 2.0, 3.0, 3.0], f"backoff exponencial limitado ao máximo: {intervalos}")
+
+    com_jitter = EstrategiaPolling(intervalo_inicial=1.0, intervalo_maximo=1.0, fator=1.0, jitter=0.2)
+    amostras = list(islice(com_jitter.intervalos(), 200))
+    verificar(all(0.8 <= intervalo <= 1.2 for intervalo in amostras), "jitter dentro de +/- 20%")
+    verificar(len(set(amostras)) > 1, "jitter varia os intervalos")
+
+def testar_status_final():
+    """Testa a parada no status final e a contabilidade das consultas"""
+    print("\nStatus final")
+    estrategia = EstrategiaPolling(intervalo_inicial=0.01, intervalo_maximo=0.02, jitter=0)
+    consultar = consultas_simuladas("queued", "in_progress", "in_progress", "completed")
+    mudancas = []
+    resultado = estrategia.aguardar(consultar, ao_mudar_status=lambda run: mudancas.append(run.status))
+
+    verificar(resultado.status == "completed" and not resultado.prazo_esgotado, "termina no status completed")
+    verificar(resultado.consultas == 4 and consultar.chamadas == 4, "uma consulta por status da sequência")
+    verificar(mudancas == ["queued", "in_progress", "completed"], "callback chamado apenas quando o status muda")
+    verificar(resultado.consultas_por_status == {"queued": 1, "in_progress": 2, "completed": 1},
+              "consultas contadas por status")
+    verificar(set(resultado.tempo_por_status) == {"queued", "in_progress", "completed"}, "tempo medido por status")
+    verificar(resultado.valor.status == "completed", "último run consultado em valor")
+    verificar(0 < resultado.tempo_espera <= resultado.tempo_total, "tempo de espera contido no tempo total")
+
+    for status in ("failed", "cancelled", "expired", "requires_action"):
+        resultado = estrategia.aguardar(consultas_simuladas(status))
+        verificar(resultado.status == status and resultado.consultas == 1, f"'{status}' é um status final")
+
+    resultado = estrategia.aguardar(lambda: {"estado": "completed"}, obter_status=lambda objeto: objeto["estado"])
+    verificar(resultado.status == "completed" and resultado.valor == {"estado": "completed"},
+              "obter_status personalizado")
+
+def testar_prazo():
+    """Testa o prazo total, o prazo já esgotado e o limite de consultas"""
+    print("\nPrazo e limite de consultas")
+    estrategia = EstrategiaPolling(intervalo_inicial=0.05, intervalo_maximo=0.05, jitter=0, prazo_total=0.3)
+    inicio = time.monotonic()
+    resultado = estrategia.aguardar(consultas_simuladas("in_progress"))
+    duracao = time.monotonic() - inicio
+    verificar(resultado.prazo_esgotado and resultado.status == "in_progress", "prazo esgotado sem status final")
+    verificar(0.3 <= duracao < 0.5, f"espera limitada ao prazo total ({duracao:.2f}s)")
+
+    consultar = consultas_simuladas("in_progress")
+    resultado = estrategia.aguardar(consultar, prazo=time.monotonic() - 1)
+    verificar(resultado.prazo_esgotado and consultar.chamadas == 1, "prazo já esgotado: uma única consulta, sem espera")
+
+    prazo = time.monotonic() + 0.15
+    resultado = estrategia.aguardar(consultas_simuladas("in_progress"), prazo=prazo)
+    verificar(resultado.prazo_esgotado and time.monotonic() - prazo < 0.1, "prazo informado prevalece sobre o total")
+
+    resultado = estrategia.aguardar(consultas_simuladas("in_progress"), max_consultas=3)
+    verificar(resultado.prazo_esgotado and resultado.consultas == 3, "max_consultas encerra a espera")
+
+    resultado = estrategia.aguardar(consultas_simuladas("in_progress", "completed"), max_consultas=3)
+    verificar(resultado.status == "completed" and not resultado.prazo_esgotado, "status final antes do limite")
+
+    dados = resultado.to_dict()
+    verificar(set(dados) == {"status", "consultas", "tempo_total", "tempo_espera", "prazo_esgotado",
+                             "consultas_por_status", "tempo_por_status"}, "to_dict com todos os campos")
+
+def testar_ambiente():
+    """Testa a configuração pelas variáveis OPENAI_POLL_*"""
+    print("\nVariáveis de ambiente")
+    anteriores = {nome: os.environ.get(nome) for nome in ("OPENAI_POLL_INTERVALO_INICIAL", "OPENAI_POLL_PRAZO_TOTAL")}
+    os.environ["OPENAI_POLL_INTERVALO_INICIAL"] = "0.5"
+    os.environ["OPENAI_POLL_PRAZO_TOTAL"] = "10"
+    try:
+        estrategia = EstrategiaPolling.do_ambiente()
+        verificar((estrategia.intervalo_inicial, estrategia.prazo_total) == (0.5, 10.0), "valores lidos do ambiente")
+        verificar(9.9 < estrategia.prazo() - time.monotonic() <= 10.0, "prazo() contado a partir de agora")
+    finally:
+        for nome, valor in anteriores.items():
+            if valor is None:
+                os.environ.pop(nome, None)
+            else:
+                os.environ[nome] = valor
+
+def criar_gerador_com_run_lento():
+    """Cria um AIGenerator com um cliente simulado cujos runs nunca terminam"""
+    cancelados = []
+    runs = SimpleNamespace(
+        create=lambda **kwargs: SimpleNamespace(id="run_1", status="queued"),
+        retrieve=lambda thread_id, run_id: SimpleNamespace(id=run_id, status="in_progress"),
+        cancel=lambda thread_id, run_id: cancelados.append((thread_id, run_id))
+    )
+    cliente = SimpleNamespace(beta=SimpleNamespace(
+        threads=SimpleNamespace(messages=SimpleNamespace(create=lambda **kwargs: None), runs=runs),
+        assistants=SimpleNamespace(retrieve=lambda assistant_id: SimpleNamespace(name="a", model="m", instructions="", tools=[]))
+    ))
+
+    gerador = AIGenerator(api_key="sk-teste", assistant_id="asst_teste")
+    gerador._client = cliente
+    gerador._threads = SimpleNamespace(obter=lambda: "thread_1", liberar=lambda thread_id: None)
+    gerador._cache = CacheGeracao(":memory:", ttl_segundos=0, max_entradas=10)
+    gerador.polling = EstrategiaPolling(intervalo_inicial=0.01, intervalo_maximo=0.01, jitter=0, prazo_total=0.1)
+    return gerador, cancelados
+
+def testar_cancelamento_no_prazo():
+    """Testa o cancelamento do run que ainda está ativo quando o prazo se esgota"""
+    print("\nCancelamento de runs fora do prazo")
+    gerador, cancelados = criar_gerador_com_run_lento()
+    try:
+        gerador.generate_content("prompt")
+        verificar(False, "generate_content lança exceção no prazo esgotado")
+    except Exception:
+        verificar(cancelados == [("thread_1", "run_1")], "generate_content cancela o run antes de lançar a exceção")
+
+    gerador, cancelados = criar_gerador_com_run_lento()
+    gerador.gerar_peticao_com_chat = lambda *args, **kwargs: {"origem": "chat"}
+    resultado = gerador.gerar_peticao_com_assistente("recurso administrativo", "motivo", "fatos")
+    verificar(resultado == {"origem": "chat"}, "gerar_peticao_com_assistente recorre ao chat")
+    verificar(cancelados == [("thread_1", "run_1")], "run do assistente cancelado antes do fallback")
+
+if __name__ == "__main__":
+    executar(
+        "Testando a estratégia de polling",
+        testar_intervalos,
+        testar_status_final,
+        testar_prazo,
+        testar_ambiente,
+        testar_cancelamento_no_prazo
+    )
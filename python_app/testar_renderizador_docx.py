@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script para testar a substituição de placeholders nos runs (utils/renderizador_docx.py)
+
+Os documentos são montados em memória; nenhum template é alterado.
+
+Uso:
+    python testar_renderizador_docx.py
+"""
+
+import io
+import os
+import sys
+from docx import Document
+from docx.oxml.ns import qn
+
+# Adicionar o diretório atual ao path para importar módulos locais
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.renderizador_docx import TemplateCompilado, substituir_em_runs, definir_texto
+from verificacao import verificar, executar
+
+def criar_paragrafo(*partes):
+    """Cria um parágrafo com um run por parte; cada parte é texto ou (texto, negrito, itálico)"""
+    paragrafo = Document().add_paragraph()
+    for parte in partes:
+        texto, negrito, italico = parte if isinstance(parte, tuple) else (parte, None, None)
+        run = paragrafo.add_run(texto)
+        run.bold = negrito
+        run.italic = italico
+    return paragrafo
+
+def testar_run_unico():
+    """Testa placeholders contidos em um único run"""
+    print("\nPlaceholder em um único run")
+    paragrafo = criar_paragrafo("Ao Sr. [AUTORIDADE], ", ("##CLIENTE##", True, None))
+    alterado = substituir_em_runs(paragrafo, {"[AUTORIDADE]": "Pregoeiro", "##CLIENTE##": "ACME LTDA"})
+    verificar(alterado and paragrafo.text == "Ao Sr. Pregoeiro, ACME LTDA", "placeholders substituídos")
+    verificar([run.text for run in paragrafo.runs] == ["Ao Sr. Pregoeiro, ", "ACME LTDA"], "runs mantidos")
+    verificar(paragrafo.runs[1].bold is True, "negrito do run preservado")
+
+def testar_runs_divididos():
+    """Testa placeholders divididos entre vários runs com formatações diferentes"""
+    print("\nPlaceholder dividido entre runs")
+    paragrafo = criar_paragrafo(("Cliente: [NO", True, None), ("ME_CLI", None, True), ("ENTE] - fim", None, None))
+    verificar(paragrafo.text == "Cliente: [NOME_CLIENTE] - fim", "placeholder dividido em três runs")
+    alterado = substituir_em_runs(paragrafo, {"[NOME_CLIENTE]": "ACME LTDA"})
+    verificar(alterado and paragrafo.text == "Cliente: ACME LTDA - fim", "texto do parágrafo substituído")
+    verificar([run.text for run in paragrafo.runs] == ["Cliente: ACME LTDA", "", " - fim"],
+              "valor escrito no run onde o placeholder começa; o restante retirado dos seguintes")
+    verificar(len(paragrafo.runs) == 3, "nenhum run removido ou criado")
+    verificar((paragrafo.runs[0].bold, paragrafo.runs[1].italic) == (True, True), "formatação dos runs preservada")
+
+    paragrafo = criar_paragrafo("[CIDADE], ", "[D", "IA] de [ME", "S] de [ANO", "].")
+    substituir_em_runs(paragrafo, {"[CIDADE]": "Campo Grande", "[DIA]": "5", "[MES]": "março", "[ANO]": "2025"})
+    verificar(paragrafo.text == "Campo Grande, 5 de março de 2025.", "várias ocorrências divididas no mesmo parágrafo")
+    verificar([run.text for run in paragrafo.runs] == ["Campo Grande, ", "5", " de março", " de 2025", "."],
+              "texto fora dos placeholders mantido no run original")
+
+    paragrafo = criar_paragrafo("[A", "][B]", "[C]")
+    substituir_em_runs(paragrafo, {"[A]": "1", "[B]": "2", "[C]": "3"})
+    verificar(paragrafo.text == "123", "placeholders adjacentes")
+
+def testar_valores_especiais():
+    """Testa placeholders desconhecidos, valores vazios, quebras de linha e espaços"""
+    print("\nValores especiais")
+    paragrafo = criar_paragrafo("[CONHECIDO] e [DESCONHECIDO]")
+    substituir_em_runs(paragrafo, {"[CONHECIDO]": "ok"})
+    verificar(paragrafo.text == "ok e [DESCONHECIDO]", "placeholder sem valor mantido")
+
+    paragrafo = criar_paragrafo("Nada a substituir")
+    verificar(substituir_em_runs(paragrafo, {"[X]": "y"}) is False, "parágrafo sem ocorrências não é alterado")
+
+    paragrafo = criar_paragrafo("Antes [VAZIO] depois")
+    substituir_em_runs(paragrafo, {"[VAZIO]": None})
+    verificar(paragrafo.text == "Antes  depois", "valor None vira texto vazio")
+
+    paragrafo = criar_paragrafo(("[ENDERECO]", True, None))
+    substituir_em_runs(paragrafo, {"[ENDERECO]": "Rua A, 1\nCentro\tMS"})
+    run = paragrafo.runs[0]._r
+    verificar([filho.tag for filho in run if filho.tag != qn("w:rPr")] ==
+              [qn("w:t"), qn("w:br"), qn("w:t"), qn("w:tab"), qn("w:t")],
+              "quebra de linha e tabulação viram w:br e w:tab no mesmo run")
+    verificar(paragrafo.text == "Rua A, 1\nCentro\tMS" and paragrafo.runs[0].bold, "texto e formatação do run com quebras")
+
+    paragrafo = criar_paragrafo("[NOME]")
+    substituir_em_runs(paragrafo, {"[NOME]": "  recuo"})
+    no = paragrafo.runs[0]._r.find(qn("w:t"))
+    verificar(no.get(qn("xml:space")) == "preserve", "espaços nas pontas preservados com xml:space")
+
+def testar_template_compilado():
+    """Testa a localização dos placeholders (inclusive em tabelas) e a renderização de uma cópia"""
+    print("\nTemplate compilado")
+    documento = Document()
+    documento.add_paragraph("Sem placeholders")
+    paragrafo = documento.add_paragraph()
+    paragrafo.add_run("Cliente: [CLI")
+    paragrafo.add_run("ENTE]")
+    tabela = documento.add_table(rows=1, cols=1)
+    tabela.cell(0, 0).paragraphs[0].add_run("Processo ##PROCESSO##")
+
+    compilado = TemplateCompilado(documento)
+    verificar([marcado.placeholders for marcado in compilado.paragrafos] == [["[CLIENTE]"], ["##PROCESSO##"]],
+              "placeholders divididos e em tabelas localizados")
+    verificar(compilado.contem_texto("Sem place") and not compilado.contem_texto("inexistente"),
+              "busca de trechos no texto do template")
+
+    # Cópia do template, como a usada em cada petição
+    buffer = io.BytesIO()
+    documento.save(buffer)
+    copia = Document(io.BytesIO(buffer.getvalue()))
+    visitados = []
+
+    def substituir(paragrafo, marcado):
+        visitados.append(marcado.texto)
+        substituir_em_runs(paragrafo, {"[CLIENTE]": "ACME", "##PROCESSO##": "123/2024"})
+
+    compilado.renderizar(copia, substituir)
+    verificar(visitados == ["Cliente: [CLIENTE]", "Processo ##PROCESSO##"], "apenas os parágrafos marcados visitados")
+    verificar(copia.paragraphs[1].text == "Cliente: ACME", "parágrafo do corpo renderizado na cópia")
+    verificar(copia.tables[0].cell(0, 0).paragraphs[0].text == "Processo 123/2024", "célula de tabela renderizada")
+    verificar(documento.paragraphs[1].text == "Cliente: [CLIENTE]", "template original não alterado")
+
+def testar_definir_texto():
+    """Testa a troca do texto inteiro mantendo a formatação do primeiro run"""
+    print("\nDefinir texto do parágrafo")
+    paragrafo = criar_paragrafo(("Título", True, True), " antigo", " texto")
+    definir_texto(paragrafo, "Novo título")
+    verificar(paragrafo.text == "Novo título" and len(paragrafo.runs) == 1, "texto substituído em um único run")
+    verificar(paragrafo.runs[0].bold and paragrafo.runs[0].italic, "formatação do primeiro run mantida")
+
+    paragrafo = Document().add_paragraph()
+    definir_texto(paragrafo, "Sem runs")
+    verificar(paragrafo.text == "Sem runs", "parágrafo sem runs recebe um run novo")
+
+if __name__ == "__main__":
+    executar(
+        "Testando a substituição de placeholders",
+        testar_run_unico,
+        testar_runs_divididos,
+        testar_valores_especiais,
+        testar_template_compilado,
+        testar_definir_texto
+    )
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script para testar o ciclo de vida dos threads do Assistente (utils/threads_openai.py)
+
+Usa um cliente simulado e registros temporários; a OpenAI não é chamada e o
+registro da aplicação (data/threads_openai.sqlite3) não é alterado.
+
+Uso:
+    python testar_threads_openai.py
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+import threading
+from types import SimpleNamespace
+
+# Adicionar o diretório atual ao path para importar módulos locais
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.threads_openai import (
+    GerenciadorThreads, ESTADO_LIVRE, ESTADO_EM_USO, ESTADO_DESCARTADO, ESTADO_FALHA_EXCLUSAO
+)
+from verificacao import verificar, executar
+
+# As falhas de exclusão simuladas são registradas como erro; não exibi-las
+logging.getLogger("utils.threads_openai").setLevel(logging.CRITICAL)
+
+class ErroAPI(Exception):
+    """Erro da API simulada, com o status HTTP como o do cliente OpenAI"""
+
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+class ClienteSimulado:
+    """Cliente com beta.threads.create/delete que registra as chamadas"""
+
+    def __init__(self):
+        self.criados = []
+        self.excluidos = []
+        self.erros_exclusao = []
+        self.liberar_exclusao = threading.Event()
+        self.liberar_exclusao.set()
+        self._lock = threading.Lock()
+        self.beta = SimpleNamespace(threads=SimpleNamespace(create=self._criar, delete=self._excluir))
+
+    def _criar(self):
+        with self._lock:
+            thread_id = f"thread_{len(self.criados) + 1}"
+            self.criados.append(thread_id)
+        return SimpleNamespace(id=thread_id)
+
+    def _excluir(self, thread_id):
+        self.liberar_exclusao.wait(5)
+        with self._lock:
+            self.excluidos.append(thread_id)
+            if self.erros_exclusao:
+                raise self.erros_exclusao.pop(0)
+
+def criar_gerenciador(cliente, **opcoes):
+    """Cria um gerenciador com registro em memória e sem varredura automática"""
+    opcoes = dict({"tamanho_pool": 0, "ttl_segundos": 3600, "intervalo_varredura": 3600, "caminho": ":memory:"}, **opcoes)
+    return GerenciadorThreads(lambda: cliente, **opcoes)
+
+def aguardar(condicao, timeout=5):
+    """Aguarda a condição ficar verdadeira"""
+    limite = time.monotonic() + timeout
+    while not condicao() and time.monotonic() < limite:
+        time.sleep(0.01)
+    return condicao()
+
+def estado(gerenciador, thread_id):
+    """Retorna o estado do thread no registro, ou None se ele não está registrado"""
+    with gerenciador._lock:
+        linha = gerenciador._conexao.execute(
+            "SELECT estado FROM threads_openai WHERE thread_id = ?", (thread_id,)
+        ).fetchone()
+    return linha[0] if linha else None
+
+def testar_pool_antecipado():
+    """Testa a criação antecipada e o reaproveitamento dos threads vazios"""
+    print("\nThreads criados antecipadamente")
+    cliente = ClienteSimulado()
+    gerenciador = criar_gerenciador(cliente, tamanho_pool=2)
+    try:
+        gerenciador.iniciar()
+        verificar(aguardar(lambda: gerenciador.estatisticas()["livres"] == 2), "pool completado em segundo plano")
+        antecipados = list(cliente.criados)
+
+        thread_id = gerenciador.obter()
+        verificar(thread_id in antecipados and gerenciador.reaproveitados == 1, "obter() entrega um thread já criado")
+        verificar(estado(gerenciador, thread_id) == ESTADO_EM_USO, "thread entregue marcado como em uso")
+        verificar(aguardar(lambda: gerenciador.estatisticas()["livres"] == 2) and len(cliente.criados) == 3,
+                  "pool reposto depois da entrega")
+
+        gerenciador.liberar(thread_id)
+        verificar(aguardar(lambda: thread_id in cliente.excluidos), "thread liberado excluído em segundo plano")
+        verificar(aguardar(lambda: estado(gerenciador, thread_id) is None), "thread excluído removido do registro")
+        verificar(thread_id not in gerenciador._livres, "thread usado nunca volta ao pool")
+    finally:
+        gerenciador.encerrar()
+    verificar(set(cliente.excluidos) == set(cliente.criados), "encerrar() exclui os threads livres")
+
+def testar_sem_pool():
+    """Testa a criação na hora quando o pool está vazio ou desativado"""
+    print("\nSem threads antecipados")
+    cliente = ClienteSimulado()
+    gerenciador = criar_gerenciador(cliente)
+    try:
+        thread_id = gerenciador.obter()
+        verificar(thread_id == "thread_1" and gerenciador.reaproveitados == 0, "thread criado na hora")
+        verificar(estado(gerenciador, thread_id) == ESTADO_EM_USO, "thread registrado como em uso")
+    finally:
+        gerenciador.encerrar()
+
+def testar_ttl():
+    """Testa a exclusão dos threads não liberados dentro do TTL"""
+    print("\nExpiração pelo TTL")
+    cliente = ClienteSimulado()
+    gerenciador = criar_gerenciador(cliente, ttl_segundos=0.2)
+    try:
+        esquecido = gerenciador.obter()
+        verificar(gerenciador.varrer() == 0, "thread em uso dentro do TTL não é órfão")
+        time.sleep(0.3)
+        recente = gerenciador.obter()
+        verificar(gerenciador.varrer() == 1, "apenas o thread vencido agendado")
+        verificar(aguardar(lambda: esquecido in cliente.excluidos) and recente not in cliente.excluidos,
+                  "thread não liberado excluído após o TTL")
+    finally:
+        gerenciador.encerrar()
+
+def testar_varredura_com_exclusao_pendente():
+    """Testa que a varredura não agenda de novo as exclusões ainda na fila"""
+    print("\nVarredura com exclusões pendentes")
+    cliente = ClienteSimulado()
+    gerenciador = criar_gerenciador(cliente, ttl_segundos=60)
+    try:
+        thread_id = gerenciador.obter()
+        cliente.liberar_exclusao.clear()
+        gerenciador.liberar(thread_id)
+        verificar(estado(gerenciador, thread_id) == ESTADO_DESCARTADO, "thread liberado marcado como descartado")
+        verificar(gerenciador.varrer() == 0 and gerenciador.varrer() == 0, "exclusão em andamento não é agendada de novo")
+        cliente.liberar_exclusao.set()
+        verificar(aguardar(lambda: estado(gerenciador, thread_id) is None), "exclusão concluída")
+        verificar(cliente.excluidos == [thread_id] and gerenciador.excluidos == 1, "uma única chamada de exclusão")
+    finally:
+        cliente.liberar_exclusao.set()
+        gerenciador.encerrar()
+
+def testar_falha_exclusao():
+    """Testa a nova tentativa das exclusões que falharam e o 404 como thread já excluído"""
+    print("\nFalhas na exclusão")
+    cliente = ClienteSimulado()
+    gerenciador = criar_gerenciador(cliente)
+    try:
+        cliente.erros_exclusao.append(ErroAPI(500))
+        thread_id = gerenciador.obter()
+        gerenciador.liberar(thread_id)
+        verificar(aguardar(lambda: estado(gerenciador, thread_id) == ESTADO_FALHA_EXCLUSAO),
+                  "falha na exclusão registrada")
+        verificar(gerenciador.falhas_exclusao == 1, "falha contada nas estatísticas")
+        verificar(gerenciador.varrer() == 1, "exclusão com falha agendada pela varredura")
+        verificar(aguardar(lambda: estado(gerenciador, thread_id) is None), "thread excluído na nova tentativa")
+
+        cliente.erros_exclusao.append(ErroAPI(404))
+        thread_id = gerenciador.obter()
+        gerenciador.liberar(thread_id)
+        verificar(aguardar(lambda: estado(gerenciador, thread_id) is None) and gerenciador.falhas_exclusao == 1,
+                  "thread inexistente (404) tratado como excluído")
+    finally:
+        gerenciador.encerrar()
+
+def testar_varredura_periodica():
+    """Testa a varredura executada pela thread de manutenção e o registro compartilhado"""
+    print("\nVarredura periódica e registro compartilhado")
+    diretorio = tempfile.mkdtemp()
+    cliente = ClienteSimulado()
+    caminho = os.path.join(diretorio, "threads.sqlite3")
+    primeiro = criar_gerenciador(cliente, tamanho_pool=1, caminho=caminho)
+    segundo = criar_gerenciador(cliente, ttl_segundos=0.2, intervalo_varredura=0.1, caminho=caminho)
+    try:
+        primeiro.iniciar()
+        verificar(aguardar(lambda: primeiro.estatisticas()["livres"] == 1), "thread livre criado pelo primeiro processo")
+        livre = primeiro._livres[0]
+        verificar(estado(primeiro, livre) == ESTADO_LIVRE, "thread registrado como livre")
+
+        # O segundo processo encontra o thread vencido no registro e o exclui
+        segundo.iniciar()
+        verificar(aguardar(lambda: livre in cliente.excluidos), "varredura periódica exclui o thread vencido")
+        verificar(primeiro.obter() != livre, "thread descartado por outro processo não é entregue")
+    finally:
+        primeiro.encerrar()
+        segundo.encerrar()
+        primeiro._conexao.close()
+        segundo._conexao.close()
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+if __name__ == "__main__":
+    executar(
+        "Testando o ciclo de vida dos threads",
+        testar_pool_antecipado,
+        testar_sem_pool,
+        testar_ttl,
+        testar_varredura_com_exclusao_pendente,
+        testar_falha_exclusao,
+        testar_varredura_periodica
+    )
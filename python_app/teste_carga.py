@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Gerador de carga concorrente para a API de petições
+
+Reproduz uma mistura de operações (gerar, validar, listar, download e
+clientes) contra a aplicação em execução, com taxa (RPS) e concorrência
+configuráveis, e informa latência p50/p95/p99, taxa de erros e vazão de
+cada endpoint.
+
+Com ``--rps`` a carga é de laço aberto: as requisições são agendadas em
+intervalos fixos e a latência é medida a partir do instante agendado,
+incluindo o tempo de espera por um worker livre. Sem ``--rps``, cada
+worker envia a próxima requisição assim que recebe a resposta anterior.
+
+Uso:
+    python teste_carga.py --duracao 60 --concorrencia 20 --rps 10
+    python teste_carga.py --mistura validar:5,listar:2,clientes:1 --requisicoes 500 --saida carga.json
+
+Para medir sem acesso à OpenAI, execute a aplicação apontando para
+servidor_openai_simulado.py (ver README).
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+# Desativar configurações de proxy que podem estar causando problemas
+os.environ.pop('HTTP_PROXY', None)
+os.environ.pop('HTTPS_PROXY', None)
+os.environ.pop('http_proxy', None)
+os.environ.pop('https_proxy', None)
+
+MISTURA_PADRAO = "gerar:1,validar:4,listar:3,download:2,clientes:2"
+
+PETICOES_EXEMPLO = [
+    {
+        "tipo": "Recurso Administrativo",
+        "motivo": "Desclassificação indevida em licitação",
+        "fatos": "A empresa participou do Pregão Eletrônico nº 45/2023 e foi inabilitada por suposta ausência de atestado de capacidade técnica, embora o documento tenha sido apresentado.",
+        "processo": "45/2023",
+        "autoridade": "Pregoeiro Municipal"
+    },
+    {
+        "tipo": "Impugnação ao Edital",
+        "motivo": "Exigência restritiva no edital",
+        "fatos": "O edital da Concorrência nº 12/2024 exige capital social mínimo superior ao permitido pela legislação, restringindo a competitividade do certame.",
+        "orgao": "Secretaria de Infraestrutura"
+    },
+]
+
+VALIDACAO_EXEMPLO = {
+    "tipo": "recurso_administrativo",
+    "fatos": "A recorrente participou do Pregão Eletrônico nº 45/2023 e foi inabilitada sem motivação adequada. " * 4,
+    "argumentos": "Nos termos do art. 5º da Lei nº 14.133/2021 e do art. 37 da Constituição Federal, a Administração deve observar a legalidade e a vinculação ao edital. " * 4,
+    "pedidos": "a) o provimento do recurso; b) a reforma da decisão; c) a habilitação da recorrente."
+}
+
+
+def percentil(valores_ordenados, p):
+    """Percentil pelo método do posto mais próximo"""
+    if not valores_ordenados:
+        return None
+    indice = max(0, min(len(valores_ordenados) - 1, math.ceil(p / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[indice]
+
+
+def interpretar_mistura(texto):
+    """Converte 'operacao:peso,...' em uma lista de (operacao, peso)"""
+    mistura = []
+    for item in texto.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        operacao, _, peso = item.partition(":")
+        if operacao not in OPERACOES:
+            raise ValueError(f"Operação desconhecida: {operacao} (disponíveis: {', '.join(OPERACOES)})")
+        mistura.append((operacao, float(peso or 1)))
+    if not mistura:
+        raise ValueError("A mistura de operações está vazia")
+    return mistura
+
+
+class TesteCarga:
+    """Executa a carga e acumula as medições por endpoint"""
+
+    def __init__(self, url, mistura, concorrencia=10, rps=0, timeout=120, semente=None):
+        """
+        Inicializa o teste
+
+        Args:
+            url: URL base da aplicação
+            mistura: Lista de (operacao, peso)
+            concorrencia: Número de requisições simultâneas
+            rps: Taxa de requisições por segundo (0 para laço fechado)
+            timeout: Timeout de cada requisição, em segundos
+            semente: Semente do sorteio das operações (opcional)
+        """
+        self.url = url.rstrip("/")
+        self.mistura = mistura
+        self.concorrencia = concorrencia
+        self.rps = rps
+        self.timeout = timeout
+        self.medicoes = []
+        self.arquivos = []
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _sessao(self):
+        """Sessão HTTP da thread atual, para reutilizar conexões"""
+        sessao = getattr(self._local, "sessao", None)
+        if sessao is None:
+            sessao = requests.Session()
+            self._local.sessao = sessao
+        return sessao
+
+    def _sortear_operacao(self):
+        """Sorteia a próxima operação conforme os pesos da mistura"""
+        with self._lock:
+            operacoes, pesos = zip(*self.mistura)
+            return self._aleatorio.choices(operacoes, weights=pesos)[0]
+
+    def atualizar_arquivos(self):
+        """Obtém a lista de petições disponíveis para a operação de download"""
+        try:
+            resposta = self._sessao().get(f"{self.url}/api/peticoes", timeout=self.timeout)
+            self._registrar_arquivos(resposta)
+        except requests.RequestException as e:
+            print(f"Erro ao listar petições: {e}")
+
+    def _registrar_arquivos(self, resposta):
+        """Atualiza a lista de arquivos a partir da resposta de /api/peticoes"""
+        if resposta.status_code == 200:
+            nomes = [peticao["nome"] for peticao in resposta.json().get("peticoes", [])]
+            if nomes:
+                with self._lock:
+                    self.arquivos = nomes
+
+    def executar_operacao(self, operacao, agendado_em=None):
+        """Executa uma operação e registra a medição"""
+        sessao = self._sessao()
+        inicio = time.perf_counter()
+        endpoint, status, erro = OPERACOES[operacao](self, sessao)
+        fim = time.perf_counter()
+
+        medicao = {
+            "operacao": operacao,
+            "endpoint": endpoint,
+            "status": status,
+            "erro": erro,
+            "inicio": inicio,
+            "fim": fim,
+            "servico": fim - inicio,
+            "latencia": fim - (agendado_em if agendado_em is not None else inicio)
+        }
+        with self._lock:
+            self.medicoes.append(medicao)
+
+    def _requisitar(self, sessao, metodo, caminho, **kwargs):
+        """Envia a requisição e retorna (resposta, status, erro)"""
+        try:
+            resposta = sessao.request(metodo, f"{self.url}{caminho}", timeout=self.timeout, **kwargs)
+            # O corpo é lido por completo para medir o tempo total de resposta
+            resposta.content
+            erro = None if resposta.status_code < 400 else f"HTTP {resposta.status_code}"
+            return resposta, resposta.status_code, erro
+        except requests.RequestException as e:
+            return None, None, type(e).__name__
+
+    def _gerar(self, sessao):
+        """Gera uma petição a partir de um dos exemplos"""
+        with self._lock:
+            dados = self._aleatorio.choice(PETICOES_EXEMPLO)
+        _, status, erro = self._requisitar(sessao, "POST", "/api/gerar-peticao", json=dados)
+        return "POST /api/gerar-peticao", status, erro
+
+    def _validar(self, sessao):
+        """Valida uma petição de exemplo"""
+        _, status, erro = self._requisitar(sessao, "POST", "/api/validar-peticao", json=VALIDACAO_EXEMPLO)
+        return "POST /api/validar-peticao", status, erro
+
+    def _listar(self, sessao):
+        """Lista as petições e atualiza os arquivos disponíveis para download"""
+        resposta, status, erro = self._requisitar(sessao, "GET", "/api/peticoes")
+        if resposta is not None and not erro:
+            self._registrar_arquivos(resposta)
+        return "GET /api/peticoes", status, erro
+
+    def _download(self, sessao):
+        """Baixa uma das petições listadas"""
+        with self._lock:
+            arquivo = self._aleatorio.choice(self.arquivos) if self.arquivos else None
+        if arquivo is None:
+            return "GET /api/download/<arquivo>", None, "sem_arquivos"
+        _, status, erro = self._requisitar(sessao, "GET", f"/api/download/{arquivo}")
+        return "GET /api/download/<arquivo>", status, erro
+
+    def _clientes(self, sessao):
+        """Lista os clientes"""
+        _, status, erro = self._requisitar(sessao, "GET", "/api/clientes")
+        return "GET /api/clientes", status, erro
+
+    def executar(self, duracao=None, requisicoes=None):
+        """
+        Executa a carga até atingir a duração ou o número de requisições
+
+        Returns:
+            Tempo decorrido, em segundos
+        """
+        self.atualizar_arquivos()
+        inicio = time.perf_counter()
+        limite = inicio + duracao if duracao else None
+        contador = {"enviadas": 0}
+
+        def continuar():
+            with self._lock:
+                if requisicoes is not None and contador["enviadas"] >= requisicoes:
+                    return False
+                if limite is not None and time.perf_counter() >= limite:
+                    return False
+                contador["enviadas"] += 1
+                return True
+
+        if self.rps:
+            # Laço aberto: agendamento em intervalos fixos, independentemente das respostas
+            with ThreadPoolExecutor(max_workers=self.concorrencia) as executor:
+                indice = 0
+                while continuar():
+                    agendado_em = inicio + indice / self.rps
+                    espera = agendado_em - time.perf_counter()
+                    if espera > 0:
+                        time.sleep(espera)
+                    executor.submit(self.executar_operacao, self._sortear_operacao(), agendado_em)
+                    indice += 1
+        else:
+            # Laço fechado: cada worker envia a próxima requisição ao receber a resposta
+            def worker():
+                while continuar():
+                    self.executar_operacao(self._sortear_operacao())
+
+            workers = [threading.Thread(target=worker, daemon=True) for _ in range(self.concorrencia)]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+
+        return time.perf_counter() - inicio
+
+    def relatorio(self, tempo_total):
+        """Agrupa as medições por endpoint e calcula percentis, erros e vazão"""
+        grupos = {}
+        for medicao in self.medicoes:
+            grupos.setdefault(medicao["endpoint"], []).append(medicao)
+        grupos["TOTAL"] = list(self.medicoes)
+
+        endpoints = {}
+        for endpoint, medicoes in grupos.items():
+            latencias = sorted(m["latencia"] for m in medicoes)
+            erros = [m for m in medicoes if m["erro"]]
+            status = {}
+            for m in medicoes:
+                chave = str(m["status"]) if m["status"] is not None else m["erro"]
+                status[chave] = status.get(chave, 0) + 1
+            endpoints[endpoint] = {
+                "requisicoes": len(medicoes),
+                "erros": len(erros),
+                "taxa_erro": round(len(erros) / len(medicoes), 4) if medicoes else 0.0,
+                "vazao_rps": round(len(medicoes) / tempo_total, 3) if tempo_total else None,
+                "p50": percentil(latencias, 50),
+                "p95": percentil(latencias, 95),
+                "p99": percentil(latencias, 99),
+                "max": latencias[-1] if latencias else None,
+                "media": sum(latencias) / len(latencias) if latencias else None,
+                "status": status
+            }
+        return endpoints
+
+
+def imprimir_relatorio(endpoints, tempo_total):
+    """Imprime o relatório em formato de tabela"""
+    def ms(valor):
+        return f"{valor * 1000:>9.1f}" if valor is not None else f"{'-':>9}"
+
+    print("=" * 110)
+    print(f"Duração: {tempo_total:.1f}s")
+    print(f"{'Endpoint':<32} {'Req':>6} {'Erros':>6} {'%Erro':>6} {'RPS':>7} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    print("-" * 110)
+    for endpoint, dados in sorted(endpoints.items(), key=lambda item: item[0] == "TOTAL"):
+        print(f"{endpoint:<32} {dados['requisicoes']:>6} {dados['erros']:>6} {dados['taxa_erro'] * 100:>5.1f}% "
+              f"{dados['vazao_rps']:>7.2f} {ms(dados['p50'])} {ms(dados['p95'])} {ms(dados['p99'])} {ms(dados['max'])}")
+    print("=" * 110)
+
+
+# Operações disponíveis na mistura
+OPERACOES = {
+    "gerar": TesteCarga._gerar,
+    "validar": TesteCarga._validar,
+    "listar": TesteCarga._listar,
+    "download": TesteCarga._download,
+    "clientes": TesteCarga._clientes,
+}
+
+
+def main():
+    porta = os.getenv("PORT", 5000)
+    parser = argparse.ArgumentParser(description='Gerador de carga concorrente para a API de petições')
+    parser.add_argument('--url', default=f"http://localhost:{porta}", help='URL base da aplicação')
+    parser.add_argument('--mistura', default=MISTURA_PADRAO,
+                        help=f'Operações e pesos, ex.: {MISTURA_PADRAO}')
+    parser.add_argument('--concorrencia', type=int, default=10, help='Requisições simultâneas (padrão: 10)')
+    parser.add_argument('--rps', type=float, default=0,
+                        help='Requisições por segundo; 0 envia continuamente em laço fechado (padrão: 0)')
+    parser.add_argument('--duracao', type=float, default=30, help='Duração do teste, em segundos (padrão: 30)')
+    parser.add_argument('--requisicoes', type=int, help='Número total de requisições (substitui --duracao)')
+    parser.add_argument('--timeout', type=float, default=120, help='Timeout de cada requisição (padrão: 120)')
+    parser.add_argument('--semente', type=int, help='Semente do sorteio das operações')
+    parser.add_argument('--saida', help='Arquivo JSON onde o relatório será gravado')
+    args = parser.parse_args()
+
+    try:
+        mistura = interpretar_mistura(args.mistura)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"Testando {args.url} com a mistura {args.mistura}")
+    print(f"Concorrência: {args.concorrencia}, RPS: {args.rps or 'laço fechado'}")
+
+    teste = TesteCarga(args.url, mistura, args.concorrencia, args.rps, args.timeout, args.semente)
+    tempo_total = teste.executar(
+        duracao=None if args.requisicoes else args.duracao,
+        requisicoes=args.requisicoes
+    )
+    endpoints = teste.relatorio(tempo_total)
+    imprimir_relatorio(endpoints, tempo_total)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({
+                "metadados": {
+                    "data": datetime.now().isoformat(),
+                    "url": args.url,
+                    "mistura": args.mistura,
+                    "concorrencia": args.concorrencia,
+                    "rps": args.rps,
+                    "duracao": tempo_total
+                },
+                "endpoints": endpoints
+            }, f, ensure_ascii=False, indent=2)
+        print(f"Relatório gravado em {args.saida}")
+
+    return 0 if endpoints.get("TOTAL", {}).get("erros", 0) == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
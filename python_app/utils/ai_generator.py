@@ -9,9 +9,20 @@ import os
 import re
 import json
 import time
+import logging
+import threading
+import contextvars
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from openai import OpenAI
+from .openai_client import obter_cliente_openai
+from .polling import EstrategiaPolling
+from .cache_geracao import CacheGeracao
+from .threads_openai import GerenciadorThreads
+from .metricas import OPENAI_CHAMADA_SEGUNDOS, OPENAI_CONSULTAS_RUN
+from .logs import resumir
+
+logger = logging.getLogger(__name__)
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -19,22 +30,41 @@ load_dotenv()
 class AIGenerator:
     """Classe para geração de conteúdo jurídico com IA"""
     
+    # Pool compartilhado para chamadas auxiliares executadas em paralelo (ex.: jurisprudências)
+    _executor = None
+    _executor_lock = threading.Lock()
+    
+    # Cabeçalho e descrição de cada seção, usados na regeneração individual
+    SECOES = {
+        "fatos": ("FATOS:", "uma versão COMPLETA, DETALHADA e juridicamente adequada dos fatos apresentados, expandindo-os significativamente"),
+        "argumentos": ("ARGUMENTOS:", "argumentos jurídicos sólidos e DETALHADOS baseados nos fatos, com citações de leis e jurisprudências relevantes"),
+        "pedido": ("PEDIDO:", "pedidos claros, objetivos e abrangentes")
+    }
+    
+    # Cabeçalhos usados para identificar a seção corrente durante o streaming
+    CABECALHOS_STREAM = {
+        "fatos": "FATOS:",
+        "argumentos": "ARGUMENTOS:",
+        "pedido": "PEDIDO:"
+    }
+    
     def __init__(self, api_key, assistant_id):
         """Inicializa o gerador de conteúdo com IA"""
-        print("="*80)
-        print("Inicializando AIGenerator...")
+        logger.info("Inicializando AIGenerator...")
         
         # Garantir que as variáveis de ambiente sejam carregadas
         self.api_key = api_key
         self.assistant_id = assistant_id
         self.model = "gpt-4"
-        self.cache = {}  # Inicializar o cache como um dicionário vazio
+        # 'paralelo' busca jurisprudências junto com a geração principal; 'sequencial' depois dela
+        self.modo_jurisprudencia = os.getenv("AI_JURISPRUDENCIA_MODO", "paralelo")
+        self.polling = EstrategiaPolling.do_ambiente()
+        
+        # Cliente, threads e cache são criados no primeiro uso
+        self._client = None
+        self._threads = None
+        self._cache = None
 
-        print("Inicializando AIGenerator...")
-        print(f"API Key configurada: {'Sim' if api_key else 'Não'}")
-        print(f"ID do Assistente: {assistant_id}")
-        print(f"Modelo: {self.model}")
-        
         # Verificar se o ID do assistente está configurado
         if not self.assistant_id:
             raise ValueError("ID do assistente não fornecido")
@@ -43,92 +73,262 @@ class AIGenerator:
         if not self.api_key:
             raise ValueError("API key da OpenAI não configurada")
             
-        print(f"API Key configurada: {'Sim' if self.api_key else 'Não'}")
-        print(f"ID do Assistente: {self.assistant_id}")
-        print(f"Modelo: {self.model}")
-        
-        try:
-            self.client = self._create_client()
-            # Verificar se o assistente existe
-            self.thread = self.client.beta.threads.create()
-        except Exception as e:
-            print(f"Erro ao inicializar cliente OpenAI ou criar thread: {e}")
-            raise
+        logger.debug("API Key configurada: %s", 'Sim' if self.api_key else 'Não')
+        logger.debug("ID do Assistente: %s", self.assistant_id)
+        logger.debug("Modelo: %s", self.model)
         
-        print("AIGenerator inicializado com sucesso!")
+        logger.info("AIGenerator inicializado com sucesso!")
+    
+    @property
+    def client(self):
+        """Cliente OpenAI, obtido no primeiro acesso"""
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+    
+    @property
+    def threads(self):
+        """Gerenciador do ciclo de vida dos threads, criado no primeiro acesso"""
+        if self._threads is None:
+            self._threads = GerenciadorThreads.do_ambiente(lambda: self.client)
+        return self._threads
+    
+    @property
+    def cache(self):
+        """Cache persistente de gerações, aberto no primeiro acesso"""
+        if self._cache is None:
+            self._cache = CacheGeracao.do_ambiente()
+        return self._cache
     
     def _create_client(self):
-        """Cria um cliente OpenAI"""
+        """Obtém o cliente OpenAI compartilhado pelo processo"""
         try:
-            os.environ.pop('HTTP_PROXY', None)
-            os.environ.pop('HTTPS_PROXY', None)
-            os.environ.pop('http_proxy', None)
-            os.environ.pop('https_proxy', None)
-
-            return OpenAI(
+            return obter_cliente_openai(
                 api_key=self.api_key,
                 default_headers={"OpenAI-Beta": "assistants=v2"}
             )
         except Exception as e:
-            print(f"Erro ao criar cliente OpenAI: {e}")
+            logger.error("Erro ao criar cliente OpenAI: %s", e)
             raise
     
-    def generate_content(self, prompt, max_retries=3):
-        """Gera conteúdo usando o assistente"""
+    def generate_content(self, prompt, max_retries=None, prazo=None):
+        """
+        Gera conteúdo usando o assistente
+        
+        Cada chamada usa um thread próprio, devolvido ao final para exclusão
+        em segundo plano.
+        
+        Args:
+            prompt: Mensagem enviada ao assistente
+            max_retries: Número máximo de consultas ao status do run (opcional)
+            prazo: Instante monotônico limite para aguardar o run (opcional)
+        """
+        thread_id = None
         try:
+            thread_id = self.threads.obter()
+            
             # Adicionar a mensagem ao thread
             message = self.client.beta.threads.messages.create(
-                thread_id=self.thread.id,
+                thread_id=thread_id,
                 role="user",
                 content=prompt
             )
 
             # Executar o assistente
             run = self.client.beta.threads.runs.create(
-                thread_id=self.thread.id,
+                thread_id=thread_id,
                 assistant_id=self.assistant_id
             )
 
             # Aguardar a conclusão
-            for _ in range(max_retries):
-                run = self.client.beta.threads.runs.retrieve(
-                    thread_id=self.thread.id,
-                    run_id=run.id
+            polling = self._aguardar_run(thread_id, run.id, prazo=prazo, max_consultas=max_retries)
+            
+            if polling.status == "completed":
+                # Recuperar a resposta
+                messages = self.client.beta.threads.messages.list(
+                    thread_id=thread_id
                 )
                 
-                if run.status == "completed":
-                    # Recuperar a resposta
-                    messages = self.client.beta.threads.messages.list(
-                        thread_id=self.thread.id
-                    )
-                    
-                    # Pegar a última mensagem (a resposta do assistente)
-                    last_message = messages.data[0]
-                    return last_message.content[0].text.value
-                
-                elif run.status in ["failed", "expired", "cancelled"]:
-                    raise Exception(f"Run failed with status: {run.status}")
-                
-                time.sleep(1)  # Esperar 1 segundo antes de verificar novamente
-
-            raise Exception("Timeout waiting for assistant response")
+                # Pegar a última mensagem (a resposta do assistente)
+                last_message = messages.data[0]
+                return last_message.content[0].text.value
+            
+            if polling.prazo_esgotado:
+                # O run continua ativo no servidor; cancelá-lo para não consumir mais tokens
+                self._cancelar_run(thread_id, run.id)
+                raise Exception("Timeout waiting for assistant response")
+            
+            raise Exception(f"Run failed with status: {polling.status}")
             
         except Exception as e:
-            print(f"Erro ao gerar conteúdo: {e}")
+            logger.error("Erro ao gerar conteúdo: %s", e)
             raise
+        finally:
+            if thread_id:
+                self.threads.liberar(thread_id)
 
+    @classmethod
+    def _obter_executor(cls):
+        """Obtém o pool de threads compartilhado para chamadas auxiliares"""
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=int(os.getenv("AI_MAX_CHAMADAS_PARALELAS", 8)),
+                        thread_name_prefix="ai-auxiliar"
+                    )
+        return cls._executor
+    
+    def _buscar_jurisprudencias(self, tipo, fatos, argumentos=None, motivo=None):
+        """Solicita jurisprudências ao modelo de chat e retorna o texto da resposta"""
+        prompt_jurisprudencia = self._gerar_prompt_jurisprudencia(tipo, fatos, argumentos, motivo)
+        
+        with OPENAI_CHAMADA_SEGUNDOS.medir(tipo="jurisprudencia"):
+            response_jurisprudencia = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "Você é um assistente jurídico especializado em jurisprudência."},
+                    {"role": "user", "content": prompt_jurisprudencia}
+                ],
+                temperature=0.5,
+                max_tokens=2000
+            )
+        
+        return response_jurisprudencia.choices[0].message.content
+    
+    def _descartar_jurisprudencias(self, futuro):
+        """Cancela uma busca paralela de jurisprudências não utilizada, ou registra o seu desfecho"""
+        if futuro.cancel():
+            logger.debug("Busca paralela de jurisprudências cancelada antes de iniciar")
+            return
+        
+        def registrar(futuro):
+            erro = futuro.exception()
+            if erro is not None:
+                logger.warning("Busca paralela de jurisprudências descartada terminou com erro: %s", erro)
+            else:
+                logger.debug("Busca paralela de jurisprudências descartada (%s caracteres)", len(futuro.result() or ""))
+        
+        # Já em execução: o resultado é descartado, mas um erro não deve passar despercebido
+        contexto = contextvars.copy_context()
+        futuro.add_done_callback(lambda futuro: contexto.run(registrar, futuro))
+    
+    def _notificar(self, callback, evento, **dados):
+        """Envia um evento de progresso ao callback, sem interromper a geração em caso de falha"""
+        if not callback:
+            return
+        try:
+            callback(evento, dados)
+        except Exception as e:
+            logger.error("Erro ao notificar evento '%s': %s", evento, e)
+    
+    def _completar_chat(self, messages, temperature, max_tokens, callback=None):
+        """
+        Executa uma completion de chat e retorna o texto da resposta
+        
+        Quando um callback é fornecido, a resposta é solicitada em stream e
+        cada trecho recebido é notificado como evento ``token``, junto com a
+        seção (fatos, argumentos ou pedido) em que ele se encontra.
+        """
+        with OPENAI_CHAMADA_SEGUNDOS.medir(tipo="chat_stream" if callback else "chat"):
+            if not callback:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+                return response.choices[0].message.content
+        
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+        
+            partes = []
+            secao_atual = None
+            cauda = ""
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                trecho = chunk.choices[0].delta.content
+                if not trecho:
+                    continue
+                partes.append(trecho)
+            
+                # Procurar cabeçalhos de seção apenas no final do texto acumulado
+                cauda = (cauda + trecho)[-(len(trecho) + 16):]
+                cauda_upper = cauda.upper()
+                posicoes = {
+                    secao: cauda_upper.rfind(cabecalho)
+                    for secao, cabecalho in self.CABECALHOS_STREAM.items()
+                }
+                secao, posicao = max(posicoes.items(), key=lambda item: item[1])
+                if posicao >= 0:
+                    secao_atual = secao
+            
+                self._notificar(callback, "token", secao=secao_atual, texto=trecho)
+        
+            return "".join(partes)
+    
+    def _aguardar_run(self, thread_id, run_id, callback=None, prazo=None, max_consultas=None):
+        """
+        Aguarda um run do assistente usando a estratégia de polling adaptativo
+        
+        Returns:
+            ResultadoPolling com o run final em ``valor``
+        """
+        def ao_mudar_status(run):
+            logger.debug("Status atual: %s", run.status)
+            self._notificar(callback, "run_status", run_id=run_id, status=run.status)
+        
+        resultado = self.polling.aguardar(
+            lambda: self.client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id),
+            ao_mudar_status=ao_mudar_status,
+            prazo=prazo,
+            max_consultas=max_consultas
+        )
+        
+        OPENAI_CHAMADA_SEGUNDOS.observar(resultado.tempo_total, tipo="run")
+        OPENAI_CONSULTAS_RUN.observar(resultado.consultas)
+        logger.info("Run %s finalizado com status '%s' após %s consultas em %.2fs", run_id, resultado.status, resultado.consultas, resultado.tempo_total)
+        self._notificar(callback, "polling_concluido", run_id=run_id, **resultado.to_dict())
+        return resultado
+    
+    def _cancelar_run(self, thread_id, run_id):
+        """Cancela um run que não será mais aguardado, para que ele não continue consumindo tokens"""
+        try:
+            self.client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+        except Exception as e:
+            logger.warning("Não foi possível cancelar o run %s: %s", run_id, e)
+    
+    def liberar_thread(self, thread_id):
+        """Devolve um thread obtido em uma geração, para exclusão em segundo plano"""
+        if thread_id and self._threads is not None:
+            self._threads.liberar(thread_id)
+    
+    def estatisticas_threads(self):
+        """Retorna os contadores do gerenciador de threads, ou None se ele ainda não foi usado"""
+        if self._threads is None:
+            return None
+        return self._threads.estatisticas()
+    
     def close(self):
         """Limpa recursos"""
         try:
-            if hasattr(self, 'thread'):
-                # Deletar o thread ao finalizar
-                self.client.beta.threads.delete(self.thread.id)
+            if self._threads is not None:
+                # Excluir os threads livres e aguardar as exclusões pendentes
+                self._threads.encerrar()
         except Exception as e:
-            print(f"Erro ao limpar recursos: {e}")
+            logger.error("Erro ao limpar recursos: %s", e)
             
     def _extrair_secoes(self, texto):
         """Extrai seções de fatos, argumentos e pedidos do texto"""
-        print(f"Extraindo seções do texto: {texto[:100]}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Extraindo seções do texto: %s", resumir(texto, 100), extra={"amostrar": True})
         
         # Padrões mais flexíveis para encontrar as seções
         fatos_patterns = [
@@ -175,16 +375,16 @@ class AIGenerator:
         
         # Verificar se conseguimos extrair as seções
         if not fatos and not argumentos and not pedido:
-            print("AVISO: Não foi possível extrair nenhuma seção usando os padrões regulares.")
+            logger.warning("Não foi possível extrair nenhuma seção usando os padrões regulares.")
             # Tentar uma abordagem mais simples: dividir o texto em terços
             partes = texto.split('\n\n')
             if len(partes) >= 3:
-                print("Usando abordagem alternativa: dividindo o texto em partes.")
+                logger.info("Usando abordagem alternativa: dividindo o texto em partes.")
                 fatos = partes[0]
                 argumentos = '\n\n'.join(partes[1:-1])
                 pedido = partes[-1]
         
-        print(f"Seções extraídas: Fatos: {'Sim' if fatos else 'Não'}, Argumentos: {'Sim' if argumentos else 'Não'}, Pedido: {'Sim' if pedido else 'Não'}")
+        logger.debug("Seções extraídas: Fatos: %s, Argumentos: %s, Pedido: %s", 'Sim' if fatos else 'Não', 'Sim' if argumentos else 'Não', 'Sim' if pedido else 'Não')
         
         return {
             "fatos": fatos or "",
@@ -230,15 +430,61 @@ class AIGenerator:
         
         return prompt
     
-    def _gerar_prompt_jurisprudencia(self, tipo, fatos, argumentos):
-        """Gera o prompt para buscar jurisprudências relevantes"""
-        prompt = f"""Com base nos fatos e argumentos abaixo, forneça 3 jurisprudências relevantes para uma petição do tipo {tipo}.
+    def _gerar_prompt_secao(self, tipo, motivo, fatos, secao, secoes_atuais=None, contexto_adicional=None):
+        """Gera o prompt para regenerar apenas uma seção da petição"""
+        cabecalho, descricao = self.SECOES[secao]
+        
+        prompt = f"""Estou elaborando uma petição do tipo {tipo} com o seguinte motivo: "{motivo}".
+        Os fatos básicos são: "{fatos}".
+        
+        Preciso que você reescreva APENAS a seção {cabecalho[:-1]}, com {descricao}.
+        """
+        
+        # Incluir as demais seções já geradas como contexto
+        for outra_secao, texto in (secoes_atuais or {}).items():
+            if outra_secao != secao and outra_secao in self.SECOES and texto:
+                prompt += f"""
+        Seção {self.SECOES[outra_secao][0]} já redigida (apenas para contexto, não a repita):
+        {texto}
+        """
+        
+        prompt += f"""
+        Formate sua resposta EXATAMENTE assim, sem nenhuma outra seção:
+        
+        {cabecalho}
+        [Conteúdo da seção aqui]
+        """
+        
+        if contexto_adicional:
+            prompt += f"\n\nContexto adicional para considerar: {contexto_adicional}"
+        
+        return prompt
+    
+    def _gerar_prompt_jurisprudencia(self, tipo, fatos, argumentos=None, motivo=None):
+        """
+        Gera o prompt para buscar jurisprudências relevantes
+        
+        Sem argumentos, o prompt usa apenas o motivo e os fatos, permitindo
+        que a busca seja feita em paralelo com a geração da petição.
+        """
+        if argumentos:
+            contexto = f"""Com base nos fatos e argumentos abaixo, forneça 3 jurisprudências relevantes para uma petição do tipo {tipo}.
         
         FATOS:
         {fatos}
         
         ARGUMENTOS:
-        {argumentos}
+        {argumentos}"""
+        else:
+            contexto = f"""Com base no motivo e nos fatos abaixo, forneça 3 jurisprudências relevantes para uma petição do tipo {tipo}.
+        
+        MOTIVO:
+        {motivo or ""}
+        
+        FATOS:
+        {fatos}"""
+        
+        prompt = f"""{contexto}
         
         Para cada jurisprudência, forneça:
         1. Tribunal (STF, STJ, TRF, etc.)
@@ -283,200 +529,210 @@ class AIGenerator:
         
         return prompt
     
-    def gerar_peticao_com_chat(self, tipo, motivo, fatos, contexto_adicional=None):
+    def gerar_peticao_com_chat(self, tipo, motivo, fatos, contexto_adicional=None, callback=None):
         """Gera uma petição usando o modelo de chat da OpenAI"""
+        futuro_jurisprudencias = None
         try:
-            print(f"Iniciando geração de petição com modelo de chat: {self.model}")
-            print(f"Tipo: {tipo}")
-            print(f"Motivo: {motivo}")
-            
-            # Verificar cache
-            cache_key = f"{tipo}_{motivo}_{fatos[:100]}"
-            if cache_key in self.cache:
-                print("Usando resposta em cache")
-                return self.cache[cache_key]
+            logger.info("Iniciando geração de petição com modelo de chat: %s", self.model)
+            logger.debug("Tipo: %s", tipo)
+            logger.debug("Motivo: %s", motivo)
             
             # Gerar prompt
             prompt = self._gerar_prompt_peticao(tipo, motivo, fatos, contexto_adicional)
             
+            # Verificar cache
+            cache_key = CacheGeracao.gerar_chave("chat", self.assistant_id, self.model, prompt)
+            resultado_cache = self.cache.obter(cache_key)
+            if resultado_cache:
+                logger.info("Usando resposta em cache")
+                self._notificar(callback, "cache_utilizado")
+                return resultado_cache
+            
+            # No modo paralelo, as jurisprudências são buscadas a partir dos fatos
+            # fornecidos enquanto a petição é gerada
+            if self.modo_jurisprudencia == "paralelo":
+                # O contexto é copiado para manter o ID de correlação nos logs
+                futuro_jurisprudencias = self._obter_executor().submit(
+                    contextvars.copy_context().run, self._buscar_jurisprudencias, tipo, fatos, None, motivo
+                )
+            
             # Chamar a API
-            response = self.client.chat.completions.create(
-                model=self.model,
+            resposta_texto = self._completar_chat(
                 messages=[
                     {"role": "system", "content": "Você é um assistente jurídico especializado em redigir petições com linguagem técnica e formal."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=4000
+                max_tokens=4000,
+                callback=callback
             )
             
-            # Extrair resposta
-            resposta_texto = response.choices[0].message.content
-            
             # Extrair seções
             secoes = self._extrair_secoes(resposta_texto)
+            self._notificar(callback, "secoes_extraidas", **{secao: bool(texto) for secao, texto in secoes.items()})
             
             # Verificar se todas as seções foram extraídas
             if not secoes["fatos"] or not secoes["argumentos"] or not secoes["pedido"]:
-                print("AVISO: Algumas seções não foram extraídas corretamente.")
+                logger.warning("Algumas seções não foram extraídas corretamente.")
                 
                 # Tentar novamente com temperatura mais baixa se alguma seção estiver faltando
                 if not all(secoes.values()):
-                    print("Tentando novamente com temperatura mais baixa...")
-                    response = self.client.chat.completions.create(
-                        model=self.model,
+                    logger.info("Tentando novamente com temperatura mais baixa...")
+                    self._notificar(callback, "nova_tentativa", motivo="secoes_ausentes")
+                    resposta_texto = self._completar_chat(
                         messages=[
                             {"role": "system", "content": "Você é um assistente jurídico especializado em redigir petições com linguagem técnica e formal. É CRUCIAL que você siga o formato exato solicitado."},
                             {"role": "user", "content": prompt}
                         ],
                         temperature=0.2,
-                        max_tokens=4000
+                        max_tokens=4000,
+                        callback=callback
                     )
                     
-                    resposta_texto = response.choices[0].message.content
                     secoes = self._extrair_secoes(resposta_texto)
+                    self._notificar(callback, "secoes_extraidas", **{secao: bool(texto) for secao, texto in secoes.items()})
             
             # Adicionar jurisprudências se as seções foram extraídas corretamente
             if secoes["fatos"] and secoes["argumentos"]:
                 try:
-                    # Gerar jurisprudências
-                    prompt_jurisprudencia = self._gerar_prompt_jurisprudencia(
-                        tipo, secoes["fatos"], secoes["argumentos"]
-                    )
-                    
-                    response_jurisprudencia = self.client.chat.completions.create(
-                        model=self.model,
-                        messages=[
-                            {"role": "system", "content": "Você é um assistente jurídico especializado em jurisprudência."},
-                            {"role": "user", "content": prompt_jurisprudencia}
-                        ],
-                        temperature=0.5,
-                        max_tokens=2000
-                    )
-                    
-                    jurisprudencias = response_jurisprudencia.choices[0].message.content
+                    # Gerar jurisprudências (ou aguardar a busca já iniciada em paralelo)
+                    if futuro_jurisprudencias is not None:
+                        futuro, futuro_jurisprudencias = futuro_jurisprudencias, None
+                        jurisprudencias = futuro.result()
+                    else:
+                        jurisprudencias = self._buscar_jurisprudencias(
+                            tipo, secoes["fatos"], secoes["argumentos"]
+                        )
                     
                     # Adicionar jurisprudências aos argumentos
                     if jurisprudencias and "JURISPRUDÊNCIA" in jurisprudencias:
                         secoes["argumentos"] += "\n\nJURISPRUDÊNCIAS APLICÁVEIS:\n\n" + jurisprudencias
+                        self._notificar(callback, "jurisprudencias_adicionadas")
                 except Exception as e:
-                    print(f"Erro ao gerar jurisprudências: {e}")
+                    logger.error("Erro ao gerar jurisprudências: %s", e)
             
             # Formatar resultado
             resultado = {
                 "fatos": secoes["fatos"] or fatos,
                 "argumentos": secoes["argumentos"] or "Não foi possível extrair os argumentos.",
                 "pedido": secoes["pedido"] or "Não foi possível extrair o pedido.",
-                "texto_completo": resposta_texto
+                "texto_completo": resposta_texto,
+                "secoes_ausentes": [secao for secao, texto in secoes.items() if not texto]
             }
             
-            # Salvar no cache
-            self.cache[cache_key] = resultado
+            # Salvar no cache apenas respostas com todas as seções
+            if all(secoes.values()):
+                self.cache.salvar(cache_key, resultado)
             
             return resultado
             
         except Exception as error:
-            print(f"Erro ao gerar petição com chat: {error}")
+            logger.error("Erro ao gerar petição com chat: %s", error)
             raise error
+        finally:
+            # Busca paralela não utilizada (erro na geração ou seções ausentes)
+            if futuro_jurisprudencias is not None:
+                self._descartar_jurisprudencias(futuro_jurisprudencias)
     
-    def gerar_peticao_com_assistente(self, tipo, motivo, fatos, contexto_adicional=None):
-        """Gera uma petição usando o Assistente da OpenAI"""
+    def gerar_peticao_com_assistente(self, tipo, motivo, fatos, contexto_adicional=None, callback=None, prazo=None):
+        """
+        Gera uma petição usando o Assistente da OpenAI
+        
+        Quando o resultado traz ``thread_id``, o thread continua disponível
+        para regenerar_secao e deve ser devolvido com liberar_thread; os
+        threads não devolvidos são excluídos pela varredura de órfãos.
+        
+        O prazo (instante monotônico) é o da requisição inteira; sem ele, o
+        prazo total da estratégia de polling é contado a partir de agora.
+        """
+        thread_id = None
+        thread_entregue = False
         try:
-            print("="*80)
-            print(f"Iniciando geração de petição com o Assistente da OpenAI...")
-            print(f"ID do Assistente: {self.assistant_id}")
-            print(f"Tipo: {tipo}")
-            print(f"Motivo: {motivo}")
-            print("="*80)
+            logger.info("Iniciando geração de petição com o Assistente da OpenAI...")
+            logger.debug("ID do Assistente: %s", self.assistant_id)
+            logger.debug("Tipo: %s", tipo)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Motivo: %s", resumir(motivo))
+            
+            # Prazo total para aguardar os runs desta requisição
+            if prazo is None:
+                prazo = self.polling.prazo()
+            
+            # Gerar prompt
+            prompt = self._gerar_prompt_peticao(tipo, motivo, fatos, contexto_adicional)
             
             # Verificar cache
-            cache_key = f"assistant_{tipo}_{motivo}_{fatos[:100]}"
-            if cache_key in self.cache:
-                print("Usando resposta em cache")
-                return self.cache[cache_key]
+            cache_key = CacheGeracao.gerar_chave("assistente", self.assistant_id, self.model, prompt)
+            resultado_cache = self.cache.obter(cache_key)
+            if resultado_cache:
+                logger.info("Usando resposta em cache")
+                self._notificar(callback, "cache_utilizado")
+                return resultado_cache
             
             # Obter informações do assistente
             try:
                 assistant_info = self.client.beta.assistants.retrieve(self.assistant_id)
-                print(f"Nome do Assistente: {assistant_info.name}")
-                print(f"Modelo: {assistant_info.model}")
-                print(f"Instruções: {assistant_info.instructions[:100]}...")
-                print(f"Ferramentas disponíveis: {[tool.type for tool in assistant_info.tools]}")
-                print("="*80)
+                logger.debug("Nome do Assistente: %s", assistant_info.name)
+                logger.debug("Modelo: %s", assistant_info.model)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Instruções: %s", resumir(assistant_info.instructions, 100))
+                logger.debug("Ferramentas disponíveis: %s", [tool.type for tool in assistant_info.tools])
             except Exception as e:
-                print(f"Aviso: Não foi possível obter informações detalhadas do assistente: {e}")
+                logger.warning("Não foi possível obter informações detalhadas do assistente: %s", e)
             
-            # Criar um thread
-            thread = self.client.beta.threads.create()
-            print(f"Thread criado com ID: {thread.id}")
-            
-            # Gerar prompt
-            prompt = self._gerar_prompt_peticao(tipo, motivo, fatos, contexto_adicional)
+            # Obter um thread vazio (criado antecipadamente, quando possível)
+            thread_id = self.threads.obter()
+            logger.info("Thread obtido com ID: %s", thread_id)
+            self._notificar(callback, "thread_criada", thread_id=thread_id)
             
             # Adicionar uma mensagem ao thread
             self.client.beta.threads.messages.create(
-                thread_id=thread.id,
+                thread_id=thread_id,
                 role="user",
                 content=prompt
             )
             
             # Executar o assistente
             run = self.client.beta.threads.runs.create(
-                thread_id=thread.id,
+                thread_id=thread_id,
                 assistant_id=self.assistant_id
             )
             
-            # Verificar o status da execução
-            run_status = self.client.beta.threads.runs.retrieve(
-                thread_id=thread.id,
-                run_id=run.id
-            )
-            
             # Aguardar a conclusão da execução
-            max_attempts = 30  # 60 segundos (30 * 2)
-            attempts = 0
-            
-            while run_status.status not in ["completed", "failed", "cancelled", "expired"] and attempts < max_attempts:
-                print(f"Status atual: {run_status.status}")
-                
-                # Aguardar 2 segundos antes de verificar novamente
-                time.sleep(2)
-                attempts += 1
-                
-                run_status = self.client.beta.threads.runs.retrieve(
-                    thread_id=thread.id,
-                    run_id=run.id
-                )
+            polling = self._aguardar_run(thread_id, run.id, callback=callback, prazo=prazo)
+            run_status = polling.valor
             
             # Verificar se a execução foi concluída com sucesso
             if run_status.status != "completed":
-                print(f"AVISO: Execução do assistente não foi concluída com sucesso. Status: {run_status.status}")
+                logger.warning("Execução do assistente não foi concluída com sucesso. Status: %s", run_status.status)
+                if polling.prazo_esgotado:
+                    self._cancelar_run(thread_id, run.id)
                 # Tentar novamente com o modelo de chat como fallback
-                print("Tentando gerar com o modelo de chat como fallback...")
-                return self.gerar_peticao_com_chat(tipo, motivo, fatos, contexto_adicional)
+                logger.info("Tentando gerar com o modelo de chat como fallback...")
+                return self.gerar_peticao_com_chat(tipo, motivo, fatos, contexto_adicional, callback)
             
             # Obter as mensagens do thread
             messages = self.client.beta.threads.messages.list(
-                thread_id=thread.id
+                thread_id=thread_id
             )
             
             # Obter a última mensagem do assistente
             assistant_messages = [msg for msg in messages.data if msg.role == "assistant"]
             
             if not assistant_messages:
-                print("AVISO: Nenhuma resposta do assistente foi encontrada")
+                logger.warning("Nenhuma resposta do assistente foi encontrada")
                 # Tentar novamente com o modelo de chat como fallback
-                print("Tentando gerar com o modelo de chat como fallback...")
-                return self.gerar_peticao_com_chat(tipo, motivo, fatos, contexto_adicional)
+                logger.info("Tentando gerar com o modelo de chat como fallback...")
+                return self.gerar_peticao_com_chat(tipo, motivo, fatos, contexto_adicional, callback)
             
             last_message = assistant_messages[0]
             
             # Verificar se a mensagem tem conteúdo
             if not last_message.content or len(last_message.content) == 0:
-                print("AVISO: A mensagem do assistente não contém conteúdo")
+                logger.warning("A mensagem do assistente não contém conteúdo")
                 # Tentar novamente com o modelo de chat como fallback
-                print("Tentando gerar com o modelo de chat como fallback...")
-                return self.gerar_peticao_com_chat(tipo, motivo, fatos, contexto_adicional)
+                logger.info("Tentando gerar com o modelo de chat como fallback...")
+                return self.gerar_peticao_com_chat(tipo, motivo, fatos, contexto_adicional, callback)
             
             # Extrair o texto da mensagem
             content = ""
@@ -485,27 +741,29 @@ class AIGenerator:
                     content += item.text.value
             
             if not content:
-                print("AVISO: Não foi possível extrair texto da mensagem do assistente")
+                logger.warning("Não foi possível extrair texto da mensagem do assistente")
                 # Tentar novamente com o modelo de chat como fallback
-                print("Tentando gerar com o modelo de chat como fallback...")
-                return self.gerar_peticao_com_chat(tipo, motivo, fatos, contexto_adicional)
+                logger.info("Tentando gerar com o modelo de chat como fallback...")
+                return self.gerar_peticao_com_chat(tipo, motivo, fatos, contexto_adicional, callback)
             
             # Extrair seções
             secoes = self._extrair_secoes(content)
+            self._notificar(callback, "secoes_extraidas", **{secao: bool(texto) for secao, texto in secoes.items()})
             
             # Verificar se as seções foram extraídas corretamente
             if not secoes["fatos"] or not secoes["argumentos"] or not secoes["pedido"]:
-                print("AVISO: Algumas seções não foram extraídas corretamente")
-                print(f"Fatos extraídos: {'Sim' if secoes['fatos'] else 'Não'}")
-                print(f"Argumentos extraídos: {'Sim' if secoes['argumentos'] else 'Não'}")
-                print(f"Pedido extraído: {'Sim' if secoes['pedido'] else 'Não'}")
+                logger.warning("Algumas seções não foram extraídas corretamente")
+                logger.debug("Fatos extraídos: %s", 'Sim' if secoes['fatos'] else 'Não')
+                logger.debug("Argumentos extraídos: %s", 'Sim' if secoes['argumentos'] else 'Não')
+                logger.debug("Pedido extraído: %s", 'Sim' if secoes['pedido'] else 'Não')
                 
                 # Se fatos não foram extraídos, tentar novamente
                 if not secoes["fatos"] or not secoes["argumentos"]:
-                    print("Tentando gerar novamente com instruções mais específicas...")
+                    logger.info("Tentando gerar novamente com instruções mais específicas...")
+                    self._notificar(callback, "nova_tentativa", motivo="secoes_ausentes")
                     # Adicionar uma mensagem de follow-up ao thread
                     self.client.beta.threads.messages.create(
-                        thread_id=thread.id,
+                        thread_id=thread_id,
                         role="user",
                         content="""Por favor, reformule sua resposta seguindo EXATAMENTE este formato:
                         
@@ -523,29 +781,20 @@ class AIGenerator:
                     
                     # Executar o assistente novamente
                     run = self.client.beta.threads.runs.create(
-                        thread_id=thread.id,
+                        thread_id=thread_id,
                         assistant_id=self.assistant_id
                     )
                     
-                    # Aguardar a conclusão da execução
-                    run_status = self.client.beta.threads.runs.retrieve(
-                        thread_id=thread.id,
-                        run_id=run.id
-                    )
-                    
-                    attempts = 0
-                    while run_status.status not in ["completed", "failed", "cancelled", "expired"] and attempts < max_attempts:
-                        time.sleep(2)
-                        attempts += 1
-                        run_status = self.client.beta.threads.runs.retrieve(
-                            thread_id=thread.id,
-                            run_id=run.id
-                        )
+                    # Aguardar a conclusão da execução dentro do prazo restante da requisição
+                    polling = self._aguardar_run(thread_id, run.id, callback=callback, prazo=prazo)
+                    run_status = polling.valor
+                    if polling.prazo_esgotado:
+                        self._cancelar_run(thread_id, run.id)
                     
                     if run_status.status == "completed":
                         # Obter as mensagens atualizadas
                         messages = self.client.beta.threads.messages.list(
-                            thread_id=thread.id
+                            thread_id=thread_id
                         )
                         
                         assistant_messages = [msg for msg in messages.data if msg.role == "assistant"]
@@ -558,26 +807,33 @@ class AIGenerator:
                             
                             # Extrair seções novamente
                             secoes = self._extrair_secoes(content)
+                            self._notificar(callback, "secoes_extraidas", **{secao: bool(texto) for secao, texto in secoes.items()})
             
             # Formatar resultado
             resultado = {
                 "fatos": secoes["fatos"] or "Não foi possível extrair os fatos. Por favor, forneça fatos mais detalhados.",
                 "argumentos": secoes["argumentos"] or "Não foi possível extrair os argumentos. Por favor, tente novamente.",
                 "pedido": secoes["pedido"] or "Não foi possível extrair os pedidos. Por favor, tente novamente.",
-                "texto_completo": content
+                "texto_completo": content,
+                "secoes_ausentes": [secao for secao, texto in secoes.items() if not texto]
             }
             
-            # Salvar no cache
-            self.cache[cache_key] = resultado
+            # Salvar no cache apenas respostas com todas as seções
+            if all(secoes.values()):
+                self.cache.salvar(cache_key, resultado)
+            
+            # O thread fica disponível para regenerar seções com o mesmo contexto
+            resultado = dict(resultado, thread_id=thread_id)
+            thread_entregue = True
             
             return resultado
             
         except Exception as error:
-            print(f"Erro ao gerar petição com assistente: {error}")
+            logger.error("Erro ao gerar petição com assistente: %s", error)
             # Tentar com o modelo de chat como fallback
             try:
-                print("Tentando gerar com o modelo de chat como fallback devido a erro...")
-                return self.gerar_peticao_com_chat(tipo, motivo, fatos, contexto_adicional)
+                logger.info("Tentando gerar com o modelo de chat como fallback devido a erro...")
+                return self.gerar_peticao_com_chat(tipo, motivo, fatos, contexto_adicional, callback)
             except:
                 # Retornar um resultado padrão em caso de exceção
                 resultado_padrao = {
@@ -587,8 +843,96 @@ class AIGenerator:
                     "texto_completo": f"Erro ao gerar petição: {str(error)}"
                 }
                 return resultado_padrao
+        finally:
+            # Threads que não serão usados pelo chamador são excluídos em segundo plano
+            if thread_id and not thread_entregue:
+                self.threads.liberar(thread_id)
+    
+    def _obter_texto_resposta(self, thread_id):
+        """Obtém o texto da última mensagem do assistente no thread"""
+        messages = self.client.beta.threads.messages.list(thread_id=thread_id)
+        assistant_messages = [msg for msg in messages.data if msg.role == "assistant"]
+        if not assistant_messages:
+            return ""
+        
+        content = ""
+        for item in assistant_messages[0].content:
+            if hasattr(item, 'text') and hasattr(item.text, 'value'):
+                content += item.text.value
+        return content
+    
+    def regenerar_secao(self, tipo, motivo, fatos, secao, secoes_atuais=None, thread_id=None, contexto_adicional=None, callback=None, prazo=None):
+        """
+        Regenera apenas uma seção da petição
+        
+        Se o thread da geração original for informado, a solicitação é feita
+        nele, aproveitando o contexto já existente; caso contrário, é feita
+        uma única chamada ao modelo de chat com as demais seções como contexto.
+        
+        Args:
+            tipo: Tipo da petição
+            motivo: Motivo da petição
+            fatos: Fatos básicos fornecidos pelo usuário
+            secao: Seção a regenerar ('fatos', 'argumentos' ou 'pedido')
+            secoes_atuais: Dicionário com as seções já geradas (opcional)
+            thread_id: ID do thread do assistente usado na geração (opcional)
+            contexto_adicional: Instruções adicionais para a geração (opcional)
+            callback: Função chamada como callback(evento, dados) (opcional)
+            prazo: Instante monotônico limite da requisição para aguardar o run no thread (opcional)
+            
+        Returns:
+            Texto da seção regenerada, ou string vazia se não foi possível gerá-la
+        """
+        if secao not in self.SECOES:
+            raise ValueError(f"Seção desconhecida: {secao}")
+        
+        logger.info("Regenerando apenas a seção '%s'...", secao)
+        self._notificar(callback, "regeneracao_secao", secao=secao, thread_id=thread_id)
+        prompt = self._gerar_prompt_secao(tipo, motivo, fatos, secao, secoes_atuais, contexto_adicional)
+        
+        texto = ""
+        if thread_id and prazo is not None and time.monotonic() >= prazo:
+            # Um run criado agora não poderia ser aguardado
+            logger.warning("Prazo da requisição esgotado; regenerando a seção '%s' pelo modelo de chat", secao)
+        elif thread_id:
+            try:
+                self.client.beta.threads.messages.create(
+                    thread_id=thread_id,
+                    role="user",
+                    content=prompt
+                )
+                run = self.client.beta.threads.runs.create(
+                    thread_id=thread_id,
+                    assistant_id=self.assistant_id
+                )
+                polling = self._aguardar_run(thread_id, run.id, callback=callback, prazo=prazo)
+                if polling.status == "completed":
+                    texto = self._obter_texto_resposta(thread_id)
+                elif polling.prazo_esgotado:
+                    logger.warning("Prazo esgotado ao regenerar a seção no thread; cancelando o run %s", run.id)
+                    self._cancelar_run(thread_id, run.id)
+                else:
+                    logger.warning("Regeneração da seção no thread terminou com status %s", polling.status)
+            except Exception as e:
+                logger.error("Erro ao regenerar seção no thread %s: %s", thread_id, e)
+        
+        if not texto:
+            texto = self._completar_chat(
+                messages=[
+                    {"role": "system", "content": "Você é um assistente jurídico especializado em redigir petições com linguagem técnica e formal. É CRUCIAL que você siga o formato exato solicitado."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.4,
+                max_tokens=2500 if secao == "pedido" else 4000,
+                callback=callback
+            )
+        
+        # Usar a seção extraída ou, se o cabeçalho não vier, o texto inteiro
+        secao_texto = self._extrair_secoes(texto).get(secao) or (texto or "").strip()
+        self._notificar(callback, "secao_regenerada", secao=secao, tamanho=len(secao_texto))
+        return secao_texto
     
-    def gerar_peticao(self, tipo, motivo, fatos, usar_assistente=True, contexto_adicional=None):
+    def gerar_peticao(self, tipo, motivo, fatos, usar_assistente=True, contexto_adicional=None, callback=None, prazo=None):
         """
         Gera uma petição usando o método especificado
         
@@ -598,14 +942,16 @@ class AIGenerator:
             fatos: Fatos da petição
             usar_assistente: Se True, usa o Assistente da OpenAI, caso contrário usa o modelo de chat
             contexto_adicional: Contexto adicional para a geração (opcional)
+            callback: Função chamada como callback(evento, dados) a cada etapa da geração (opcional)
+            prazo: Instante monotônico limite da requisição para aguardar o assistente (opcional)
             
         Returns:
             Dicionário com fatos, argumentos e pedidos
         """
         # Forçar o uso do assistente configurado no .env
         if self.assistant_id:
-            print(f"Usando assistente com ID: {self.assistant_id}")
-            return self.gerar_peticao_com_assistente(tipo, motivo, fatos, contexto_adicional)
+            logger.info("Usando assistente com ID: %s", self.assistant_id)
+            return self.gerar_peticao_com_assistente(tipo, motivo, fatos, contexto_adicional, callback, prazo=prazo)
         else:
-            print("AVISO: ID do assistente não configurado. Usando modelo de chat como fallback.")
-            return self.gerar_peticao_com_chat(tipo, motivo, fatos, contexto_adicional) 
\ No newline at end of file
+            logger.warning("ID do assistente não configurado. Usando modelo de chat como fallback.")
+            return self.gerar_peticao_com_chat(tipo, motivo, fatos, contexto_adicional, callback) 
\ No newline at end of file
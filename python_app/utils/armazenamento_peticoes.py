@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de armazenamento das petições geradas, endereçado pelo conteúdo
+"""
+
+import io
+import os
+import logging
+import tempfile
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+# Subdiretório das petições onde ficam os documentos endereçados por hash
+OBJETOS_DIR = 'objetos'
+
+# Data fixa das entradas do ZIP: o mesmo documento sempre gera os mesmos bytes
+_DATA_ENTRADAS_ZIP = (1980, 1, 1, 0, 0, 0)
+
+
+def normalizar_zip(conteudo):
+    """
+    Regrava um ZIP com as entradas em ordem alfabética e data fixa
+
+    Document.save() grava a hora atual em cada entrada, de modo que o mesmo
+    documento salvo duas vezes tem bytes (e hash) diferentes.
+
+    Returns:
+        Bytes do ZIP normalizado
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(conteudo)) as origem, \
+            zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as destino:
+        for nome in sorted(origem.namelist()):
+            entrada = zipfile.ZipInfo(nome, date_time=_DATA_ENTRADAS_ZIP)
+            entrada.compress_type = zipfile.ZIP_DEFLATED
+            destino.writestr(entrada, origem.read(nome))
+    return buffer.getvalue()
+
+
+def serializar_documento(documento):
+    """
+    Serializa o documento em memória, de forma determinística
+
+    Salva com Document.save() e normaliza o ZIP resultante (ver
+    normalizar_zip), para que documentos iguais tenham o mesmo hash e
+    sejam armazenados uma única vez.
+
+    Returns:
+        Bytes do DOCX
+    """
+    buffer = io.BytesIO()
+    documento.save(buffer)
+    return normalizar_zip(buffer.getvalue())
+
+
+class ArmazenamentoPeticoes:
+    """
+    Documentos gravados pelo hash SHA-256 do conteúdo
+
+    Cada documento fica em objetos/ab/cd/<hash>.docx (dois níveis de
+    subdiretórios pelos primeiros caracteres do hash, para manter os
+    diretórios pequenos). Um documento idêntico a outro já gravado não é
+    gravado de novo. O nome de download, o tipo, o cliente e o ID da
+    requisição ficam no índice de petições, que aponta para o hash.
+    """
+
+    def __init__(self, diretorio):
+        """
+        Args:
+            diretorio: Diretório das petições (os objetos ficam em OBJETOS_DIR)
+        """
+        self.diretorio = os.path.join(diretorio, OBJETOS_DIR)
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def caminho(self, hash_conteudo):
+        """Retorna o caminho do documento com o hash (existindo ou não)"""
+        return os.path.join(self.diretorio, hash_conteudo[:2], hash_conteudo[2:4], f"{hash_conteudo}.docx")
+
+    def existe(self, hash_conteudo):
+        """Indica se o documento com o hash está armazenado"""
+        return bool(hash_conteudo) and os.path.isfile(self.caminho(hash_conteudo))
+
+    def guardar(self, conteudo, hash_conteudo):
+        """
+        Grava o documento, a menos que um idêntico já esteja armazenado
+
+        A gravação é atômica (arquivo temporário renomeado), de modo que um
+        documento nunca é lido pela metade.
+
+        Returns:
+            Tupla (caminho, True se o arquivo foi gravado agora)
+        """
+        caminho = self.caminho(hash_conteudo)
+        if os.path.isfile(caminho):
+            logger.debug("Documento já armazenado: %s", hash_conteudo)
+            return caminho, False
+
+        diretorio = os.path.dirname(caminho)
+        os.makedirs(diretorio, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'wb') as f:
+                f.write(conteudo)
+            # mkstemp cria o arquivo apenas para o dono; o documento pode ser servido por um proxy
+            os.chmod(temporario, 0o644)
+            os.replace(temporario, caminho)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+        return caminho, True
@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de armazenamento de clientes e advogados em SQLite
+"""
+
+import os
+import re
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Banco padrão dos clientes, compartilhado entre os processos
+BANCO_PATH_PADRAO = os.path.join(_APP_DIR, 'data', 'clientes.sqlite3')
+
+# Arquivos JSON importados automaticamente, em ordem de prioridade: o cadastro
+# interno (data/clientes.json), o cadastro lido pelo gerador de documentos
+# (clientes/clientes.json) e a exportação externa (src/data/clientes.json, com
+# "results"/"Nome_fantasia"). Um ID presente em mais de um arquivo fica com os
+# dados do primeiro.
+FONTES_JSON_PADRAO = (
+    os.path.join(_APP_DIR, 'data', 'clientes.json'),
+    os.path.join(_APP_DIR, 'clientes', 'clientes.json'),
+    os.path.join(os.path.dirname(_APP_DIR), 'src', 'data', 'clientes.json')
+)
+
+# Colunas da tabela de clientes, na ordem usada nas consultas
+COLUNAS = ("id", "nome", "cnpj", "razao_social", "endereco", "endereco_completo",
+           "logo_path", "representante_legal")
+
+_banco = None
+_banco_lock = threading.Lock()
+
+
+def normalizar_cnpj(cnpj):
+    """Mantém apenas os dígitos do CNPJ, para buscar valores com e sem máscara"""
+    return re.sub(r'\D', '', str(cnpj or ''))
+
+
+def ler_clientes_json(caminho):
+    """
+    Lê um arquivo de clientes em qualquer um dos formatos JSON conhecidos
+
+    O formato interno é uma lista de objetos com id/nome/cnpj/endereco/advogados;
+    o externo é um objeto com a lista "results", no formato exportado pelo
+    cadastro (campos _id, Nome_fantasia, Razao_social, CNPJ, Endereco*).
+
+    Returns:
+        Lista de dicionários no formato interno
+    """
+    with open(caminho, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+
+    if isinstance(dados, list):
+        return [c for c in dados if isinstance(c, dict) and c.get('id') is not None]
+
+    clientes = []
+    for cliente_data in dados.get('results', []):
+        if cliente_data.get('_id') is None:
+            continue
+        endereco_completo = f"{cliente_data.get('EnderecoRua', '')}, {cliente_data.get('EnderecoNumero', '')}, {cliente_data.get('EnderecoBairro', '')}, {cliente_data.get('EnderecoCidade', '')}/{cliente_data.get('EnderecoUF', '')}, CEP: {cliente_data.get('EnderecoCep', '')}"
+        clientes.append({
+            "id": cliente_data.get('_id'),
+            "nome": cliente_data.get('Nome_fantasia'),
+            "cnpj": cliente_data.get('CNPJ'),
+            "endereco": endereco_completo,
+            "razao_social": cliente_data.get('Razao_social'),
+            "endereco_completo": endereco_completo,
+            "advogados": []
+        })
+    return clientes
+
+
+class BancoClientes:
+    """
+    Cadastro de clientes e advogados em um banco SQLite
+
+    As consultas por ID, CNPJ e nome usam índices, e cada alteração é uma
+    transação que toca apenas as linhas afetadas.
+
+    Os clientes obtidos por ID ou CNPJ ficam em um cache do processo: uma
+    nova consulta custa apenas um ``PRAGMA data_version``, que muda quando
+    outra conexão (outro worker ou gerenciar_clientes.py) grava no banco.
+    As alterações feitas por esta instância esvaziam o cache na hora. Os
+    dicionários retornados são compartilhados e não devem ser alterados.
+    """
+
+    def __init__(self, caminho=BANCO_PATH_PADRAO):
+        """
+        Inicializa o banco, criando as tabelas se necessário
+
+        Args:
+            caminho: Arquivo SQLite (":memory:" para manter apenas em memória)
+        """
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._versao_cache = None
+        self._geracao_cache = 0
+
+        if caminho != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+
+        self._conexao = sqlite3.connect(caminho, timeout=10, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        with self._lock, self._conexao:
+            if caminho != ":memory:":
+                self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute("PRAGMA foreign_keys=ON")
+            self._conexao.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS clientes (
+                    id TEXT PRIMARY KEY,
+                    nome TEXT COLLATE NOCASE,
+                    cnpj TEXT,
+                    cnpj_digitos TEXT,
+                    razao_social TEXT,
+                    endereco TEXT,
+                    endereco_completo TEXT,
+                    logo_path TEXT,
+                    representante_legal TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_clientes_cnpj ON clientes (cnpj_digitos);
+                CREATE INDEX IF NOT EXISTS idx_clientes_nome ON clientes (nome);
+                CREATE TABLE IF NOT EXISTS advogados (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    cliente_id TEXT NOT NULL REFERENCES clientes (id) ON DELETE CASCADE,
+                    nome TEXT NOT NULL,
+                    oab TEXT NOT NULL,
+                    UNIQUE (cliente_id, nome, oab)
+                );
+                CREATE TABLE IF NOT EXISTS fontes_importadas (
+                    caminho TEXT PRIMARY KEY,
+                    importado_em REAL NOT NULL
+                );
+                """
+            )
+
+    @classmethod
+    def do_ambiente(cls):
+        """Cria o banco a partir da variável de ambiente CLIENTES_DB_PATH"""
+        return cls(caminho=os.getenv("CLIENTES_DB_PATH", BANCO_PATH_PADRAO))
+
+    def obter(self, cliente_id):
+        """Retorna o cliente (com seus advogados) pelo ID, ou None"""
+        return self._obter_com_cache("id", str(cliente_id), "c.id = ?")
+
+    def obter_por_cnpj(self, cnpj):
+        """Retorna o cliente pelo CNPJ, com ou sem máscara, ou None"""
+        cnpj = normalizar_cnpj(cnpj)
+        if not cnpj:
+            return None
+        return self._obter_com_cache("cnpj", cnpj, "c.cnpj_digitos = ?")
+
+    def buscar_por_nome(self, prefixo, limite=20):
+        """Retorna os clientes cujo nome começa com o prefixo (sem diferenciar maiúsculas)"""
+        prefixo = prefixo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return self._consultar(
+            "c.nome LIKE ? ESCAPE '\\' ORDER BY c.nome LIMIT ?", (f"{prefixo}%", limite)
+        )
+
+    def listar(self, limite=-1, deslocamento=0):
+        """Retorna os clientes em ordem de cadastro"""
+        return self._consultar("1 ORDER BY c.rowid LIMIT ? OFFSET ?", (limite, deslocamento))
+
+    def contar(self):
+        """Retorna o número de clientes cadastrados"""
+        with self._lock:
+            return self._conexao.execute("SELECT COUNT(*) FROM clientes").fetchone()[0]
+
+    def adicionar(self, cliente):
+        """
+        Cadastra um novo cliente
+
+        Returns:
+            False se já existir um cliente com o mesmo ID
+        """
+        try:
+            with self._lock, self._conexao:
+                self._invalidar_cache()
+                self._inserir(cliente, "INSERT")
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def salvar(self, cliente):
+        """Cadastra o cliente ou substitui os dados (e advogados) do existente"""
+        with self._lock, self._conexao:
+            self._invalidar_cache()
+            self._inserir(cliente, "INSERT OR REPLACE")
+
+    def remover(self, cliente_id):
+        """
+        Remove o cliente e seus advogados
+
+        Returns:
+            True se o cliente existia
+        """
+        with self._lock, self._conexao:
+            self._invalidar_cache()
+            cursor = self._conexao.execute("DELETE FROM clientes WHERE id = ?", (str(cliente_id),))
+        return cursor.rowcount == 1
+
+    def adicionar_advogado(self, cliente_id, nome, oab):
+        """
+        Vincula um advogado ao cliente
+
+        Returns:
+            False se o cliente não existir ou o advogado já estiver vinculado
+        """
+        try:
+            with self._lock, self._conexao:
+                self._invalidar_cache()
+                self._conexao.execute(
+                    "INSERT INTO advogados (cliente_id, nome, oab) VALUES (?, ?, ?)",
+                    (str(cliente_id), nome, oab)
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def importar(self, clientes, substituir=True):
+        """
+        Importa clientes no formato interno em uma única transação
+
+        Args:
+            clientes: Dicionários com id, nome, cnpj, endereco, advogados etc.
+            substituir: Se False, mantém os clientes que já existem no banco
+
+        Returns:
+            Número de clientes gravados
+        """
+        modo = "INSERT OR REPLACE" if substituir else "INSERT OR IGNORE"
+        gravados = 0
+        with self._lock, self._conexao:
+            self._invalidar_cache()
+            for cliente in clientes:
+                gravados += self._inserir(cliente, modo)
+        return gravados
+
+    def importar_json(self, caminho, substituir=True):
+        """Importa um arquivo JSON de clientes (formato interno ou externo)"""
+        gravados = self.importar(ler_clientes_json(caminho), substituir)
+        logger.info("Clientes importados de %s: %s", caminho, gravados)
+        return gravados
+
+    def importar_fontes_padrao(self, fontes=FONTES_JSON_PADRAO):
+        """
+        Importa os arquivos JSON legados que ainda não foram importados
+
+        Todos os arquivos existentes são importados, na ordem de ``fontes``,
+        sem sobrescrever clientes já cadastrados. Cada arquivo é importado
+        uma única vez por banco (tabela fontes_importadas), de modo que
+        remoções feitas depois pelo banco não são desfeitas.
+
+        Returns:
+            Número de clientes gravados
+        """
+        with self._lock:
+            importadas = {linha[0] for linha in self._conexao.execute("SELECT caminho FROM fontes_importadas")}
+
+        gravados = 0
+        for caminho in fontes:
+            caminho = os.path.abspath(caminho)
+            if caminho in importadas or not os.path.exists(caminho):
+                continue
+            try:
+                gravados += self.importar_json(caminho, substituir=False)
+            except (OSError, ValueError) as e:
+                logger.error("Erro ao importar clientes de %s: %s", caminho, e)
+                continue
+            with self._lock, self._conexao:
+                self._conexao.execute(
+                    "INSERT OR REPLACE INTO fontes_importadas (caminho, importado_em) VALUES (?, ?)",
+                    (caminho, time.time())
+                )
+        return gravados
+
+    def _inserir(self, cliente, modo):
+        """Grava o cliente e seus advogados na transação em andamento"""
+        valores = [str(cliente["id"])] + [cliente.get(coluna) for coluna in COLUNAS[1:]]
+        cursor = self._conexao.execute(
+            f"{modo} INTO clientes ({', '.join(COLUNAS)}, cnpj_digitos) VALUES ({', '.join('?' * len(COLUNAS))}, ?)",
+            valores + [normalizar_cnpj(cliente.get("cnpj"))]
+        )
+        if cursor.rowcount != 1:
+            return 0
+        # Os advogados informados substituem os já vinculados ao cliente
+        self._conexao.execute("DELETE FROM advogados WHERE cliente_id = ?", (valores[0],))
+        self._conexao.executemany(
+            "INSERT OR IGNORE INTO advogados (cliente_id, nome, oab) VALUES (?, ?, ?)",
+            [(valores[0], a.get("nome"), a.get("oab")) for a in cliente.get("advogados") or []
+             if a.get("nome") and a.get("oab")]
+        )
+        return 1
+
+    def _obter_com_cache(self, indice, valor, condicao):
+        """Retorna o cliente do cache ou, na falta dele, do banco"""
+        chave = (indice, valor)
+        with self._lock:
+            versao = self._conexao.execute("PRAGMA data_version").fetchone()[0]
+            if versao != self._versao_cache:
+                self._cache.clear()
+                self._versao_cache = versao
+            cliente = self._cache.get(chave)
+            geracao = self._geracao_cache
+        if cliente is not None:
+            return cliente
+
+        cliente = self._consultar_um(condicao, (valor,))
+        with self._lock:
+            # Não guardar o resultado se o banco foi alterado durante a consulta
+            if cliente is not None and geracao == self._geracao_cache:
+                self._cache[chave] = cliente
+        return cliente
+
+    def _invalidar_cache(self):
+        """Esvazia o cache; deve ser chamado com o lock adquirido"""
+        self._cache.clear()
+        self._geracao_cache += 1
+
+    def _consultar(self, condicao, parametros):
+        """Executa uma única consulta que traz os clientes e seus advogados"""
+        sql = f"""
+            SELECT {', '.join('c.' + coluna for coluna in COLUNAS)},
+                   (SELECT json_group_array(json_object('nome', a.nome, 'oab', a.oab))
+                      FROM advogados a WHERE a.cliente_id = c.id) AS advogados
+              FROM clientes c
+             WHERE {condicao}
+        """
+        with self._lock:
+            linhas = self._conexao.execute(sql, parametros).fetchall()
+        clientes = []
+        for linha in linhas:
+            cliente = {coluna: linha[coluna] for coluna in COLUNAS}
+            cliente["advogados"] = json.loads(linha["advogados"])
+            clientes.append(cliente)
+        return clientes
+
+    def _consultar_um(self, condicao, parametros):
+        clientes = self._consultar(condicao + " LIMIT 1", parametros)
+        return clientes[0] if clientes else None
+
+
+def obter_banco_clientes():
+    """
+    Retorna o banco de clientes do processo
+
+    Na primeira abertura, os arquivos JSON legados que o banco ainda não
+    importou são incluídos automaticamente.
+    """
+    global _banco
+    if _banco is None:
+        with _banco_lock:
+            if _banco is None:
+                banco = BancoClientes.do_ambiente()
+                banco.importar_fontes_padrao()
+                _banco = banco
+    return _banco
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de cache temporário dos documentos gerados sem gravação em peticoes/
+"""
+
+import os
+import time
+import sqlite3
+import secrets
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class CacheDocumentos:
+    """
+    Documentos DOCX mantidos por um tempo curto para download
+
+    Usado quando a petição é gerada sem gravação no diretório de petições:
+    o documento fica disponível para download pela chave retornada até
+    expirar. A chave é aleatória (não derivada do nome), pois é a única
+    proteção do documento.
+
+    Os documentos ficam na memória do processo, sem nenhuma escrita ou
+    leitura em disco; acima do limite de bytes, os menos usados são
+    descartados. Com vários workers, a chave só pode ser baixada no worker
+    que gerou o documento; nesse caso, use CacheDocumentosCompartilhado
+    (variável DOCUMENTOS_MEMORIA_PATH).
+    """
+
+    def __init__(self, ttl=300, max_bytes=100 * 1024 * 1024):
+        """
+        Args:
+            ttl: Tempo de vida de cada documento, em segundos
+            max_bytes: Total máximo de bytes mantidos
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._documentos = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def do_ambiente(cls):
+        """
+        Cria o cache a partir das variáveis DOCUMENTOS_MEMORIA_TTL e _MAX_MB
+
+        Com DOCUMENTOS_MEMORIA_PATH definida, cria um CacheDocumentosCompartilhado
+        nesse arquivo.
+        """
+        ttl = int(os.getenv("DOCUMENTOS_MEMORIA_TTL", "300"))
+        max_bytes = int(os.getenv("DOCUMENTOS_MEMORIA_MAX_MB", "100")) * 1024 * 1024
+        caminho = os.getenv("DOCUMENTOS_MEMORIA_PATH")
+        if caminho:
+            return CacheDocumentosCompartilhado(caminho, ttl=ttl, max_bytes=max_bytes)
+        return cls(ttl=ttl, max_bytes=max_bytes)
+
+    def guardar(self, documento):
+        """
+        Guarda um documento renderizado (ver DocxGenerator.renderizar_documento)
+
+        Returns:
+            Chave para obter o documento
+        """
+        chave = secrets.token_urlsafe(16)
+        agora = time.time()
+        entrada = (dict(documento, conteudo=bytes(documento["conteudo"])), agora + self.ttl)
+        with self._lock:
+            self._remover_expirados(agora)
+            self._documentos[chave] = entrada
+            self._bytes += len(entrada[0]["conteudo"])
+            # Descarta os menos usados além do limite, mantendo sempre o recém-guardado
+            descartados = 0
+            while self._bytes > self.max_bytes and len(self._documentos) > 1:
+                _, (antigo, _) = self._documentos.popitem(last=False)
+                self._bytes -= len(antigo["conteudo"])
+                descartados += 1
+        if descartados:
+            logger.debug("%s documento(s) descartado(s) do cache temporário", descartados)
+        return chave
+
+    def obter(self, chave):
+        """Retorna o documento da chave, ou None se não existir ou tiver expirado"""
+        with self._lock:
+            entrada = self._documentos.get(chave)
+            if entrada is None:
+                return None
+            documento, expira_em = entrada
+            if expira_em <= time.time():
+                del self._documentos[chave]
+                self._bytes -= len(documento["conteudo"])
+                return None
+            self._documentos.move_to_end(chave)
+        return documento
+
+    def __len__(self):
+        with self._lock:
+            self._remover_expirados(time.time())
+            return len(self._documentos)
+
+    def _remover_expirados(self, agora):
+        """Remove os documentos expirados; deve ser chamado com o lock adquirido"""
+        expirados = [chave for chave, (_, expira_em) in self._documentos.items() if expira_em <= agora]
+        for chave in expirados:
+            documento, _ = self._documentos.pop(chave)
+            self._bytes -= len(documento["conteudo"])
+
+
+class CacheDocumentosCompartilhado(CacheDocumentos):
+    """
+    Cache de documentos em um banco SQLite, compartilhado entre os workers
+
+    A chave gerada em um worker pode ser baixada em qualquer outro, ao
+    custo de gravar o documento no banco e lê-lo de volta no download.
+    Acima do limite de bytes, os documentos mais antigos são descartados.
+    """
+
+    def __init__(self, caminho, ttl=300, max_bytes=100 * 1024 * 1024):
+        """
+        Args:
+            caminho: Arquivo SQLite do cache
+            ttl: Tempo de vida de cada documento, em segundos
+            max_bytes: Total máximo de bytes mantidos
+        """
+        super().__init__(ttl=ttl, max_bytes=max_bytes)
+        self.caminho = caminho
+
+        if caminho != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+
+        self._conexao = sqlite3.connect(caminho, timeout=10, check_same_thread=False)
+        with self._lock, self._conexao:
+            if caminho != ":memory:":
+                self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documentos_memoria (
+                    chave TEXT PRIMARY KEY,
+                    nome TEXT NOT NULL,
+                    conteudo BLOB NOT NULL,
+                    hash TEXT NOT NULL,
+                    tipo TEXT,
+                    cliente_id TEXT,
+                    cliente_nome TEXT,
+                    tamanho INTEGER NOT NULL,
+                    expira_em REAL NOT NULL
+                )
+                """
+            )
+            self._conexao.execute(
+                "CREATE INDEX IF NOT EXISTS idx_documentos_memoria_expira_em ON documentos_memoria (expira_em)"
+            )
+
+    def guardar(self, documento):
+        """
+        Guarda um documento renderizado (ver DocxGenerator.renderizar_documento)
+
+        Returns:
+            Chave para obter o documento
+        """
+        chave = secrets.token_urlsafe(16)
+        agora = time.time()
+        with self._lock, self._conexao:
+            self._conexao.execute("DELETE FROM documentos_memoria WHERE expira_em <= ?", (agora,))
+            self._conexao.execute(
+                """
+                INSERT INTO documentos_memoria
+                    (chave, nome, conteudo, hash, tipo, cliente_id, cliente_nome, tamanho, expira_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    chave, documento["nome"], documento["conteudo"], documento["hash"],
+                    documento.get("tipo"), documento.get("cliente_id"), documento.get("cliente_nome"),
+                    len(documento["conteudo"]), agora + self.ttl
+                )
+            )
+            # Descarta os mais antigos (menor expiração) além do limite, mantendo sempre o recém-guardado
+            cursor = self._conexao.execute(
+                """
+                DELETE FROM documentos_memoria WHERE chave IN (
+                    SELECT chave FROM (
+                        SELECT chave, SUM(tamanho) OVER (ORDER BY expira_em DESC, rowid DESC) AS acumulado
+                        FROM documentos_memoria
+                    ) WHERE acumulado > ? AND chave != ?
+                )
+                """,
+                (self.max_bytes, chave)
+            )
+            if cursor.rowcount:
+                logger.debug("%s documento(s) descartado(s) do cache temporário", cursor.rowcount)
+        return chave
+
+    def obter(self, chave):
+        """Retorna o documento da chave, ou None se não existir ou tiver expirado"""
+        with self._lock:
+            linha = self._conexao.execute(
+                """
+                SELECT nome, conteudo, hash, tipo, cliente_id, cliente_nome
+                FROM documentos_memoria WHERE chave = ? AND expira_em > ?
+                """,
+                (chave, time.time())
+            ).fetchone()
+        if linha is None:
+            return None
+        nome, conteudo, hash_conteudo, tipo, cliente_id, cliente_nome = linha
+        return {
+            "nome": nome,
+            "conteudo": bytes(conteudo),
+            "hash": hash_conteudo,
+            "tipo": tipo,
+            "cliente_id": cliente_id,
+            "cliente_nome": cliente_nome
+        }
+
+    def __len__(self):
+        with self._lock:
+            return self._conexao.execute(
+                "SELECT COUNT(*) FROM documentos_memoria WHERE expira_em > ?", (time.time(),)
+            ).fetchone()[0]
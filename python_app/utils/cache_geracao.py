@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de cache persistente para respostas geradas por IA
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from .metricas import CACHE_CONSULTAS
+
+# Caminho padrão do banco de cache, compartilhado entre os workers
+CACHE_PATH_PADRAO = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cache_geracao.sqlite3'
+)
+
+
+class CacheGeracao:
+    """
+    Cache de gerações endereçado por conteúdo, com despejo LRU e TTL
+
+    As entradas ficam em um banco SQLite em disco, de modo que sobrevivem a
+    reinicializações e são compartilhadas entre os processos do servidor.
+    """
+
+    def __init__(self, caminho=CACHE_PATH_PADRAO, ttl_segundos=7 * 24 * 3600, max_entradas=1000):
+        """
+        Inicializa o cache
+
+        Args:
+            caminho: Arquivo SQLite do cache (":memory:" para um cache só em memória)
+            ttl_segundos: Tempo de vida de cada entrada; 0 desativa a expiração
+            max_entradas: Número máximo de entradas antes do despejo LRU
+        """
+        self.caminho = caminho
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+        self._lock = threading.Lock()
+
+        if caminho != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+
+        self._conexao = sqlite3.connect(caminho, timeout=10, check_same_thread=False)
+        with self._lock, self._conexao:
+            if caminho != ":memory:":
+                self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_geracao (
+                    chave TEXT PRIMARY KEY,
+                    valor TEXT NOT NULL,
+                    criado_em REAL NOT NULL,
+                    acessado_em REAL NOT NULL
+                )
+                """
+            )
+            self._conexao.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_geracao_acessado_em ON cache_geracao (acessado_em)"
+            )
+
+    @classmethod
+    def do_ambiente(cls):
+        """Cria o cache a partir das variáveis de ambiente AI_CACHE_*"""
+        return cls(
+            caminho=os.getenv("AI_CACHE_PATH", CACHE_PATH_PADRAO),
+            ttl_segundos=int(os.getenv("AI_CACHE_TTL_SEGUNDOS", 7 * 24 * 3600)),
+            max_entradas=int(os.getenv("AI_CACHE_MAX_ENTRADAS", 1000))
+        )
+
+    @staticmethod
+    def normalizar(texto):
+        """Normaliza espaços em branco para que variações de formatação gerem a mesma chave"""
+        return re.sub(r'\s+', ' ', texto or '').strip()
+
+    @staticmethod
+    def gerar_chave(modo, assistant_id, modelo, prompt):
+        """
+        Gera a chave do cache a partir do prompt completo e da configuração da IA
+
+        Args:
+            modo: Forma de geração ('assistente' ou 'chat')
+            assistant_id: ID do assistente usado
+            modelo: Modelo usado
+            prompt: Prompt completo enviado à IA
+        """
+        conteudo = json.dumps(
+            [modo, assistant_id, modelo, CacheGeracao.normalizar(prompt)],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+    def obter(self, chave):
+        """Obtém o valor associado à chave, ou None se ausente ou expirado"""
+        agora = time.time()
+        with self._lock, self._conexao:
+            linha = self._conexao.execute(
+                "SELECT valor, criado_em FROM cache_geracao WHERE chave = ?", (chave,)
+            ).fetchone()
+
+            if linha and self.ttl_segundos and agora - linha[1] > self.ttl_segundos:
+                self._conexao.execute("DELETE FROM cache_geracao WHERE chave = ?", (chave,))
+                linha = None
+
+            if not linha:
+                self.falhas += 1
+                CACHE_CONSULTAS.inc(resultado="falha")
+                return None
+
+            self._conexao.execute(
+                "UPDATE cache_geracao SET acessado_em = ? WHERE chave = ?", (agora, chave)
+            )
+            self.acertos += 1
+            CACHE_CONSULTAS.inc(resultado="acerto")
+
+        return json.loads(linha[0])
+
+    def salvar(self, chave, valor):
+        """Armazena o valor e despeja as entradas menos usadas além do limite"""
+        agora = time.time()
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO cache_geracao (chave, valor, criado_em, acessado_em) VALUES (?, ?, ?, ?)",
+                (chave, json.dumps(valor, ensure_ascii=False), agora, agora)
+            )
+
+            if self.ttl_segundos:
+                cursor = self._conexao.execute(
+                    "DELETE FROM cache_geracao WHERE criado_em < ?", (agora - self.ttl_segundos,)
+                )
+                self.despejos += cursor.rowcount
+
+            cursor = self._conexao.execute(
+                """
+                DELETE FROM cache_geracao WHERE chave IN (
+                    SELECT chave FROM cache_geracao ORDER BY acessado_em DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entradas,)
+            )
+            self.despejos += cursor.rowcount
+
+    def limpar(self):
+        """Remove todas as entradas do cache"""
+        with self._lock, self._conexao:
+            self._conexao.execute("DELETE FROM cache_geracao")
+
+    def estatisticas(self, contar_entradas=True):
+        """
+        Retorna contadores de acertos, falhas, despejos e o tamanho atual do cache
+
+        Com ``contar_entradas=False`` o banco não é consultado e ``entradas`` é None.
+        """
+        entradas = None
+        if contar_entradas:
+            with self._lock:
+                entradas = self._conexao.execute("SELECT COUNT(*) FROM cache_geracao").fetchone()[0]
+
+        consultas = self.acertos + self.falhas
+        return {
+            "entradas": entradas,
+            "max_entradas": self.max_entradas,
+            "ttl_segundos": self.ttl_segundos,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "despejos": self.despejos,
+            "taxa_acerto": round(self.acertos / consultas, 4) if consultas else None
+        }
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de cache dos templates DOCX e da localização dos seus placeholders
+"""
+
+import io
+import os
+import logging
+import threading
+from docx import Document
+
+from .renderizador_docx import TemplateCompilado
+
+logger = logging.getLogger(__name__)
+
+
+class CacheTemplates:
+    """
+    Templates DOCX lidos do disco e compilados uma única vez
+
+    Cada template é mantido em memória como o conteúdo original do arquivo,
+    junto com a localização dos seus placeholders (TemplateCompilado);
+    obter() interpreta esse conteúdo em um novo Document, que pode ser
+    modificado à vontade, sem reler o disco nem localizar os placeholders
+    de novo. O arquivo é lido de novo quando sua data de modificação ou seu
+    tamanho mudam.
+    """
+
+    def __init__(self):
+        """Inicializa o cache vazio"""
+        self.carregamentos = 0
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def obter(self, caminho):
+        """
+        Retorna uma cópia do template, pronta para ser preenchida
+
+        Args:
+            caminho: Caminho do arquivo .docx
+
+        Returns:
+            Novo objeto Document
+        """
+        return Document(io.BytesIO(self._obter_original(caminho)[0]))
+
+    def obter_compilado(self, caminho):
+        """
+        Retorna uma cópia do template e a localização dos seus placeholders
+
+        Returns:
+            Tupla (Document, TemplateCompilado)
+        """
+        conteudo, compilado = self._obter_original(caminho)
+        return Document(io.BytesIO(conteudo)), compilado
+
+    def invalidar(self, caminho=None):
+        """Descarta um template do cache (ou todos, sem argumento)"""
+        with self._lock:
+            if caminho is None:
+                self._templates.clear()
+            else:
+                self._templates.pop(os.path.abspath(caminho), None)
+
+    def _obter_original(self, caminho):
+        """Retorna o conteúdo e o template compilado, lendo o arquivo se ele mudou"""
+        caminho = os.path.abspath(caminho)
+        estado = os.stat(caminho)
+        assinatura = (estado.st_mtime_ns, estado.st_size)
+
+        entrada = self._templates.get(caminho)
+        if entrada is not None and entrada[0] == assinatura:
+            return entrada[1:]
+
+        with self._lock:
+            entrada = self._templates.get(caminho)
+            if entrada is not None and entrada[0] == assinatura:
+                return entrada[1:]
+            with open(caminho, 'rb') as f:
+                conteudo = f.read()
+            compilado = TemplateCompilado(Document(io.BytesIO(conteudo)))
+            self._templates[caminho] = (assinatura, conteudo, compilado)
+            self.carregamentos += 1
+            logger.debug("Template carregado no cache: %s (%s parágrafo(s) com placeholders)",
+                         caminho, len(compilado.paragrafos))
+            return conteudo, compilado
@@ -7,7 +7,8 @@ Módulo para geração avançada de documentos DOCX
 
 import os
 import re
-import json
+import hashlib
+import logging
 from datetime import datetime
 from docx import Document
 from docx.shared import Pt, Cm, RGBColor
@@ -23,12 +24,36 @@ from .formatacao_juridica import (
     adicionar_marca_dagua,
     formatar_texto_juridico
 )
+from .metricas import DOCX_SEGUNDOS, DOCX_BYTES
+from .banco_clientes import obter_banco_clientes
+from .indice_peticoes import IndicePeticoes, INDICE_ARQUIVO
+from .cache_templates import CacheTemplates
+from .armazenamento_peticoes import ArmazenamentoPeticoes, serializar_documento
+from .renderizador_docx import TemplateCompilado, definir_texto, substituir_em_runs
+from .logs import resumir, id_correlacao
+
+logger = logging.getLogger(__name__)
 
 class DocxGenerator:
     """Classe para geração avançada de documentos DOCX"""
     
-    def __init__(self, templates_dir, peticoes_dir, clientes_dir):
-        """Inicializa o gerador de documentos DOCX"""
+    # Placeholders que ocupam o parágrafo inteiro, com o texto dividido em linhas
+    PLACEHOLDERS_BLOCO = {"[FATOS]", "##FATOS##", "[FUNDAMENTOS]", "##FUNDAMENTOS##",
+                          "##ARGUMENTOS##", "[PEDIDOS]", "##PEDIDOS##", "##PEDIDO##"}
+    
+    # Placeholders substituídos pela imagem do logo do cliente
+    PLACEHOLDERS_LOGO = {"[LOGO_CLIENTE]", "##LOGO_CLIENTE##"}
+    
+    def __init__(self, templates_dir, peticoes_dir, clientes_dir, banco_clientes=None):
+        """
+        Inicializa o gerador de documentos DOCX
+        
+        Args:
+            templates_dir: Diretório dos templates DOCX
+            peticoes_dir: Diretório das petições geradas
+            clientes_dir: Diretório dos clientes (logos)
+            banco_clientes: BancoClientes usado nas consultas (padrão: o banco do processo)
+        """
         self.templates_dir = templates_dir
         self.peticoes_dir = peticoes_dir
         self.clientes_dir = clientes_dir
@@ -38,6 +63,20 @@ class DocxGenerator:
         os.makedirs(self.peticoes_dir, exist_ok=True)
         os.makedirs(self.clientes_dir, exist_ok=True)
         
+        # Cadastro de clientes (SQLite), o mesmo usado por gerenciar_clientes.py e /api/clientes
+        self.clientes = banco_clientes or obter_banco_clientes()
+        
+        # Índice de metadados das petições, mantido junto aos arquivos
+        self.indice = IndicePeticoes(os.path.join(self.peticoes_dir, INDICE_ARQUIVO))
+        
+        # Documentos gravados pelo hash do conteúdo (idênticos são gravados uma vez)
+        self.armazenamento = ArmazenamentoPeticoes(self.peticoes_dir)
+        
+        # Templates interpretados uma única vez e clonados a cada petição
+        self.templates = CacheTemplates()
+        self._templates_resolvidos = {}
+        self._assinatura_templates_dir = None
+        
         # Mapeamento de tipos de petição para nomes de templates
         self.tipo_template_map = {
             "recurso": "recurso_administrativo",
@@ -52,7 +91,16 @@ class DocxGenerator:
     
     def _obter_template_path(self, tipo):
         """Obtém o caminho do template com base no tipo de petição"""
+        # A resolução é refeita apenas quando o diretório muda (template incluído ou removido)
+        assinatura = os.stat(self.templates_dir).st_mtime_ns
+        if assinatura != self._assinatura_templates_dir:
+            self._templates_resolvidos = {}
+            self._assinatura_templates_dir = assinatura
+        
         tipo_lower = tipo.lower()
+        if tipo_lower in self._templates_resolvidos:
+            return self._templates_resolvidos[tipo_lower]
+        
         tipo_template = self.tipo_template_map.get(tipo_lower, tipo_lower.replace(' ', '_'))
         template_path = os.path.join(self.templates_dir, f"{tipo_template}.docx")
         
@@ -71,6 +119,7 @@ class DocxGenerator:
             else:
                 template_path = None
         
+        self._templates_resolvidos[tipo_lower] = template_path
         return template_path
     
     def _obter_dados_cliente(self, cliente_id):
@@ -78,30 +127,15 @@ class DocxGenerator:
         if not cliente_id:
             return None
         
-        print(f"Buscando dados do cliente com ID: {cliente_id}")
+        logger.debug("Buscando dados do cliente com ID: %s", cliente_id)
         
-        # Carregar informações do cliente
-        clientes_json_path = os.path.join(self.clientes_dir, 'clientes.json')
-        if os.path.exists(clientes_json_path):
-            try:
-                with open(clientes_json_path, 'r', encoding='utf-8') as f:
-                    clientes = json.load(f)
-                    # Converter cliente_id para string para comparação
-                    cliente_id_str = str(cliente_id)
-                    cliente = next((c for c in clientes if str(c.get('id')) == cliente_id_str), None)
-                    
-                    if cliente:
-                        print(f"Cliente encontrado: {cliente.get('nome', 'Nome não disponível')}")
-                    else:
-                        print(f"Cliente com ID {cliente_id} não encontrado no arquivo clientes.json")
-                    
-                    return cliente
-            except Exception as e:
-                print(f"Erro ao carregar dados do cliente: {str(e)}")
+        cliente = self.clientes.obter(cliente_id)
+        if cliente:
+            logger.debug("Cliente encontrado: %s", cliente.get('nome', 'Nome não disponível'))
         else:
-            print(f"Arquivo de clientes não encontrado: {clientes_json_path}")
+            logger.warning("Cliente com ID %s não encontrado no banco de clientes", cliente_id)
         
-        return None
+        return cliente
     
     def _obter_logo_cliente(self, cliente_nome):
         """Obtém o caminho da logo do cliente pelo nome"""
@@ -135,8 +169,15 @@ class DocxGenerator:
         
         return texto
     
-    def _substituir_placeholders(self, doc, dados):
-        """Substitui placeholders no documento"""
+    def _substituir_placeholders(self, doc, dados, compilado=None):
+        """
+        Substitui placeholders no documento
+        
+        Args:
+            doc: Documento a preencher (cópia do template)
+            dados: Valores da petição
+            compilado: TemplateCompilado do template; se omitido, é calculado a partir de doc
+        """
         # Extrair dados
         fatos = self._processar_texto_juridico(dados.get('fatos', ''))
         fundamentos = self._processar_texto_juridico(dados.get('fundamentos', ''))
@@ -151,22 +192,19 @@ class DocxGenerator:
         logo_path = dados.get('logo_path')
         
         # Verificar se os dados estão corretos
-        print(f"Substituindo placeholders com os seguintes dados:")
-        print(f"  Cliente: {cliente_nome}")
-        print(f"  Qualificação: {cliente_qualificacao}")
-        print(f"  Autoridade: {autoridade}")
-        print(f"  Fatos: {bool(fatos)}")
-        print(f"  Fundamentos: {bool(fundamentos)}")
-        print(f"  Pedidos: {bool(pedidos)}")
+        logger.debug(
+            "Substituindo placeholders: cliente=%s qualificacao=%s autoridade=%s fatos=%s fundamentos=%s pedidos=%s",
+            cliente_nome, resumir(cliente_qualificacao, 80), autoridade, bool(fatos), bool(fundamentos), bool(pedidos)
+        )
+        
+        if compilado is None:
+            compilado = TemplateCompilado(doc)
         
         # Verificar se é um Recurso Administrativo
-        is_recurso = False
-        for paragraph in doc.paragraphs:
-            if "RECURSO ADMINISTRATIVO" in paragraph.text:
-                is_recurso = True
-                break
+        is_recurso = compilado.contem_texto("RECURSO ADMINISTRATIVO")
         
-        # Mapeamento de placeholders para valores
+        # Mapeamento de placeholders para valores (a contraparte é sempre removida)
+        data_atual = datetime.now().strftime('%d/%m/%Y')
         placeholders = {
             "[FATOS]": fatos,
             "##FATOS##": fatos,
@@ -176,8 +214,8 @@ class DocxGenerator:
             "[PEDIDOS]": pedidos,
             "##PEDIDOS##": pedidos,
             "##PEDIDO##": pedidos,
-            "[DATA]": datetime.now().strftime('%d/%m/%Y'),
-            "##DATA##": datetime.now().strftime('%d/%m/%Y'),
+            "[DATA]": data_atual,
+            "##DATA##": data_atual,
             "[CIDADE]": cidade,
             "##CIDADE##": cidade,
             "[AUTORIDADE]": autoridade,
@@ -194,90 +232,50 @@ class DocxGenerator:
             "##ADVOGADO##": advogado_nome,
             "##NOME_ADVOGADO##": advogado_nome,
             "[NUMERO_OAB]": advogado_oab,
-            "##NUMERO_OAB##": advogado_oab
+            "##NUMERO_OAB##": advogado_oab,
+            "[CONTRAPARTE]": "",
+            "##CONTRAPARTE##": ""
         }
         
-        # Substituir placeholders em parágrafos
-        for paragraph in doc.paragraphs:
-            original_text = paragraph.text
-            
-            # Se for Recurso Administrativo e contém "em face de [CONTRAPARTE]"
-            if is_recurso and "em face de [CONTRAPARTE]" in original_text:
-                # Substituir o parágrafo inteiro
-                paragraph.text = "pelos fatos e fundamentos a seguir expostos."
-                continue
-            
-            # Remover qualquer referência à contraparte no documento
-            if "[CONTRAPARTE]" in original_text or "##CONTRAPARTE##" in original_text:
-                paragraph.text = paragraph.text.replace("[CONTRAPARTE]", "").replace("##CONTRAPARTE##", "")
-            
-            # Substituir cada placeholder
-            for placeholder, valor in placeholders.items():
-                if placeholder in original_text:
-                    # Se o placeholder for para fatos, fundamentos ou pedidos,
-                    # criar um novo parágrafo para cada linha
-                    if placeholder in ["[FATOS]", "##FATOS##", "[FUNDAMENTOS]", "##FUNDAMENTOS##", 
-                                    "##ARGUMENTOS##", "[PEDIDOS]", "##PEDIDOS##", "##PEDIDO##"]:
-                        # Limpar o parágrafo atual
-                        paragraph.text = ""
-                        
-                        # Dividir o texto em linhas
-                        linhas = valor.split('\n')
-                        
-                        # Adicionar cada linha como um novo run
-                        for i, linha in enumerate(linhas):
-                            if linha.strip():  # Se a linha não estiver vazia
-                                if i > 0:  # Se não for a primeira linha, adicionar quebra de linha
-                                    paragraph.add_run('\n')
-                                run = paragraph.add_run(linha.strip())
-                                run.font.name = 'Arial'
-                                run.font.size = Pt(12)
-                    else:
-                        # Para outros placeholders, fazer substituição simples
-                        paragraph.text = paragraph.text.replace(placeholder, valor or '')
+        def substituir(paragraph, marcado):
+            # Se for Recurso Administrativo e contém "em face de [CONTRAPARTE]", substituir o parágrafo inteiro
+            if is_recurso and "em face de [CONTRAPARTE]" in marcado.texto:
+                definir_texto(paragraph, "pelos fatos e fundamentos a seguir expostos.")
+                return
             
             # Tratar logo separadamente
-            if "[LOGO_CLIENTE]" in original_text and logo_path:
+            if logo_path and any(p in self.PLACEHOLDERS_LOGO for p in marcado.placeholders):
                 paragraph.text = ""
                 run = paragraph.add_run()
                 run.add_picture(logo_path, width=Cm(5))
-            elif "##LOGO_CLIENTE##" in original_text and logo_path:
+                return
+            
+            # Fatos, fundamentos e pedidos ocupam o parágrafo inteiro, uma linha por run
+            blocos = [p for p in marcado.placeholders if p in self.PLACEHOLDERS_BLOCO]
+            if blocos:
                 paragraph.text = ""
-                run = paragraph.add_run()
-                run.add_picture(logo_path, width=Cm(5))
+                self._escrever_linhas(paragraph, placeholders[blocos[-1]])
+                return
+            
+            # Demais placeholders: os nós de texto são editados no lugar, mantendo a formatação
+            substituir_em_runs(paragraph, placeholders)
         
-        # Substituir placeholders em tabelas
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        original_text = paragraph.text
-                        
-                        # Substituir cada placeholder
-                        for placeholder, valor in placeholders.items():
-                            if placeholder in original_text:
-                                if placeholder in ["[FATOS]", "##FATOS##", "[FUNDAMENTOS]", "##FUNDAMENTOS##", 
-                                                "##ARGUMENTOS##", "[PEDIDOS]", "##PEDIDOS##", "##PEDIDO##"]:
-                                    # Limpar o parágrafo atual
-                                    paragraph.text = ""
-                                    
-                                    # Dividir o texto em linhas
-                                    linhas = valor.split('\n')
-                                    
-                                    # Adicionar cada linha como um novo run
-                                    for i, linha in enumerate(linhas):
-                                        if linha.strip():  # Se a linha não estiver vazia
-                                            if i > 0:  # Se não for a primeira linha, adicionar quebra de linha
-                                                paragraph.add_run('\n')
-                                            run = paragraph.add_run(linha.strip())
-                                            run.font.name = 'Arial'
-                                            run.font.size = Pt(12)
-                                else:
-                                    # Para outros placeholders, fazer substituição simples
-                                    paragraph.text = paragraph.text.replace(placeholder, valor or '')
+        # Apenas os parágrafos com placeholders (localizados na compilação do template) são visitados
+        compilado.renderizar(doc, substituir)
         
         return doc
     
+    def _escrever_linhas(self, paragraph, valor):
+        """Escreve o texto no parágrafo, um run por linha não vazia"""
+        linhas = (valor or '').split('\n')
+        for i, linha in enumerate(linhas):
+            if linha.strip():  # Se a linha não estiver vazia
+                if i > 0:  # Se não for a primeira linha, adicionar quebra de linha
+                    paragraph.add_run('\n')
+                run = paragraph.add_run(linha.strip())
+                run.font.name = 'Arial'
+                run.font.size = Pt(12)
+    
     def gerar_documento(self, tipo, dados_peticao):
         """
         Gera um documento DOCX com base no tipo e nos dados da petição
@@ -295,26 +293,43 @@ class DocxGenerator:
                 - cidade: Cidade para o fechamento (opcional)
                 
         Returns:
-            Caminho do arquivo gerado
+            Caminho do documento armazenado (peticoes/objetos/ab/cd/<hash>.docx);
+            o nome de download fica no índice de petições
+        """
+        return self.gravar_documento(self.renderizar_documento(tipo, dados_peticao))
+    
+    def renderizar_documento(self, tipo, dados_peticao):
+        """
+        Preenche o template e serializa o documento em memória, sem gravá-lo
+        
+        Args:
+            tipo: Tipo da petição (ex: 'recurso administrativo')
+            dados_peticao: Dicionário com os dados da petição (ver gerar_documento)
+            
+        Returns:
+            Dicionário com nome (nome do arquivo), conteudo (bytes do DOCX), hash (SHA-256),
+            tipo, cliente_id e cliente_nome
         """
         try:
-            print(f"Iniciando geração do documento DOCX para petição: {tipo}")
+            logger.info("Iniciando geração do documento DOCX para petição: %s", tipo)
             
             # Verificar se dados_peticao é um dicionário válido
             if not dados_peticao or not isinstance(dados_peticao, dict):
-                print(f"AVISO: dados_peticao inválido: {dados_peticao}")
+                logger.warning("dados_peticao inválido: %s", resumir(dados_peticao))
                 dados_peticao = {}
             
             # Obter o caminho do template
             template_path = self._obter_template_path(tipo)
             
             # Criar um novo documento a partir do template ou em branco
-            if template_path and os.path.exists(template_path):
-                doc = Document(template_path)
-            else:
-                doc = Document()
-                # Configurar estilos jurídicos padrão
-                doc = configurar_estilos_juridicos(doc)
+            compilado = None
+            with DOCX_SEGUNDOS.medir(etapa="template"):
+                if template_path and os.path.exists(template_path):
+                    doc, compilado = self.templates.obter_compilado(template_path)
+                else:
+                    doc = Document()
+                    # Configurar estilos jurídicos padrão
+                    doc = configurar_estilos_juridicos(doc)
             
             # Adicionar numeração de páginas
             doc = adicionar_numeracao_paginas(doc)
@@ -328,9 +343,10 @@ class DocxGenerator:
             try:
                 cliente = self._obter_dados_cliente(cliente_id)
             except Exception as e:
-                print(f"Erro ao obter dados do cliente: {e}")
+                logger.error("Erro ao obter dados do cliente: %s", e)
             
-            print(f"Dados da petição recebidos: {dados_peticao}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Dados da petição recebidos: %s", resumir(dados_peticao), extra={"amostrar": True})
             
             # Preparar dados para substituição com valores padrão seguros
             dados_substituicao = {
@@ -379,7 +395,8 @@ class DocxGenerator:
                 if cliente_cnpj:
                     dados_substituicao['cliente_qualificacao'] = f"pessoa jurídica de direito privado, inscrita no CNPJ sob o nº {cliente_cnpj}"
             
-            print(f"Dados para substituição: {dados_substituicao}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Dados para substituição: %s", resumir(dados_substituicao), extra={"amostrar": True})
             
             # Substituir valores específicos do formulário se fornecidos
             if dados_peticao.get('nome_advogado'):
@@ -392,18 +409,27 @@ class DocxGenerator:
             try:
                 if cliente and isinstance(cliente, dict):
                     logo_path = cliente.get('logo_path')
+                    # Caminhos relativos do cadastro são relativos ao diretório da aplicação
+                    if logo_path and not os.path.exists(logo_path):
+                        logo_relativo = os.path.join(os.path.dirname(os.path.abspath(self.clientes_dir)), logo_path)
+                        if os.path.exists(logo_relativo):
+                            logo_path = logo_relativo
+                        else:
+                            logger.warning("Logo do cliente não encontrada: %s", logo_path)
+                            logo_path = None
                     if not logo_path:
                         logo_path = self._obter_logo_cliente(cliente.get('nome'))
             except Exception as e:
-                print(f"Erro ao obter logo do cliente: {e}")
+                logger.error("Erro ao obter logo do cliente: %s", e)
                 
             dados_substituicao['logo_path'] = logo_path
             
             # Substituir placeholders
             try:
-                doc = self._substituir_placeholders(doc, dados_substituicao)
+                with DOCX_SEGUNDOS.medir(etapa="placeholders"):
+                    doc = self._substituir_placeholders(doc, dados_substituicao, compilado)
             except Exception as e:
-                print(f"Erro ao substituir placeholders: {e}")
+                logger.error("Erro ao substituir placeholders: %s", e)
             
             # Definir o nome do arquivo
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -412,18 +438,83 @@ class DocxGenerator:
             # Usar o nome do cliente no nome do arquivo se disponível
             cliente_nome_sanitizado = re.sub(r'[^a-zA-Z0-9]', '_', dados_substituicao['cliente_nome'])
             
-            filename = f"{tipo_sanitizado}_{cliente_nome_sanitizado}_{timestamp}.docx"
-            filepath = os.path.join(self.peticoes_dir, filename)
+            # Serializar o documento em memória (o hash é calculado sem reler o arquivo)
+            with DOCX_SEGUNDOS.medir(etapa="salvar"):
+                conteudo = serializar_documento(doc)
+            DOCX_BYTES.inc(len(conteudo))
+            hash_conteudo = hashlib.sha256(conteudo).hexdigest()
             
-            # Salvar o documento
-            doc.save(filepath)
+            # O início do hash distingue documentos diferentes do mesmo cliente no mesmo segundo
+            filename = f"{tipo_sanitizado}_{cliente_nome_sanitizado}_{timestamp}_{hash_conteudo[:8]}.docx"
             
-            print(f"Documento DOCX gerado com sucesso: {filepath}")
+            return {
+                "nome": filename,
+                "conteudo": conteudo,
+                "hash": hash_conteudo,
+                "tipo": tipo,
+                "cliente_id": cliente_id,
+                "cliente_nome": dados_substituicao['cliente_nome']
+            }
             
-            return filepath
+        except Exception as e:
+            logger.exception("Erro ao gerar documento DOCX: %s", e)
+            raise e 
+    
+    def gravar_documento(self, documento):
+        """
+        Grava um documento renderizado e registra seus metadados no índice
+        
+        O conteúdo é armazenado pelo hash (um documento idêntico a outro já
+        gravado não é gravado de novo); o nome, o tipo, o cliente e o ID da
+        requisição ficam no registro do índice.
+        
+        Args:
+            documento: Dicionário retornado por renderizar_documento
             
+        Returns:
+            Caminho do documento armazenado (peticoes/objetos/ab/cd/<hash>.docx)
+        """
+        filepath, gravado = self.armazenamento.guardar(documento["conteudo"], documento["hash"])
+        if not gravado:
+            logger.info("Documento idêntico já armazenado, reutilizado: %s", documento["hash"])
+        
+        # Registrar os metadados no índice usado pela listagem de petições
+        id_requisicao = documento.get("id_requisicao") or id_correlacao.get()
+        try:
+            self.indice.registrar(
+                documento["nome"],
+                len(documento["conteudo"]),
+                documento["hash"],
+                tipo=documento.get("tipo"),
+                cliente_id=documento.get("cliente_id"),
+                cliente_nome=documento.get("cliente_nome"),
+                id_requisicao=None if id_requisicao == "-" else id_requisicao
+            )
         except Exception as e:
-            print(f"Erro ao gerar documento DOCX: {e}")
-            import traceback
-            traceback.print_exc()
-            raise e 
\ No newline at end of file
+            logger.error("Erro ao registrar petição no índice: %s", e)
+        
+        logger.info("Documento DOCX gerado com sucesso: %s (%s)", documento["nome"], filepath)
+        
+        return filepath
+    
+    def caminho_peticao(self, nome, registro=None):
+        """
+        Localiza o arquivo de uma petição pelo nome
+        
+        Procura o documento armazenado pelo hash registrado no índice e, para
+        petições gravadas antes do armazenamento por hash, o arquivo com o
+        próprio nome no diretório das petições.
+        
+        Args:
+            nome: Nome da petição (nome do arquivo de download)
+            registro: Registro do índice, se já consultado
+            
+        Returns:
+            Caminho do arquivo, ou None se não existir
+        """
+        registro = registro or self.indice.obter(nome)
+        if registro and self.armazenamento.existe(registro.get("hash")):
+            return self.armazenamento.caminho(registro["hash"])
+        
+        caminho = os.path.join(self.peticoes_dir, os.path.basename(nome))
+        return caminho if os.path.isfile(caminho) else None
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de verificação periódica da conectividade com a OpenAI
+"""
+
+import time
+import threading
+from datetime import datetime
+
+
+class MonitorSaude:
+    """
+    Verifica a conectividade com a OpenAI em segundo plano
+
+    O resultado da última verificação fica em memória, para que o endpoint
+    de status responda sem nenhuma chamada de rede.
+    """
+
+    def __init__(self, verificar, intervalo_segundos=30):
+        """
+        Inicializa o monitor
+
+        Args:
+            verificar: Função sem argumentos que lança exceção se a OpenAI estiver inacessível
+            intervalo_segundos: Intervalo entre verificações em segundo plano
+        """
+        self.verificar = verificar
+        self.intervalo_segundos = intervalo_segundos
+        self._resultado = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        """Inicia a thread de verificação, se ainda não estiver em execução"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name="monitor-saude", daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        """Interrompe a thread de verificação"""
+        self._parar.set()
+
+    def verificar_agora(self):
+        """Executa uma verificação síncrona e atualiza o resultado em memória"""
+        inicio = time.monotonic()
+        try:
+            self.verificar()
+            resultado = {"conectado": True, "erro": None}
+        except Exception as e:
+            resultado = {"conectado": False, "erro": str(e)}
+
+        resultado["latencia"] = round(time.monotonic() - inicio, 4)
+        resultado["verificado_em"] = time.time()
+        with self._lock:
+            self._resultado = resultado
+        return self.status()
+
+    def status(self):
+        """
+        Retorna o resultado da última verificação e a sua idade em segundos
+
+        Se nenhuma verificação foi concluída ainda, ``conectado`` é None.
+        """
+        with self._lock:
+            resultado = dict(self._resultado) if self._resultado else None
+
+        if not resultado:
+            return {
+                "conectado": None,
+                "erro": None,
+                "latencia": None,
+                "verificado_em": None,
+                "idade_segundos": None
+            }
+
+        verificado_em = resultado["verificado_em"]
+        resultado["verificado_em"] = datetime.fromtimestamp(verificado_em).isoformat()
+        resultado["idade_segundos"] = round(time.time() - verificado_em, 3)
+        return resultado
+
+    def _executar(self):
+        """Laço da thread de verificação"""
+        while not self._parar.is_set():
+            self.verificar_agora()
+            self._parar.wait(self.intervalo_segundos)
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de índice de metadados das petições geradas
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Nome do arquivo do índice, mantido no próprio diretório das petições
+INDICE_ARQUIVO = '.indice.sqlite3'
+
+# Colunas pelas quais a listagem pode ser ordenada (todas com índice)
+ORDENACOES = ("criado_em", "nome", "tamanho")
+
+COLUNAS = ("nome", "tipo", "cliente_id", "cliente_nome", "criado_em", "tamanho", "hash", "id_requisicao")
+
+
+def calcular_hash(caminho):
+    """Calcula o SHA-256 de um arquivo, lendo-o em blocos"""
+    resumo = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+class IndicePeticoes:
+    """
+    Índice SQLite das petições geradas (tipo, cliente, data, tamanho e hash)
+
+    É atualizado a cada documento gravado, de modo que a listagem percorre
+    apenas a página pedida, em vez de todo o diretório. A paginação usa
+    cursor (keyset): cada página continua a partir da última linha da
+    anterior, sem OFFSET.
+    """
+
+    def __init__(self, caminho):
+        """
+        Inicializa o índice, criando a tabela se necessário
+
+        Args:
+            caminho: Arquivo SQLite do índice (":memory:" para manter apenas em memória)
+        """
+        self.caminho = caminho
+        self._lock = threading.Lock()
+
+        if caminho != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+
+        self._conexao = sqlite3.connect(caminho, timeout=10, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        with self._lock, self._conexao:
+            if caminho != ":memory:":
+                self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS peticoes (
+                    nome TEXT PRIMARY KEY,
+                    tipo TEXT COLLATE NOCASE,
+                    cliente_id TEXT,
+                    cliente_nome TEXT,
+                    criado_em REAL NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    hash TEXT,
+                    id_requisicao TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_peticoes_criado_em ON peticoes (criado_em, nome);
+                CREATE INDEX IF NOT EXISTS idx_peticoes_tamanho ON peticoes (tamanho, nome);
+                CREATE INDEX IF NOT EXISTS idx_peticoes_cliente_id ON peticoes (cliente_id, criado_em);
+                CREATE INDEX IF NOT EXISTS idx_peticoes_cliente_nome ON peticoes (cliente_nome, criado_em);
+                CREATE INDEX IF NOT EXISTS idx_peticoes_tipo ON peticoes (tipo, criado_em);
+                """
+            )
+            # Bancos criados antes da coluna id_requisicao
+            colunas = {linha[1] for linha in self._conexao.execute("PRAGMA table_info(peticoes)")}
+            if "id_requisicao" not in colunas:
+                self._conexao.execute("ALTER TABLE peticoes ADD COLUMN id_requisicao TEXT")
+            self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_peticoes_hash ON peticoes (hash)")
+
+    def registrar(self, nome, tamanho, hash_conteudo, tipo=None, cliente_id=None, cliente_nome=None, criado_em=None,
+                  id_requisicao=None):
+        """Registra (ou atualiza) os metadados de uma petição gravada"""
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                f"INSERT OR REPLACE INTO peticoes ({', '.join(COLUNAS)}) VALUES ({', '.join('?' * len(COLUNAS))})",
+                (nome, tipo, None if cliente_id is None else str(cliente_id), cliente_nome,
+                 criado_em or time.time(), tamanho, hash_conteudo, id_requisicao)
+            )
+
+    def remover(self, nome):
+        """Remove a petição do índice"""
+        with self._lock, self._conexao:
+            self._conexao.execute("DELETE FROM peticoes WHERE nome = ?", (nome,))
+
+    def obter(self, nome):
+        """Retorna os metadados da petição, ou None"""
+        with self._lock:
+            linha = self._conexao.execute(
+                f"SELECT {', '.join(COLUNAS)} FROM peticoes WHERE nome = ?", (nome,)
+            ).fetchone()
+        return dict(linha) if linha else None
+
+    def listar(self, limite=50, cursor=None, cliente=None, tipo=None, desde=None, ate=None,
+               ordenar="criado_em", decrescente=True):
+        """
+        Lista uma página de petições
+
+        Args:
+            limite: Número máximo de itens da página
+            cursor: Cursor retornado pela página anterior
+            cliente: ID ou nome do cliente
+            tipo: Tipo da petição (sem diferenciar maiúsculas)
+            desde: Timestamp mínimo de criação (inclusive)
+            ate: Timestamp máximo de criação (inclusive)
+            ordenar: Coluna de ordenação (ver ORDENACOES)
+            decrescente: Ordem decrescente (padrão) ou crescente
+
+        Returns:
+            Tupla (itens, cursor da próxima página ou None)
+
+        Raises:
+            ValueError: Ordenação ou cursor inválidos
+        """
+        if ordenar not in ORDENACOES:
+            raise ValueError(f"Ordenação inválida: {ordenar}. Use uma de: {', '.join(ORDENACOES)}")
+
+        condicoes = []
+        parametros = []
+        if cliente:
+            condicoes.append("(cliente_id = ? OR cliente_nome = ?)")
+            parametros.extend([str(cliente), cliente])
+        if tipo:
+            condicoes.append("tipo = ?")
+            parametros.append(tipo)
+        if desde is not None:
+            condicoes.append("criado_em >= ?")
+            parametros.append(desde)
+        if ate is not None:
+            condicoes.append("criado_em <= ?")
+            parametros.append(ate)
+        if cursor:
+            valor, nome = self._ler_cursor(cursor)
+            if ordenar == "nome":
+                condicoes.append(f"nome {'<' if decrescente else '>'} ?")
+                parametros.append(nome)
+            else:
+                condicoes.append(f"({ordenar}, nome) {'<' if decrescente else '>'} (?, ?)")
+                parametros.extend([valor, nome])
+
+        direcao = "DESC" if decrescente else "ASC"
+        ordem = f"nome {direcao}" if ordenar == "nome" else f"{ordenar} {direcao}, nome {direcao}"
+        sql = f"SELECT {', '.join(COLUNAS)} FROM peticoes"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        sql += f" ORDER BY {ordem} LIMIT ?"
+        parametros.append(limite + 1)
+
+        with self._lock:
+            linhas = self._conexao.execute(sql, parametros).fetchall()
+
+        itens = [dict(linha) for linha in linhas[:limite]]
+        proximo = None
+        if len(linhas) > limite and itens:
+            ultimo = itens[-1]
+            proximo = self._criar_cursor(ultimo[ordenar], ultimo["nome"])
+        return itens, proximo
+
+    def sincronizar(self, diretorio, armazenamento=None):
+        """
+        Inclui no índice os arquivos .docx que ainda não estão nele e remove
+        os registros de arquivos que não existem mais
+
+        Usado para indexar petições geradas antes da existência do índice;
+        para elas, tipo e cliente ficam em branco e a data é a de modificação.
+        Com um ArmazenamentoPeticoes, os registros cujo documento está
+        armazenado pelo hash são mantidos mesmo sem arquivo no diretório.
+
+        Returns:
+            Tupla (incluídos, removidos)
+        """
+        # Ler o índice antes do diretório: um arquivo gravado durante a
+        # varredura aparece no diretório, mas nunca é removido por engano
+        with self._lock:
+            indexados = dict(self._conexao.execute("SELECT nome, hash FROM peticoes").fetchall())
+
+        arquivos = {}
+        with os.scandir(diretorio) as entradas:
+            for entrada in entradas:
+                # Arquivos ~$ são travas temporárias do Word, não petições
+                if entrada.name.endswith('.docx') and not entrada.name.startswith('~$') and entrada.is_file():
+                    arquivos[entrada.name] = entrada
+
+        incluidos = 0
+        for nome, entrada in arquivos.items():
+            if nome in indexados:
+                continue
+            try:
+                estado = entrada.stat()
+                hash_conteudo = calcular_hash(entrada.path)
+            except OSError as e:
+                logger.warning("Não foi possível indexar %s: %s", entrada.path, e)
+                continue
+            with self._lock, self._conexao:
+                cursor = self._conexao.execute(
+                    "INSERT OR IGNORE INTO peticoes (nome, criado_em, tamanho, hash) VALUES (?, ?, ?, ?)",
+                    (nome, estado.st_mtime, estado.st_size, hash_conteudo)
+                )
+            incluidos += cursor.rowcount
+
+        ausentes = [(nome,) for nome, hash_conteudo in indexados.items()
+                    if nome not in arquivos and not (armazenamento and armazenamento.existe(hash_conteudo))]
+        if ausentes:
+            with self._lock, self._conexao:
+                self._conexao.executemany("DELETE FROM peticoes WHERE nome = ?", ausentes)
+
+        if incluidos or ausentes:
+            logger.info("Índice de petições sincronizado: %s incluída(s), %s removida(s)", incluidos, len(ausentes))
+        return incluidos, len(ausentes)
+
+    @staticmethod
+    def _criar_cursor(valor, nome):
+        dados = json.dumps([valor, nome], ensure_ascii=False).encode('utf-8')
+        return base64.urlsafe_b64encode(dados).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def _ler_cursor(cursor):
+        try:
+            dados = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            valor, nome = json.loads(dados.decode('utf-8'))
+        except (ValueError, TypeError) as e:
+            raise ValueError("Cursor inválido") from e
+        return valor, nome
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo para execução assíncrona de tarefas de geração de petições
+"""
+
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Estados possíveis de um job
+ESTADO_PENDENTE = "pendente"
+ESTADO_EXECUTANDO = "executando"
+ESTADO_CONCLUIDO = "concluido"
+ESTADO_ERRO = "erro"
+
+
+class FilaCheiaError(Exception):
+    """Erro lançado quando a fila de jobs atingiu o limite de pendências"""
+    pass
+
+
+class Job:
+    """Representa uma tarefa de geração executada em segundo plano"""
+
+    def __init__(self, job_id, descricao=None):
+        """Inicializa o job no estado pendente"""
+        self.id = job_id
+        self.descricao = descricao
+        self.estado = ESTADO_PENDENTE
+        self.criado_em = time.time()
+        self.iniciado_em = None
+        self.finalizado_em = None
+        self.etapas = []
+        self.resultado = None
+        self.erro = None
+        self.eventos = []
+        self._lock = threading.Lock()
+        self._novo_evento = threading.Condition(self._lock)
+
+    @property
+    def finalizado(self):
+        """Indica se o job já terminou, com sucesso ou erro"""
+        return self.estado in (ESTADO_CONCLUIDO, ESTADO_ERRO)
+
+    def emitir(self, evento, dados=None):
+        """Registra um evento de progresso e acorda os consumidores em espera"""
+        with self._novo_evento:
+            self._registrar_evento(evento, dados)
+
+    def finalizar(self, estado, evento, dados=None):
+        """Muda o job para um estado final emitindo o último evento de forma atômica"""
+        with self._novo_evento:
+            self.finalizado_em = time.time()
+            self.estado = estado
+            self._registrar_evento(evento, dados)
+
+    def _registrar_evento(self, evento, dados):
+        """Adiciona o evento à lista; deve ser chamado com o lock adquirido"""
+        self.eventos.append({
+            "id": len(self.eventos),
+            "evento": evento,
+            "dados": dados or {},
+            "timestamp": time.time()
+        })
+        self._novo_evento.notify_all()
+
+    def aguardar_eventos(self, a_partir_de=0, timeout=None):
+        """
+        Retorna os eventos com índice a partir de ``a_partir_de``
+
+        Bloqueia até que haja algum evento novo, o job finalize ou o
+        timeout expire (nesse caso retorna uma lista vazia).
+        """
+        with self._novo_evento:
+            self._novo_evento.wait_for(
+                lambda: len(self.eventos) > a_partir_de or self.finalizado,
+                timeout=timeout
+            )
+            return self.eventos[a_partir_de:]
+
+    @contextmanager
+    def etapa(self, nome):
+        """Registra a duração de uma etapa do processamento"""
+        registro = {"nome": nome, "inicio": time.time(), "duracao": None}
+        with self._lock:
+            self.etapas.append(registro)
+        self.emitir("etapa_iniciada", {"etapa": nome})
+        try:
+            yield registro
+        finally:
+            registro["duracao"] = round(time.time() - registro["inicio"], 4)
+            self.emitir("etapa_concluida", {"etapa": nome, "duracao": registro["duracao"]})
+
+    def to_dict(self):
+        """Converte o job para um dicionário serializável em JSON"""
+        with self._lock:
+            etapas = [
+                {
+                    "nome": etapa["nome"],
+                    "inicio": datetime.fromtimestamp(etapa["inicio"]).isoformat(),
+                    "duracao": etapa["duracao"]
+                }
+                for etapa in self.etapas
+            ]
+
+        fim = self.finalizado_em or time.time()
+        return {
+            "job_id": self.id,
+            "descricao": self.descricao,
+            "estado": self.estado,
+            "criado_em": datetime.fromtimestamp(self.criado_em).isoformat(),
+            "iniciado_em": datetime.fromtimestamp(self.iniciado_em).isoformat() if self.iniciado_em else None,
+            "finalizado_em": datetime.fromtimestamp(self.finalizado_em).isoformat() if self.finalizado_em else None,
+            "tempo_fila": round((self.iniciado_em or fim) - self.criado_em, 4),
+            "tempo_execucao": round(fim - self.iniciado_em, 4) if self.iniciado_em else None,
+            "etapas": etapas,
+            "resultado": self.resultado,
+            "erro": self.erro
+        }
+
+
+class GerenciadorJobs:
+    """Fila de jobs com um pool limitado de workers"""
+
+    def __init__(self, max_workers=4, max_pendentes=100, ttl_segundos=3600):
+        """
+        Inicializa o gerenciador de jobs
+
+        Args:
+            max_workers: Número máximo de jobs executados em paralelo
+            max_pendentes: Número máximo de jobs aguardando ou em execução
+            ttl_segundos: Tempo que um job finalizado permanece consultável
+        """
+        self.max_workers = max_workers
+        self.max_pendentes = max_pendentes
+        self.ttl_segundos = ttl_segundos
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-peticao")
+
+        # Remove os jobs expirados mesmo quando nenhum job novo é submetido
+        self._parar = threading.Event()
+        self._limpeza = threading.Thread(target=self._limpar_periodicamente, name="job-limpeza", daemon=True)
+        self._limpeza.start()
+
+    def submeter(self, funcao, *args, descricao=None, **kwargs):
+        """
+        Enfileira uma função para execução em segundo plano
+
+        A função recebe o próprio job como argumento nomeado ``job`` para
+        que possa registrar as etapas do processamento.
+
+        Returns:
+            Job criado
+
+        Raises:
+            FilaCheiaError: se o limite de jobs pendentes foi atingido
+        """
+        self._remover_expirados()
+
+        with self._lock:
+            ativos = sum(1 for job in self._jobs.values()
+                         if job.estado in (ESTADO_PENDENTE, ESTADO_EXECUTANDO))
+            if ativos >= self.max_pendentes:
+                raise FilaCheiaError(f"Limite de {self.max_pendentes} jobs pendentes atingido")
+
+            job = Job(uuid.uuid4().hex, descricao)
+            self._jobs[job.id] = job
+
+        # O job herda o contexto da requisição (ex.: ID de correlação dos logs)
+        self._executor.submit(contextvars.copy_context().run, self._executar, job, funcao, args, kwargs)
+        return job
+
+    def obter(self, job_id):
+        """Obtém um job pelo ID (None se não existir ou já tiver expirado)"""
+        limite = time.time() - self.ttl_segundos
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.finalizado_em and job.finalizado_em < limite:
+                del self._jobs[job_id]
+                return None
+            return job
+
+    def estatisticas(self):
+        """Retorna a quantidade de jobs em cada estado"""
+        self._remover_expirados()
+        with self._lock:
+            contagem = {}
+            for job in self._jobs.values():
+                contagem[job.estado] = contagem.get(job.estado, 0) + 1
+        return contagem
+
+    def encerrar(self, aguardar=True):
+        """Encerra o pool de workers e a limpeza periódica"""
+        self._parar.set()
+        self._executor.shutdown(wait=aguardar)
+
+    def _executar(self, job, funcao, args, kwargs):
+        """Executa a função do job registrando estado e resultado"""
+        job.estado = ESTADO_EXECUTANDO
+        job.iniciado_em = time.time()
+        job.emitir("iniciado", {"job_id": job.id})
+        try:
+            job.resultado = funcao(*args, job=job, **kwargs)
+            job.finalizar(ESTADO_CONCLUIDO, "concluido", job.resultado)
+        except Exception as e:
+            logger.exception("Erro ao executar job %s: %s", job.id, e)
+            job.erro = getattr(e, 'payload', None) or {
+                "error": "Erro ao executar job",
+                "message": str(e)
+            }
+            job.finalizar(ESTADO_ERRO, "erro", job.erro)
+
+    def _remover_expirados(self):
+        """Remove jobs finalizados há mais tempo que o TTL"""
+        limite = time.time() - self.ttl_segundos
+        with self._lock:
+            expirados = [job_id for job_id, job in self._jobs.items()
+                         if job.finalizado_em and job.finalizado_em < limite]
+            for job_id in expirados:
+                del self._jobs[job_id]
+
+    def _limpar_periodicamente(self):
+        """Laço da thread de limpeza: remove os jobs expirados a cada fração do TTL"""
+        intervalo = min(max(self.ttl_segundos / 2, 0.1), 60)
+        while not self._parar.wait(intervalo):
+            try:
+                self._remover_expirados()
+            except Exception as e:
+                logger.error("Erro ao remover jobs expirados: %s", e)
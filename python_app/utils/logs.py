@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de configuração do logging estruturado e não bloqueante
+"""
+
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import contextvars
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+# ID de correlação da requisição em andamento (propagado aos jobs e chamadas auxiliares)
+id_correlacao = contextvars.ContextVar("id_correlacao", default="-")
+
+# Atributos padrão de LogRecord, que não são repetidos como campos extras
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "id_correlacao"}
+
+_listener = None
+
+
+def resumir(valor, limite=None):
+    """
+    Trunca textos longos para o log, indicando quantos caracteres foram omitidos
+
+    Args:
+        valor: Valor a registrar (convertido para texto)
+        limite: Número máximo de caracteres (padrão: variável LOG_MAX_CARACTERES, 200)
+    """
+    if limite is None:
+        limite = int(os.getenv("LOG_MAX_CARACTERES", 200))
+    texto = valor if isinstance(valor, str) else str(valor)
+    if len(texto) <= limite:
+        return texto
+    return f"{texto[:limite]}... (+{len(texto) - limite} caracteres)"
+
+
+class FiltroCorrelacao(logging.Filter):
+    """Adiciona o ID de correlação da requisição a cada registro"""
+
+    def filter(self, record):
+        record.id_correlacao = id_correlacao.get()
+        return True
+
+
+class FiltroAmostragem(logging.Filter):
+    """
+    Descarta parte dos registros marcados com ``extra={"amostrar": True}``
+
+    Usado para mensagens com payloads grandes e frequentes, que só precisam
+    ser vistas em uma fração das requisições.
+    """
+
+    def __init__(self, taxa=1.0):
+        super().__init__()
+        self.taxa = taxa
+
+    def filter(self, record):
+        if getattr(record, "amostrar", False) and self.taxa < 1.0:
+            return random.random() < self.taxa
+        return True
+
+
+class FormatadorJSON(logging.Formatter):
+    """Formata cada registro como um objeto JSON em uma linha"""
+
+    def format(self, record):
+        dados = {
+            "momento": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "id_correlacao": getattr(record, "id_correlacao", "-"),
+            "mensagem": record.getMessage()
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO and chave != "amostrar":
+                dados[chave] = valor
+        if record.exc_info:
+            dados["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+def configurar_logging():
+    """
+    Configura o logging da aplicação a partir das variáveis LOG_*
+
+    Os registros são colocados em uma fila e gravados por uma thread
+    separada, de modo que a requisição nunca espera pela escrita no
+    stdout. Chamadas repetidas não têm efeito.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    if os.getenv("LOG_FORMATO", "texto") == "json":
+        formatador = FormatadorJSON()
+    else:
+        formatador = logging.Formatter(
+            "%(asctime)s %(levelname)s [%(id_correlacao)s] %(name)s: %(message)s"
+        )
+
+    saida = logging.StreamHandler(sys.stdout)
+    saida.setFormatter(formatador)
+
+    fila = queue.Queue(-1)
+    handler_fila = QueueHandler(fila)
+    handler_fila.addFilter(FiltroCorrelacao())
+    handler_fila.addFilter(FiltroAmostragem(float(os.getenv("LOG_AMOSTRAGEM", 1.0))))
+
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(handler_fila)
+    raiz.setLevel(os.getenv("LOG_NIVEL", "INFO").upper())
+
+    _listener = QueueListener(fila, saida, respect_handler_level=True)
+    _listener.start()
+    atexit.register(encerrar_logging)
+
+
+def encerrar_logging():
+    """Grava os registros pendentes e encerra a thread de escrita"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de geração de petições em lote
+"""
+
+import io
+import os
+import json
+import atexit
+import logging
+import zipfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .docx_generator import DocxGenerator
+
+logger = logging.getLogger(__name__)
+
+# Número máximo de linhas aceitas em um lote
+LIMITE_LINHAS_LOTE = int(os.getenv("LOTE_LIMITE_LINHAS", "500"))
+
+# Número mínimo de linhas para usar o pool de processos; abaixo disso, o custo de
+# distribuir as linhas supera o ganho e o lote é renderizado no próprio processo
+MIN_LINHAS_PROCESSOS = int(os.getenv("LOTE_MIN_LINHAS_PROCESSOS", "50"))
+
+# Nomes curtos aceitos nas linhas do lote -> nomes usados pelo DocxGenerator
+CAMPOS_TEXTO = {
+    "fatos": "fatos_texto",
+    "fundamentos": "argumentos_texto",
+    "argumentos": "argumentos_texto",
+    "pedidos": "pedidos_texto"
+}
+
+# Nome do manifesto incluído no ZIP
+MANIFESTO_ARQUIVO = "manifesto.json"
+
+# Gerador de cada processo do pool: template e cadastro de clientes carregados uma vez por processo
+_gerador = None
+
+# Pool de processos compartilhado pelos lotes deste processo, criado no primeiro lote grande
+_pool = None
+_pool_diretorios = None
+_pool_lock = threading.Lock()
+
+
+def preparar_linha(linha, comum=None):
+    """
+    Combina os campos comuns do lote com os da linha (a linha prevalece)
+
+    Aceita os nomes curtos fatos/fundamentos/argumentos/pedidos, além dos
+    nomes fatos_texto/argumentos_texto/pedidos_texto.
+    """
+    if not isinstance(linha, dict):
+        raise ValueError("Cada linha do lote deve ser um objeto")
+    dados = dict(comum or {})
+    dados.update(linha)
+    for origem, destino in CAMPOS_TEXTO.items():
+        if origem in dados:
+            valor = dados.pop(origem)
+            dados.setdefault(destino, valor)
+    return dados
+
+
+def _inicializar_processo(templates_dir, peticoes_dir, clientes_dir):
+    global _gerador
+    _gerador = DocxGenerator(templates_dir, peticoes_dir, clientes_dir)
+
+
+def _renderizar(gerador, tipo, indice, dados):
+    try:
+        return indice, gerador.renderizar_documento(tipo, dados), None
+    except Exception as e:
+        return indice, None, str(e)
+
+
+def _renderizar_no_processo(tarefa):
+    return _renderizar(_gerador, *tarefa)
+
+
+def _processos_padrao():
+    return int(os.getenv("LOTE_PROCESSOS", "0")) or os.cpu_count() or 1
+
+
+def _obter_pool(gerador, processos):
+    """
+    Retorna o pool de processos deste processo, criando-o no primeiro uso
+
+    O pool é mantido entre os lotes (os processos já têm o template
+    interpretado e o cadastro aberto) e encerrado na saída do processo. O
+    número de processos é definido na criação.
+    """
+    global _pool, _pool_diretorios
+    diretorios = (gerador.templates_dir, gerador.peticoes_dir, gerador.clientes_dir)
+    with _pool_lock:
+        if _pool is not None and _pool_diretorios != diretorios:
+            _pool.shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            # spawn evita herdar threads e travas do servidor (fila de logs, pools de conexão)
+            _pool = ProcessPoolExecutor(
+                max_workers=processos,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_inicializar_processo,
+                initargs=diretorios
+            )
+            _pool_diretorios = diretorios
+            logger.info("Pool de lotes criado com %s processo(s)", processos)
+        return _pool
+
+
+def _descartar_pool(pool):
+    """Descarta um pool inutilizado (processo encerrado abruptamente); o próximo lote cria outro"""
+    global _pool, _pool_diretorios
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            _pool_diretorios = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def encerrar_pool():
+    """Encerra o pool de processos dos lotes, se tiver sido criado"""
+    global _pool, _pool_diretorios
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+            _pool_diretorios = None
+
+
+atexit.register(encerrar_pool)
+
+
+def validar_lote(linhas):
+    """
+    Verifica o tamanho do lote e o formato das linhas, sem renderizar
+
+    Raises:
+        ValueError: Lote vazio, grande demais ou com linhas inválidas
+    """
+    if not linhas:
+        raise ValueError("O lote não contém linhas")
+    if len(linhas) > LIMITE_LINHAS_LOTE:
+        raise ValueError(f"O lote excede o limite de {LIMITE_LINHAS_LOTE} linhas")
+    if not all(isinstance(linha, dict) for linha in linhas):
+        raise ValueError("Cada linha do lote deve ser um objeto")
+
+
+def renderizar_lote(gerador, tipo, linhas, comum=None, processos=None):
+    """
+    Renderiza um documento por linha, com o mesmo tipo de petição
+
+    Lotes com pelo menos MIN_LINHAS_PROCESSOS linhas são distribuídos no
+    pool de processos, mantido entre os lotes; cada processo interpreta o
+    template e carrega o cadastro de clientes uma única vez. Lotes menores,
+    ou com um único processo disponível, usam o próprio gerador (e seus
+    caches).
+
+    Args:
+        gerador: DocxGenerator da aplicação
+        tipo: Tipo da petição
+        linhas: Dados de cada petição (ver preparar_linha)
+        comum: Campos aplicados a todas as linhas (opcional)
+        processos: Tamanho do pool, se ele ainda não existir (padrão: LOTE_PROCESSOS
+            ou número de CPUs); 1 renderiza sempre no próprio processo
+
+    Returns:
+        Lista, na ordem das linhas, de tuplas (índice, documento ou None, erro ou None)
+
+    Raises:
+        ValueError: Lote vazio, grande demais ou com linhas inválidas
+    """
+    validar_lote(linhas)
+
+    tarefas = [(tipo, indice, preparar_linha(linha, comum)) for indice, linha in enumerate(linhas)]
+    processos = max(1, int(processos or _processos_padrao()))
+    if len(tarefas) < MIN_LINHAS_PROCESSOS:
+        processos = 1
+    logger.info("Renderizando lote de %s petição(ões) '%s' em %s processo(s)", len(tarefas), tipo, processos)
+
+    if processos == 1:
+        resultados = [_renderizar(gerador, *tarefa) for tarefa in tarefas]
+    else:
+        pool = _obter_pool(gerador, processos)
+        try:
+            resultados = list(pool.map(
+                _renderizar_no_processo, tarefas, chunksize=max(1, len(tarefas) // (processos * 4))
+            ))
+        except BrokenProcessPool:
+            _descartar_pool(pool)
+            raise
+
+    _tornar_nomes_unicos(resultados)
+    erros = sum(1 for _, _, erro in resultados if erro)
+    if erros:
+        logger.warning("Lote '%s' concluído com %s erro(s) em %s linha(s)", tipo, erros, len(resultados))
+    return resultados
+
+
+def _tornar_nomes_unicos(resultados):
+    """Numera os arquivos com o mesmo nome (mesmo cliente no mesmo segundo)"""
+    usados = set()
+    for _, documento, _ in resultados:
+        if documento is None:
+            continue
+        base, extensao = os.path.splitext(documento["nome"])
+        nome = documento["nome"]
+        sequencia = 2
+        while nome in usados:
+            nome = f"{base}_{sequencia}{extensao}"
+            sequencia += 1
+        usados.add(nome)
+        documento["nome"] = nome
+
+
+def _item_manifesto(indice, documento, erro):
+    if documento is None:
+        return {"linha": indice, "erro": erro}
+    return {
+        "linha": indice,
+        "arquivo": documento["nome"],
+        "tamanho": len(documento["conteudo"]),
+        "hash": documento["hash"],
+        "cliente_id": documento["cliente_id"],
+        "cliente_nome": documento["cliente_nome"]
+    }
+
+
+def empacotar_zip(resultados):
+    """
+    Monta um ZIP em memória com os documentos e o manifesto do lote
+
+    Returns:
+        Bytes do arquivo ZIP
+    """
+    buffer = io.BytesIO()
+    # Um DOCX já é um ZIP comprimido; armazenar sem recomprimir
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as arquivo_zip:
+        for _, documento, _ in resultados:
+            if documento is not None:
+                arquivo_zip.writestr(documento["nome"], documento["conteudo"])
+        manifesto = [_item_manifesto(*resultado) for resultado in resultados]
+        arquivo_zip.writestr(MANIFESTO_ARQUIVO, json.dumps(manifesto, ensure_ascii=False, indent=2))
+    return buffer.getvalue()
+
+
+def gravar_lote(gerador, resultados):
+    """
+    Grava os documentos do lote no diretório das petições (e no índice)
+
+    Returns:
+        Manifesto: lista com arquivo, tamanho, hash e cliente (ou erro) de cada linha
+    """
+    manifesto = []
+    for indice, documento, erro in resultados:
+        if documento is not None:
+            try:
+                gerador.gravar_documento(documento)
+            except OSError as e:
+                logger.error("Erro ao gravar %s: %s", documento["nome"], e)
+                documento, erro = None, str(e)
+        manifesto.append(_item_manifesto(indice, documento, erro))
+    return manifesto
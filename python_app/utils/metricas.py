@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de métricas da aplicação no formato de exposição do Prometheus
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+
+# Limites padrão dos histogramas de duração, em segundos
+LIMITES_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _formatar_valor(valor):
+    """Formata um número como no formato de texto do Prometheus"""
+    if valor == float("inf"):
+        return "+Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+def _formatar_rotulos(nomes, valores, extra=None):
+    """Formata os rótulos de uma série, ex.: {tipo="chat",le="0.5"}"""
+    pares = list(zip(nomes, valores))
+    if extra:
+        pares.append(extra)
+    if not pares:
+        return ""
+    conteudo = ",".join(
+        '{}="{}"'.format(nome, str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for nome, valor in pares
+    )
+    return "{" + conteudo + "}"
+
+
+class Metrica:
+    """Base das métricas: nome, descrição, rótulos e séries por combinação de rótulos"""
+
+    tipo = None
+
+    def __init__(self, nome, descricao, rotulos=()):
+        """
+        Inicializa a métrica
+
+        Args:
+            nome: Nome da métrica no Prometheus
+            descricao: Texto de ajuda exibido em # HELP
+            rotulos: Nomes dos rótulos aceitos pela métrica
+        """
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _chave(self, rotulos):
+        """Converte os rótulos informados na chave da série"""
+        if set(rotulos) != set(self.rotulos):
+            raise ValueError(f"A métrica {self.nome} espera os rótulos {self.rotulos}, recebeu {tuple(rotulos)}")
+        return tuple(str(rotulos[nome]) for nome in self.rotulos)
+
+    def exportar(self):
+        """Retorna as linhas da métrica no formato de texto do Prometheus"""
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+        with self._lock:
+            series = {chave: self._copiar(valor) for chave, valor in self._series.items()}
+        for chave in sorted(series):
+            linhas.extend(self._exportar_serie(chave, series[chave]))
+        return linhas
+
+    def _copiar(self, valor):
+        return valor
+
+    def _exportar_serie(self, chave, valor):
+        raise NotImplementedError
+
+
+class Contador(Metrica):
+    """Contador monotônico"""
+
+    tipo = "counter"
+
+    def inc(self, valor=1, **rotulos):
+        """Incrementa o contador da série indicada pelos rótulos"""
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._series[chave] = self._series.get(chave, 0) + valor
+
+    def valor(self, **rotulos):
+        """Retorna o valor atual da série"""
+        with self._lock:
+            return self._series.get(self._chave(rotulos), 0)
+
+    def _exportar_serie(self, chave, valor):
+        return [f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_valor(valor)}"]
+
+
+class Histograma(Metrica):
+    """Histograma com limites fixos, soma e contagem"""
+
+    tipo = "histogram"
+
+    def __init__(self, nome, descricao, rotulos=(), limites=LIMITES_DURACAO):
+        """
+        Inicializa o histograma
+
+        Args:
+            nome: Nome da métrica no Prometheus
+            descricao: Texto de ajuda exibido em # HELP
+            rotulos: Nomes dos rótulos aceitos pela métrica
+            limites: Limites superiores dos buckets, em ordem crescente
+        """
+        super().__init__(nome, descricao, rotulos)
+        self.limites = tuple(sorted(limites))
+
+    def observar(self, valor, **rotulos):
+        """Registra uma observação na série indicada pelos rótulos"""
+        chave = self._chave(rotulos)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = {"buckets": [0] * len(self.limites), "soma": 0.0, "contagem": 0}
+                self._series[chave] = serie
+            for indice, limite in enumerate(self.limites):
+                if valor <= limite:
+                    serie["buckets"][indice] += 1
+                    break
+            serie["soma"] += valor
+            serie["contagem"] += 1
+
+    @contextmanager
+    def medir(self, **rotulos):
+        """Registra a duração do bloco, em segundos, inclusive quando ele lança exceção"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **rotulos)
+
+    def contagem(self, **rotulos):
+        """Retorna o número de observações da série"""
+        with self._lock:
+            serie = self._series.get(self._chave(rotulos))
+            return serie["contagem"] if serie else 0
+
+    def _copiar(self, valor):
+        return {"buckets": list(valor["buckets"]), "soma": valor["soma"], "contagem": valor["contagem"]}
+
+    def _exportar_serie(self, chave, valor):
+        linhas = []
+        acumulado = 0
+        for limite, quantidade in zip(self.limites, valor["buckets"]):
+            acumulado += quantidade
+            rotulos = _formatar_rotulos(self.rotulos, chave, ("le", _formatar_valor(limite)))
+            linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+        rotulos_inf = _formatar_rotulos(self.rotulos, chave, ("le", "+Inf"))
+        linhas.append(f"{self.nome}_bucket{rotulos_inf} {valor['contagem']}")
+        rotulos = _formatar_rotulos(self.rotulos, chave)
+        linhas.append(f"{self.nome}_sum{rotulos} {_formatar_valor(valor['soma'])}")
+        linhas.append(f"{self.nome}_count{rotulos} {valor['contagem']}")
+        return linhas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas exportadas pelo endpoint /metrics"""
+
+    def __init__(self):
+        """Inicializa o registro vazio"""
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, metrica):
+        with self._lock:
+            existente = self._metricas.get(metrica.nome)
+            if existente is not None:
+                return existente
+            self._metricas[metrica.nome] = metrica
+            return metrica
+
+    def contador(self, nome, descricao, rotulos=()):
+        """Cria (ou obtém, se já existir) um contador"""
+        return self._registrar(Contador(nome, descricao, rotulos))
+
+    def histograma(self, nome, descricao, rotulos=(), limites=LIMITES_DURACAO):
+        """Cria (ou obtém, se já existir) um histograma"""
+        return self._registrar(Histograma(nome, descricao, rotulos, limites))
+
+    def exportar(self):
+        """Retorna todas as métricas no formato de texto do Prometheus"""
+        with self._lock:
+            metricas = list(self._metricas.values())
+        linhas = []
+        for metrica in metricas:
+            linhas.extend(metrica.exportar())
+        return "\n".join(linhas) + "\n"
+
+
+# Registro do processo e métricas usadas pela aplicação
+registro = RegistroMetricas()
+
+REQUISICAO_SEGUNDOS = registro.histograma(
+    "peticoes_http_requisicao_segundos",
+    "Duração das requisições HTTP, por método, rota e status",
+    ("metodo", "rota", "status")
+)
+ETAPA_SEGUNDOS = registro.histograma(
+    "peticoes_etapa_segundos",
+    "Duração de cada etapa da geração de petições",
+    ("etapa",)
+)
+OPENAI_CHAMADA_SEGUNDOS = registro.histograma(
+    "peticoes_openai_chamada_segundos",
+    "Duração das chamadas à OpenAI, por tipo",
+    ("tipo",)
+)
+OPENAI_CONSULTAS_RUN = registro.histograma(
+    "peticoes_openai_consultas_run",
+    "Consultas de status feitas até a conclusão de cada run do assistente",
+    limites=(1, 2, 3, 5, 8, 13, 21, 34, 55)
+)
+CACHE_CONSULTAS = registro.contador(
+    "peticoes_cache_consultas_total",
+    "Consultas ao cache de gerações, por resultado (acerto ou falha)",
+    ("resultado",)
+)
+DOCX_SEGUNDOS = registro.histograma(
+    "peticoes_docx_segundos",
+    "Duração das etapas de renderização do DOCX (template, placeholders, salvar)",
+    ("etapa",)
+)
+DOCX_BYTES = registro.contador(
+    "peticoes_docx_bytes_escritos_total",
+    "Bytes gravados em documentos DOCX gerados"
+)
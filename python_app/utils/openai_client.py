@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Registro de clientes OpenAI compartilhados pelo processo
+"""
+
+import os
+import logging
+import threading
+
+import httpx
+from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+_clientes = {}
+_http_clients = {}
+_lock = threading.Lock()
+
+
+def _desativar_proxies():
+    """Remove configurações de proxy que podem estar causando problemas"""
+    os.environ.pop('HTTP_PROXY', None)
+    os.environ.pop('HTTPS_PROXY', None)
+    os.environ.pop('http_proxy', None)
+    os.environ.pop('https_proxy', None)
+
+
+def _criar_http_client():
+    """Cria o cliente httpx com pool de conexões configurado pelas variáveis OPENAI_HTTP_*"""
+    limites = httpx.Limits(
+        max_connections=int(os.getenv("OPENAI_HTTP_MAX_CONEXOES", 20)),
+        max_keepalive_connections=int(os.getenv("OPENAI_HTTP_MAX_KEEPALIVE", 10)),
+        keepalive_expiry=float(os.getenv("OPENAI_HTTP_KEEPALIVE_SEGUNDOS", 60))
+    )
+    timeout = httpx.Timeout(
+        float(os.getenv("OPENAI_HTTP_TIMEOUT", 120)),
+        connect=float(os.getenv("OPENAI_HTTP_TIMEOUT_CONEXAO", 10))
+    )
+    return httpx.Client(limits=limites, timeout=timeout)
+
+
+def obter_cliente_openai(api_key=None, default_headers=None):
+    """
+    Obtém o cliente OpenAI compartilhado para a chave e os headers informados
+
+    O cliente é criado uma única vez por processo e reutiliza o mesmo pool
+    de conexões HTTP (keep-alive), evitando o custo de construção e de
+    handshakes TLS a cada requisição.
+
+    Args:
+        api_key: Chave da API (padrão: variável OPENAI_API_KEY)
+        default_headers: Headers adicionais enviados em todas as chamadas (opcional)
+
+    Returns:
+        Instância de OpenAI
+    """
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    chave = (api_key, tuple(sorted((default_headers or {}).items())))
+
+    cliente = _clientes.get(chave)
+    if cliente is not None:
+        return cliente
+
+    with _lock:
+        cliente = _clientes.get(chave)
+        if cliente is None:
+            _desativar_proxies()
+
+            # O pool de conexões é compartilhado entre todos os clientes da mesma chave
+            http_client = _http_clients.get(api_key)
+            if http_client is None:
+                http_client = _criar_http_client()
+                _http_clients[api_key] = http_client
+
+            cliente = OpenAI(
+                api_key=api_key,
+                default_headers=default_headers,
+                http_client=http_client,
+                max_retries=int(os.getenv("OPENAI_MAX_RETRIES", 2))
+            )
+            _clientes[chave] = cliente
+
+    return cliente
+
+
+def fechar_clientes_openai():
+    """Fecha os pools de conexão e descarta os clientes registrados"""
+    with _lock:
+        for http_client in _http_clients.values():
+            try:
+                http_client.close()
+            except Exception as e:
+                logger.error("Erro ao fechar cliente HTTP: %s", e)
+        _http_clients.clear()
+        _clientes.clear()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo com a estratégia de polling usada para aguardar execuções da OpenAI
+"""
+
+import os
+import time
+import random
+
+
+class ResultadoPolling:
+    """Resultado e contabilidade de um ciclo de polling"""
+
+    def __init__(self):
+        """Inicializa o resultado sem nenhuma consulta"""
+        self.valor = None
+        self.status = None
+        self.consultas = 0
+        self.tempo_total = 0.0
+        self.tempo_espera = 0.0
+        self.prazo_esgotado = False
+        self.consultas_por_status = {}
+        self.tempo_por_status = {}
+
+    def to_dict(self):
+        """Converte o resultado para um dicionário serializável em JSON"""
+        return {
+            "status": self.status,
+            "consultas": self.consultas,
+            "tempo_total": round(self.tempo_total, 4),
+            "tempo_espera": round(self.tempo_espera, 4),
+            "prazo_esgotado": self.prazo_esgotado,
+            "consultas_por_status": dict(self.consultas_por_status),
+            "tempo_por_status": {status: round(tempo, 4) for status, tempo in self.tempo_por_status.items()}
+        }
+
+
+class EstrategiaPolling:
+    """
+    Polling adaptativo com backoff exponencial, jitter e prazo total
+
+    As primeiras consultas são rápidas para capturar execuções curtas sem
+    latência extra; o intervalo cresce pelo fator de backoff até o limite
+    máximo, reduzindo chamadas à API em execuções longas.
+    """
+
+    STATUS_FINAIS = ("completed", "failed", "cancelled", "expired", "requires_action")
+
+    def __init__(self, intervalo_inicial=0.25, intervalo_maximo=3.0, fator=1.6, jitter=0.2, prazo_total=90.0):
+        """
+        Inicializa a estratégia de polling
+
+        Args:
+            intervalo_inicial: Espera antes da segunda consulta, em segundos
+            intervalo_maximo: Limite superior do intervalo entre consultas
+            fator: Multiplicador aplicado ao intervalo a cada consulta
+            jitter: Fração aleatória (+/-) aplicada a cada intervalo
+            prazo_total: Tempo máximo de espera por requisição, em segundos
+        """
+        self.intervalo_inicial = intervalo_inicial
+        self.intervalo_maximo = intervalo_maximo
+        self.fator = fator
+        self.jitter = jitter
+        self.prazo_total = prazo_total
+
+    @classmethod
+    def do_ambiente(cls):
+        """Cria a estratégia a partir das variáveis de ambiente OPENAI_POLL_*"""
+        return cls(
+            intervalo_inicial=float(os.getenv("OPENAI_POLL_INTERVALO_INICIAL", 0.25)),
+            intervalo_maximo=float(os.getenv("OPENAI_POLL_INTERVALO_MAXIMO", 3.0)),
+            fator=float(os.getenv("OPENAI_POLL_FATOR", 1.6)),
+            jitter=float(os.getenv("OPENAI_POLL_JITTER", 0.2)),
+            prazo_total=float(os.getenv("OPENAI_POLL_PRAZO_TOTAL", 90.0))
+        )
+
+    def prazo(self):
+        """Retorna o instante (monotônico) em que o prazo total expira"""
+        return time.monotonic() + self.prazo_total
+
+    def intervalos(self):
+        """Gera a sequência infinita de intervalos de espera"""
+        intervalo = self.intervalo_inicial
+        while True:
+            variacao = intervalo * self.jitter
+            yield max(0.0, intervalo + random.uniform(-variacao, variacao))
+            intervalo = min(intervalo * self.fator, self.intervalo_maximo)
+
+    def aguardar(self, consultar, obter_status=None, ao_mudar_status=None, prazo=None, max_consultas=None):
+        """
+        Consulta repetidamente até obter um status final ou esgotar o prazo
+
+        Args:
+            consultar: Função sem argumentos que retorna o objeto consultado
+            obter_status: Função que extrai o status do objeto (padrão: atributo ``status``)
+            ao_mudar_status: Função chamada com o objeto sempre que o status muda (opcional)
+            prazo: Instante monotônico limite, normalmente obtido com prazo() (opcional)
+            max_consultas: Número máximo de consultas, além do prazo (opcional)
+
+        Returns:
+            ResultadoPolling com o último objeto consultado em ``valor``
+        """
+        obter_status = obter_status or (lambda objeto: objeto.status)
+        if prazo is None:
+            prazo = self.prazo()
+
+        resultado = ResultadoPolling()
+        inicio = time.monotonic()
+        inicio_status = inicio
+        intervalos = self.intervalos()
+
+        while True:
+            resultado.valor = consultar()
+            resultado.consultas += 1
+            agora = time.monotonic()
+
+            status = obter_status(resultado.valor)
+            resultado.consultas_por_status[status] = resultado.consultas_por_status.get(status, 0) + 1
+            if status != resultado.status:
+                if resultado.status is not None:
+                    resultado.tempo_por_status[resultado.status] = (
+                        resultado.tempo_por_status.get(resultado.status, 0.0) + agora - inicio_status
+                    )
+                inicio_status = agora
+                resultado.status = status
+                if ao_mudar_status:
+                    ao_mudar_status(resultado.valor)
+
+            if status in self.STATUS_FINAIS:
+                break
+
+            if max_consultas is not None and resultado.consultas >= max_consultas:
+                resultado.prazo_esgotado = True
+                break
+
+            restante = prazo - agora
+            if restante <= 0:
+                resultado.prazo_esgotado = True
+                break
+
+            espera = min(next(intervalos), restante)
+            time.sleep(espera)
+            resultado.tempo_espera += espera
+
+        fim = time.monotonic()
+        resultado.tempo_por_status[resultado.status] = (
+            resultado.tempo_por_status.get(resultado.status, 0.0) + fim - inicio_status
+        )
+        resultado.tempo_total = fim - inicio
+        return resultado
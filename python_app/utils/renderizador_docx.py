@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de renderização de placeholders em templates DOCX
+"""
+
+import re
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+# Qualquer placeholder no formato [NOME] ou ##NOME##; o nome é validado na renderização,
+# de modo que o custo da busca não depende de quantos placeholders existem
+PADRAO_PLACEHOLDER = re.compile(r'\[[A-Z][A-Z_]*\]|##[A-Z][A-Z_]*##')
+
+
+class ParagrafoMarcado:
+    """Parágrafo do template que contém ao menos um placeholder"""
+
+    __slots__ = ("indice", "texto", "placeholders")
+
+    def __init__(self, indice, texto, placeholders):
+        """
+        Args:
+            indice: Posição do parágrafo entre todos os w:p do corpo, em ordem de documento
+            texto: Texto do parágrafo no template
+            placeholders: Placeholders encontrados, na ordem em que aparecem
+        """
+        self.indice = indice
+        self.texto = texto
+        self.placeholders = placeholders
+
+
+class TemplateCompilado:
+    """
+    Localização dos placeholders de um template, calculada uma única vez
+
+    O corpo do documento (inclusive tabelas) é percorrido uma vez, e só os
+    parágrafos que contêm placeholders são guardados, com o texto completo
+    do parágrafo; assim, placeholders divididos entre vários runs também
+    são encontrados. Na renderização, apenas esses parágrafos são visitados.
+    """
+
+    def __init__(self, documento):
+        """
+        Args:
+            documento: Document do template, antes de qualquer alteração no corpo
+        """
+        self.paragrafos = []
+        self.textos = set()
+        self._contem = {}
+        for indice, elemento in enumerate(documento.element.body.iter(qn('w:p'))):
+            texto = Paragraph(elemento, None).text
+            if not texto:
+                continue
+            self.textos.add(texto)
+            placeholders = PADRAO_PLACEHOLDER.findall(texto)
+            if placeholders:
+                self.paragrafos.append(ParagrafoMarcado(indice, texto, placeholders))
+
+    def contem_texto(self, trecho):
+        """Indica se algum parágrafo do corpo contém o trecho (resultado memorizado)"""
+        if trecho not in self._contem:
+            self._contem[trecho] = any(trecho in texto for texto in self.textos)
+        return self._contem[trecho]
+
+    def renderizar(self, documento, substituir):
+        """
+        Aplica as substituições em uma cópia do template
+
+        Args:
+            documento: Cópia do template compilado (mesma sequência de parágrafos no corpo)
+            substituir: Função chamada como substituir(paragrafo, marcado) para cada
+                parágrafo com placeholders
+        """
+        if not self.paragrafos:
+            return documento
+        elementos = list(documento.element.body.iter(qn('w:p')))
+        corpo = documento._body
+        for marcado in self.paragrafos:
+            substituir(Paragraph(elementos[marcado.indice], corpo), marcado)
+        return documento
+
+
+def substituir_em_runs(paragrafo, valores, padrao=PADRAO_PLACEHOLDER):
+    """
+    Substitui os placeholders editando os nós w:t do parágrafo no lugar
+
+    O texto dos runs é concatenado uma vez e cada ocorrência é localizada
+    nele, mesmo que esteja dividida entre vários runs. O valor é escrito no
+    nó onde a ocorrência começa e o restante dela é retirado dos nós
+    seguintes; os runs, com sua formatação (negrito, itálico, fonte), são
+    mantidos. Só os nós afetados são alterados.
+
+    Args:
+        paragrafo: Paragraph (ou elemento w:p)
+        valores: Dicionário ocorrência -> valor; ocorrências ausentes são mantidas
+        padrao: Expressão regular das ocorrências (por padrão, PADRAO_PLACEHOLDER)
+
+    Returns:
+        True se o parágrafo foi alterado
+    """
+    elemento = getattr(paragrafo, '_p', paragrafo)
+    nos = [t for r in elemento.iterchildren(qn('w:r')) for t in r.iterchildren(qn('w:t'))]
+    textos = [no.text or '' for no in nos]
+    completo = ''.join(textos)
+
+    trocas = [(m.start(), m.end(), valores[m.group(0)] or '')
+              for m in padrao.finditer(completo) if m.group(0) in valores]
+    if not trocas:
+        return False
+
+    j = 0
+    inicio = 0
+    for no, texto in zip(nos, textos):
+        fim = inicio + len(texto)
+        partes = []
+        pos = inicio
+        while pos < fim:
+            if j < len(trocas) and trocas[j][0] <= pos:
+                # Dentro de uma ocorrência: o valor fica no nó onde ela começa
+                comeco, termino, valor = trocas[j]
+                if pos == comeco:
+                    partes.append(str(valor))
+                pos = min(termino, fim)
+                if pos == termino:
+                    j += 1
+            else:
+                proximo = min(trocas[j][0], fim) if j < len(trocas) else fim
+                partes.append(completo[pos:proximo])
+                pos = proximo
+        novo = ''.join(partes)
+        if novo != texto:
+            _escrever_no(no, novo)
+        inicio = fim
+    return True
+
+
+def definir_texto(paragrafo, texto):
+    """
+    Troca todo o texto do parágrafo, mantendo a formatação do primeiro run
+
+    Ao contrário de paragraph.text, que recria os runs sem formatação, o
+    texto é escrito no primeiro run (preservando suas propriedades) e os
+    demais runs são removidos.
+    """
+    elemento = getattr(paragrafo, '_p', paragrafo)
+    runs = list(elemento.iterchildren(qn('w:r')))
+    if not runs:
+        elemento.add_r().text = texto
+        return
+    for run in runs[1:]:
+        elemento.remove(run)
+    runs[0].text = texto
+
+
+def _escrever_no(no, texto):
+    """Escreve o texto no nó w:t; quebras de linha e tabulações viram w:br e w:tab no mesmo run"""
+    if '\n' not in texto and '\t' not in texto:
+        _definir_t(no, texto)
+        return
+    partes = re.split(r'(\n|\t)', texto)
+    _definir_t(no, partes[0])
+    anterior = no
+    for parte in partes[1:]:
+        if parte in ('\n', '\t'):
+            elemento = OxmlElement('w:br' if parte == '\n' else 'w:tab')
+        elif parte:
+            elemento = OxmlElement('w:t')
+            _definir_t(elemento, parte)
+        else:
+            continue
+        anterior.addnext(elemento)
+        anterior = elemento
+
+
+def _definir_t(no, texto):
+    no.text = texto
+    if texto != texto.strip():
+        no.set(qn('xml:space'), 'preserve')
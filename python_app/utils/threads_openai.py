@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de gerenciamento do ciclo de vida dos threads do Assistente da OpenAI
+"""
+
+import os
+import time
+import queue
+import logging
+import sqlite3
+import threading
+from collections import deque
+
+from .metricas import OPENAI_CHAMADA_SEGUNDOS
+
+logger = logging.getLogger(__name__)
+
+# Registro padrão dos threads criados, compartilhado entre os workers
+REGISTRO_PATH_PADRAO = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'threads_openai.sqlite3'
+)
+
+# Estados de um thread no registro
+ESTADO_LIVRE = "livre"
+ESTADO_EM_USO = "em_uso"
+ESTADO_DESCARTADO = "descartado"
+ESTADO_FALHA_EXCLUSAO = "falha_exclusao"
+
+
+class GerenciadorThreads:
+    """
+    Cria, entrega e exclui os threads usados nas gerações
+
+    Threads só são reaproveitados enquanto estão vazios: alguns são criados
+    antecipadamente, em segundo plano, para eliminar a latência de criação
+    na requisição. Depois de usado, o thread é excluído em segundo plano,
+    nunca entregue a outra requisição. Todo thread criado fica em um
+    registro SQLite; os que não forem liberados dentro do TTL (por exemplo,
+    após uma falha do processo) são excluídos pela varredura periódica.
+    """
+
+    def __init__(self, obter_cliente, tamanho_pool=2, ttl_segundos=3600,
+                 intervalo_varredura=300, caminho=REGISTRO_PATH_PADRAO):
+        """
+        Inicializa o gerenciador
+
+        Args:
+            obter_cliente: Função sem argumentos que retorna o cliente OpenAI
+            tamanho_pool: Número de threads vazios mantidos prontos (0 desativa)
+            ttl_segundos: Tempo após o qual um thread não liberado é considerado órfão
+            intervalo_varredura: Intervalo entre varreduras de threads órfãos, em segundos
+            caminho: Arquivo SQLite do registro (":memory:" para manter apenas em memória)
+        """
+        self.obter_cliente = obter_cliente
+        self.tamanho_pool = tamanho_pool
+        self.ttl_segundos = ttl_segundos
+        self.intervalo_varredura = intervalo_varredura
+        self.caminho = caminho
+        self.criados = 0
+        self.reaproveitados = 0
+        self.excluidos = 0
+        self.falhas_exclusao = 0
+        self._livres = deque()
+        self._tarefas = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+        if caminho != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+
+        self._conexao = sqlite3.connect(caminho, timeout=10, check_same_thread=False)
+        with self._lock, self._conexao:
+            if caminho != ":memory:":
+                self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(
+                """
+                CREATE TABLE IF NOT EXISTS threads_openai (
+                    thread_id TEXT PRIMARY KEY,
+                    estado TEXT NOT NULL,
+                    atualizado_em REAL NOT NULL
+                )
+                """
+            )
+
+    @classmethod
+    def do_ambiente(cls, obter_cliente):
+        """Cria o gerenciador a partir das variáveis de ambiente OPENAI_THREADS_*"""
+        return cls(
+            obter_cliente,
+            tamanho_pool=int(os.getenv("OPENAI_THREADS_POOL", 2)),
+            ttl_segundos=float(os.getenv("OPENAI_THREADS_TTL_SEGUNDOS", 3600)),
+            intervalo_varredura=float(os.getenv("OPENAI_THREADS_INTERVALO_VARREDURA", 300)),
+            caminho=os.getenv("OPENAI_THREADS_REGISTRO", REGISTRO_PATH_PADRAO)
+        )
+
+    def iniciar(self):
+        """Inicia a thread de manutenção (criação antecipada, exclusões e varredura)"""
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._executar, name="threads-openai", daemon=True)
+            self._worker.start()
+        self._tarefas.put(("repor", None))
+
+    def obter(self):
+        """
+        Obtém um thread vazio para uma nova geração
+
+        Usa um thread criado antecipadamente, se houver; caso contrário, cria
+        um na hora. O thread deve ser devolvido com liberar().
+
+        Returns:
+            ID do thread
+        """
+        self.iniciar()
+
+        while True:
+            try:
+                thread_id = self._livres.popleft()
+            except IndexError:
+                break
+            # O thread pode ter sido descartado pela varredura de outro processo
+            if self._atualizar_estado(thread_id, ESTADO_EM_USO, ESTADO_LIVRE):
+                self.reaproveitados += 1
+                self._tarefas.put(("repor", None))
+                return thread_id
+
+        thread_id = self._criar(ESTADO_EM_USO)
+        self._tarefas.put(("repor", None))
+        return thread_id
+
+    def liberar(self, thread_id):
+        """Agenda a exclusão do thread em segundo plano"""
+        if not thread_id:
+            return
+        self.iniciar()
+        if self._atualizar_estado(thread_id, ESTADO_DESCARTADO):
+            self._tarefas.put(("excluir", thread_id))
+
+    def varrer(self):
+        """
+        Agenda a exclusão dos threads órfãos
+
+        São órfãos os threads cuja exclusão falhou anteriormente e os que
+        não mudaram de estado dentro do TTL: não liberados (por exemplo, após
+        uma falha do processo) ou descartados sem que a exclusão agendada
+        tenha terminado. Os descartados há menos tempo ainda estão na fila
+        de exclusão e não são agendados de novo.
+
+        Returns:
+            Número de threads agendados para exclusão
+        """
+        limite = time.time() - self.ttl_segundos
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT thread_id, estado FROM threads_openai WHERE estado = ? OR atualizado_em < ?",
+                (ESTADO_FALHA_EXCLUSAO, limite)
+            ).fetchall()
+
+        agendados = 0
+        for thread_id, estado in linhas:
+            # A mudança atômica de estado impede que outro processo agende o mesmo thread
+            if not self._atualizar_estado(
+                thread_id, ESTADO_DESCARTADO, estado,
+                atualizado_antes_de=None if estado == ESTADO_FALHA_EXCLUSAO else limite
+            ):
+                continue
+            if estado == ESTADO_LIVRE:
+                self._remover_livre(thread_id)
+            self._tarefas.put(("excluir", thread_id))
+            agendados += 1
+
+        if agendados:
+            logger.info("Varredura de threads: %s thread(s) órfão(s) agendado(s) para exclusão", agendados)
+        return agendados
+
+    def encerrar(self, timeout=10):
+        """Exclui os threads livres deste processo e aguarda as exclusões pendentes"""
+        while True:
+            try:
+                thread_id = self._livres.popleft()
+            except IndexError:
+                break
+            if self._atualizar_estado(thread_id, ESTADO_DESCARTADO, ESTADO_LIVRE):
+                self._tarefas.put(("excluir", thread_id))
+
+        worker = self._worker
+        if worker and worker.is_alive():
+            self._tarefas.put(("parar", None))
+            worker.join(timeout)
+
+    def estatisticas(self):
+        """Retorna os contadores do gerenciador e o tamanho da fila de tarefas"""
+        return {
+            "livres": len(self._livres),
+            "tamanho_pool": self.tamanho_pool,
+            "criados": self.criados,
+            "reaproveitados": self.reaproveitados,
+            "excluidos": self.excluidos,
+            "falhas_exclusao": self.falhas_exclusao,
+            "tarefas_pendentes": self._tarefas.qsize()
+        }
+
+    def _criar(self, estado):
+        """Cria um thread na OpenAI e o registra com o estado informado"""
+        with OPENAI_CHAMADA_SEGUNDOS.medir(tipo="thread_criacao"):
+            thread = self.obter_cliente().beta.threads.create()
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO threads_openai (thread_id, estado, atualizado_em) VALUES (?, ?, ?)",
+                (thread.id, estado, time.time())
+            )
+        self.criados += 1
+        return thread.id
+
+    def _atualizar_estado(self, thread_id, estado, estado_atual=None, atualizado_antes_de=None):
+        """
+        Altera o estado do thread no registro, de forma atômica
+
+        Returns:
+            True se o registro foi alterado
+        """
+        sql = "UPDATE threads_openai SET estado = ?, atualizado_em = ? WHERE thread_id = ?"
+        parametros = [estado, time.time(), thread_id]
+        if estado_atual is not None:
+            sql += " AND estado = ?"
+            parametros.append(estado_atual)
+        if atualizado_antes_de is not None:
+            sql += " AND atualizado_em < ?"
+            parametros.append(atualizado_antes_de)
+
+        with self._lock, self._conexao:
+            cursor = self._conexao.execute(sql, parametros)
+        return cursor.rowcount == 1
+
+    def _remover_livre(self, thread_id):
+        """Retira o thread da lista de livres deste processo, se estiver nela"""
+        try:
+            self._livres.remove(thread_id)
+        except ValueError:
+            pass
+
+    def _repor(self):
+        """Cria threads vazios até completar o pool"""
+        while len(self._livres) < self.tamanho_pool:
+            try:
+                self._livres.append(self._criar(ESTADO_LIVRE))
+            except Exception as e:
+                logger.error("Erro ao criar thread antecipadamente: %s", e)
+                return
+
+    def _excluir(self, thread_id):
+        """Exclui o thread na OpenAI e o remove do registro"""
+        try:
+            with OPENAI_CHAMADA_SEGUNDOS.medir(tipo="thread_exclusao"):
+                self.obter_cliente().beta.threads.delete(thread_id)
+        except Exception as e:
+            # Um thread inexistente já não ocupa estado remoto
+            if getattr(e, "status_code", None) != 404:
+                self.falhas_exclusao += 1
+                logger.error("Erro ao excluir thread %s: %s", thread_id, e)
+                # Nova tentativa na próxima varredura
+                self._atualizar_estado(thread_id, ESTADO_FALHA_EXCLUSAO, ESTADO_DESCARTADO)
+                return
+
+        with self._lock, self._conexao:
+            self._conexao.execute("DELETE FROM threads_openai WHERE thread_id = ?", (thread_id,))
+        self.excluidos += 1
+
+    def _executar(self):
+        """Laço da thread de manutenção"""
+        proxima_varredura = time.monotonic()
+        while True:
+            if time.monotonic() >= proxima_varredura:
+                try:
+                    self.varrer()
+                except Exception as e:
+                    logger.error("Erro na varredura de threads: %s", e)
+                proxima_varredura = time.monotonic() + self.intervalo_varredura
+
+            try:
+                tarefa, thread_id = self._tarefas.get(
+                    timeout=max(0.0, proxima_varredura - time.monotonic())
+                )
+            except queue.Empty:
+                continue
+
+            if tarefa == "parar":
+                # Concluir as exclusões já agendadas antes de sair
+                while True:
+                    try:
+                        tarefa, thread_id = self._tarefas.get_nowait()
+                    except queue.Empty:
+                        return
+                    if tarefa == "excluir":
+                        self._excluir(thread_id)
+            elif tarefa == "excluir":
+                self._excluir(thread_id)
+            elif tarefa == "repor":
+                self._repor()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Funções comuns aos scripts testar_*.py dos componentes internos
+
+Cada script registra suas verificações com verificar() e termina com
+executar(), que roda as funções de teste, imprime o total de falhas e
+encerra com código de saída diferente de zero se alguma falhou.
+"""
+
+import sys
+
+FALHAS = []
+
+
+def verificar(condicao, descricao):
+    """Imprime o resultado de uma verificação e registra as falhas"""
+    if condicao:
+        print(f"OK: {descricao}")
+    else:
+        print(f"ERRO: {descricao}")
+        FALHAS.append(descricao)
+
+
+def executar(titulo, *testes):
+    """Executa as funções de teste em ordem e encerra o script com o resultado"""
+    print("="*80)
+    print(titulo)
+    print("="*80)
+
+    for teste in testes:
+        teste()
+
+    print("="*80)
+    print(f"Falhas: {len(FALHAS)}")
+    print("="*80)
+    sys.exit(1 if FALHAS else 0)